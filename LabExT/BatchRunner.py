@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+
+Headless batch runner of LabExT. Executes the measurements described in a recipe file without GUI, e.g.:
+
+    labext-batch my_recipe.json
+
+A recipe is a JSON document:
+
+    {
+        "chip": {"path": "/path/to/chip_description.json", "name": "MyChip"},
+        "devices": {"ids": [3], "types": ["WG"]},
+        "measurements": [
+            {
+                "class": "InsertionLossSweep",
+                "parameters": {"wavelength start": 1540.0, "wavelength stop": 1560.0},
+                "instruments": {
+                    "Laser": {"visa": "TCPIP0::192.168.0.2::INSTR", "class": "LaserMainframeKeysight", "channel": 0},
+                    "Power Meter": {"visa": "TCPIP0::192.168.0.2::INSTR", "class": "PowerMeterN7744A", "channel": 1}
+                }
+            }
+        ],
+        "output path": "/path/to/results",
+        "result file format": "JSON (.json)",
+        "compression level": 0,
+        "error policies": {
+            "default": {"action": "skip", "requeue": true},
+            "InsertionLossSweep": {"action": "retry", "retries": 2}
+        },
+        "inter measurement wait time": 0.0,
+        "pipelined execution": false,
+        "fast instrument metadata": false,
+        "addon directories": []
+    }
+
+The device filter is optional, all given criteria must match ("ids", "types" or an inclusive "id range" [min, max]).
+Since stages are not moved, a recipe may only select one device. To measure several devices at the same stage
+position anyway, e.g. with a fiber array covering all of them, set "measure multiple devices without moving stages"
+to true.
+The error policies have the same format as the error_policies.json settings file, without them the run stops at the
+first error ("pause" action).
+All measurements are executed on every selected device, in the order of the devices. Parameters not given keep
+their default values. Neither tkinter nor matplotlib are imported, stage movement and search for peak are not
+supported.
+"""
+
+import json
+import logging
+import sys
+from argparse import ArgumentParser
+from itertools import product
+from os.path import isfile, join
+
+if __name__ == '__main__':
+    # see Main.py, allows running this file directly without installing LabExT
+    from os.path import abspath, dirname
+    sys.path.append(dirname(dirname(abspath(__file__))))
+
+from LabExT.Experiments.ErrorPolicy import ErrorPolicies
+from LabExT.Experiments.HeadlessExperiment import HeadlessExperiment
+from LabExT.Experiments.QueueCheckpoint import QueueCheckpoint
+from LabExT.Experiments.ResultFile import RESULT_FILE_FORMATS
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Instruments.InstrumentAPI import InstrumentAPI
+from LabExT.Instruments.ReusingResourceManager import ReusingResourceManager
+from LabExT.Logs.CustomLogFormatter import CustomLogFormatter
+from LabExT.Utils import get_configuration_file_path
+from LabExT.Wafer.Chip import Chip
+
+BATCH_CHECKPOINT_FILE_NAME = '.labext_batch_checkpoint.json'
+
+
+def load_recipe(file_path):
+    """
+    Loads and validates a batch recipe.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the recipe JSON file.
+
+    Returns
+    -------
+    dict
+        The recipe.
+
+    Raises
+    ------
+    ValueError
+        If a required entry is missing or has a wrong type.
+    """
+    with open(file_path, 'r') as fp:
+        recipe = json.load(fp)
+
+    for key in ['chip', 'measurements', 'output path']:
+        if key not in recipe:
+            raise ValueError('Recipe {:s} has no "{:s}" entry.'.format(file_path, key))
+    if 'path' not in recipe['chip']:
+        raise ValueError('Recipe {:s} has no chip "path".'.format(file_path))
+    if not isinstance(recipe['measurements'], list) or not recipe['measurements']:
+        raise ValueError('Recipe {:s} must contain a non-empty list of "measurements".'.format(file_path))
+    for meas_spec in recipe['measurements']:
+        if 'class' not in meas_spec:
+            raise ValueError('Every measurement in recipe {:s} needs a "class".'.format(file_path))
+    try:
+        ErrorPolicies.from_dict(recipe.get('error policies', {}))
+    except (ValueError, TypeError, AttributeError) as exc:
+        raise ValueError('Invalid error policies in recipe {:s}: {:s}'.format(file_path, str(exc)))
+    result_format = recipe.get('result file format')
+    if result_format is not None and result_format not in RESULT_FILE_FORMATS:
+        raise ValueError('Unknown result file format "{:s}", must be one of: {:s}'.format(
+            str(result_format), ", ".join(RESULT_FILE_FORMATS.keys())))
+    return recipe
+
+
+def filter_devices(devices, device_filter=None):
+    """
+    Returns the devices matching all criteria of a recipe's device filter, sorted by device ID.
+
+    Parameters
+    ----------
+    devices : iterable of Device
+        All devices of the chip.
+    device_filter : dict, optional
+        May contain a list of "ids", a list of "types" and an inclusive "id range" [min, max].
+    """
+    device_filter = device_filter or {}
+    ids = device_filter.get('ids')
+    ids = set(_device_id_key(i) for i in ids) if ids is not None else None
+    types = device_filter.get('types')
+    id_range = device_filter.get('id range')
+    id_range = [_device_id_key(i) for i in id_range] if id_range is not None else None
+
+    selected = []
+    for device in devices:
+        if ids is not None and _device_id_key(device._id) not in ids:
+            continue
+        if types is not None and device._type not in types:
+            continue
+        if id_range is not None and not id_range[0] <= _device_id_key(device._id) <= id_range[1]:
+            continue
+        selected.append(device)
+    return sorted(selected, key=lambda d: _device_id_key(d._id))
+
+
+def _device_id_key(identifier):
+    """ Chip files and recipes may give IDs as numbers or strings, numeric IDs are compared by value. """
+    try:
+        return 0, int(identifier), ''
+    except (TypeError, ValueError):
+        return 1, 0, str(identifier)
+
+
+class BatchRunner:
+    """
+    Executes a recipe headless. Takes the role of the ExperimentManager for the experiment and the measurements, i.e.
+    provides the instrument API and the addon settings.
+    """
+
+    def __init__(self, recipe):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        recipe : dict
+            The recipe as returned by load_recipe().
+        """
+        self.logger = logging.getLogger()
+        self.recipe = recipe
+
+        self.addon_settings = {'addon_search_directories': self._addon_search_directories()}
+        self.peak_searcher = None
+        self.mover = None
+        self.instrument_api = InstrumentAPI(self)
+        self.instrument_api.interactive = False
+
+        chip_desc = recipe['chip']
+        self.chip = Chip(chip_desc['path'], chip_desc.get('name'))
+
+        self.exp = HeadlessExperiment(self, self.chip,
+                                      error_policies=ErrorPolicies.from_dict(recipe.get('error policies', {})))
+        self.exp.save_parameters['Raw output path'].value = recipe['output path']
+        if 'result file format' in recipe:
+            self.exp.save_parameters['Result file format'].value = recipe['result file format']
+        if 'compression level' in recipe:
+            self.exp.save_parameters['Compression level (0: default)'].value = int(recipe['compression level'])
+        if 'store repeated metadata once' in recipe:
+            self.exp.save_parameters['Store repeated metadata once'].value = bool(
+                recipe['store repeated metadata once'])
+        self.exp.exctrl_inter_measurement_wait_time = float(recipe.get('inter measurement wait time', 0.0))
+        self.exp.exctrl_pipelined_execution = bool(recipe.get('pipelined execution', False))
+        self.exp.exctrl_fast_metadata = bool(recipe.get('fast instrument metadata', False))
+        # the batch queue is checkpointed next to its results, independent of the GUI's checkpoint
+        self.exp.queue_checkpoint = QueueCheckpoint(join(recipe['output path'], BATCH_CHECKPOINT_FILE_NAME))
+
+    def _addon_search_directories(self):
+        """ Addon directories from the recipe, or from the LabExT settings if the recipe does not specify any. """
+        if 'addon directories' in self.recipe:
+            return list(self.recipe['addon directories'])
+        addon_settings_file = get_configuration_file_path('addon_paths.json')
+        if not isfile(addon_settings_file):
+            return []
+        with open(addon_settings_file, 'r') as fp:
+            return json.load(fp).get('addon_search_directories', [])
+
+    def setup(self):
+        """ Loads all measurement and instrument classes. """
+        self.exp.import_measurement_classes()
+        self.instrument_api.load_all_instruments()
+
+    def create_measurement(self, meas_spec):
+        """
+        Creates and initializes a measurement as specified by one entry of the recipe's measurements.
+
+        Raises
+        ------
+        ValueError
+            If the measurement class or any of the parameters is unknown.
+        RuntimeError
+            If the instruments could not be initialized.
+        """
+        class_name = meas_spec['class']
+        if class_name not in self.exp.measurements_classes:
+            raise ValueError('Unknown measurement class "{:s}", available are: {:s}'.format(
+                class_name, ", ".join(sorted(self.exp.measurement_list))))
+
+        measurement = self.exp.create_measurement_object(class_name)
+        for pname, pval in meas_spec.get('parameters', {}).items():
+            if pname not in measurement.parameters:
+                raise ValueError('Measurement {:s} has no parameter "{:s}", available are: {:s}'.format(
+                    class_name, pname, ", ".join(measurement.parameters.keys())))
+            measurement.parameters[pname].value = pval
+        measurement.selected_instruments.update(meas_spec.get('instruments', {}))
+        measurement.init_instruments()
+        return measurement
+
+    def build_queue(self):
+        """
+        Fills the experiment's to_do_list with every measurement of the recipe on every selected device.
+
+        Returns
+        -------
+        int
+            Number of queued ToDos.
+        """
+        devices = filter_devices(self.chip._devices.values(), self.recipe.get('devices'))
+        if not devices:
+            raise ValueError('No device of chip {:s} matches the device filter.'.format(str(self.chip._name)))
+        if len(devices) > 1:
+            if not self.recipe.get('measure multiple devices without moving stages', False):
+                raise ValueError('The device filter selects {:d} devices, but the batch runner cannot move the stages '
+                                 'to them. Select a single device or set "measure multiple devices without moving '
+                                 'stages" to true in the recipe.'.format(len(devices)))
+            self.logger.warning('Stages are not moved, all %d devices are measured at the current stage position.',
+                                len(devices))
+        measurements = [self.create_measurement(meas_spec) for meas_spec in self.recipe['measurements']]
+
+        for device, measurement in product(devices, measurements):
+            self.exp.to_do_list.append(ToDo(device, measurement))
+        self.logger.info('Queued %d measurements on %d devices.', len(self.exp.to_do_list), len(devices))
+        return len(self.exp.to_do_list)
+
+    def resume_queue(self):
+        """
+        Fills the experiment's to_do_list from the checkpoint of an interrupted batch run.
+
+        Returns
+        -------
+        int
+            Number of queued ToDos, None if there is no checkpoint.
+        """
+        document = self.exp.queue_checkpoint.load()
+        if document is None:
+            return None
+        n_restored, n_finished, errors = self.exp.restore_queue_checkpoint(document)
+        for err in errors:
+            self.logger.error('Could not resume ToDo: %s', err)
+        if errors:
+            raise RuntimeError('{:d} ToDos of the checkpoint could not be resumed.'.format(len(errors)))
+        return n_restored
+
+    def run(self):
+        """
+        Executes the queue.
+
+        Returns
+        -------
+        int
+            Exit code: 0 if all ToDos were executed successfully, 1 otherwise.
+        """
+        self.exp.run()
+
+        self.logger.info('Batch run finished: %d result files saved, %d measurements failed, %d left in queue.',
+                         len(self.exp.saved_file_paths),
+                         len(self.exp.failed_todos),
+                         len(self.exp.to_do_list))
+        return 0 if not self.exp.failed_todos and not self.exp.to_do_list else 1
+
+
+def main(argv=None):
+    argparser = ArgumentParser(
+        description="""LabExT batch runner. Executes the measurements described in a recipe file on the devices of a
+                       chip, without GUI. The results are saved in the same format as by LabExT."""
+    )
+    argparser.add_argument('recipe', type=str, help='Path to the recipe JSON file.')
+    argparser.add_argument('-r', '--resume', action='store_true',
+                           help='Resume the interrupted run of this recipe from its checkpoint in the output path, '
+                                'instead of queueing all measurements again.')
+    argparser.add_argument('-l', '--log-level', type=str,
+                           help='Logging level of the console output. By default set to "info"',
+                           choices=["debug", "info", "warning", "error", "critical"],
+                           default="info")
+    args = argparser.parse_args(argv)
+
+    logger = logging.getLogger()
+    logger.setLevel(str.upper(args.log_level))
+    sh = logging.StreamHandler(sys.stderr)
+    sh.setFormatter(CustomLogFormatter())
+    logger.addHandler(sh)
+
+    logger.info('LabExT batch runner started with arguments ' + str(sys.argv))
+
+    try:
+        runner = BatchRunner(load_recipe(args.recipe))
+        runner.setup()
+        n_resumed = runner.resume_queue() if args.resume else None
+        if n_resumed is None:
+            if args.resume:
+                logger.info('No checkpoint to resume from, queueing all measurements of the recipe.')
+            runner.build_queue()
+    except (OSError, ValueError, RuntimeError) as exc:
+        logger.error('Could not set up the batch run: %s', exc)
+        return 2
+
+    try:
+        return runner.run()
+    finally:
+        # released VISA sessions are kept open for reuse, close them before the process exits
+        resource_manager = ReusingResourceManager.created_instance()
+        if resource_manager is not None:
+            resource_manager.close_idle_resources()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
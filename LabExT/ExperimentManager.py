@@ -121,6 +121,7 @@ class ExperimentManager:
         self.main_window = MainWindowController(self._root, self)
         if not skip_setup:
             self.main_window.offer_chip_reload_possibility()
+            self.main_window.offer_queue_resume_possibility()
 
         # update status the first time
         self.main_window.model.status_mover_driver_enabled.set(self.mover.mover_enabled)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import logging
+from collections import OrderedDict
+from os import replace
+from os.path import isfile
+
+# keys of the user annotations in a measurement record, edited with the CommentsEditor
+USER_FLAGS_KEY = "user flags"
+USER_COMMENT_KEY = "user comment"
+USER_PLOT_LABEL_KEY = "user plot label"
+ANNOTATION_KEYS = (USER_FLAGS_KEY, USER_COMMENT_KEY, USER_PLOT_LABEL_KEY)
+
+# the annotations of a result file are saved next to it, in a file with this suffix appended to the file name
+ANNOTATIONS_SUFFIX = '.annotations'
+
+
+def annotations_path(result_file_path):
+    """ Returns the path of the annotations sidecar file of a result file. """
+    return result_file_path + ANNOTATIONS_SUFFIX
+
+
+def annotations_of(meas_dict):
+    """ Returns the user annotations contained in a measurement record, without empty ones. """
+    return OrderedDict((k, meas_dict[k]) for k in ANNOTATION_KEYS if meas_dict.get(k))
+
+
+def read_annotations(result_file_path):
+    """
+    Reads the annotations sidecar of a result file.
+
+    Returns
+    -------
+    dict or None
+        The annotations, None if the result file has no sidecar or it cannot be read.
+    """
+    sidecar_path = annotations_path(result_file_path)
+    if not isfile(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path) as f:
+            annotations = json.load(f, object_pairs_hook=OrderedDict)
+    except (OSError, ValueError) as exc:
+        logging.getLogger().warning('Could not read annotations %s: %s', sidecar_path, repr(exc))
+        return None
+    return OrderedDict((k, v) for k, v in annotations.items() if k in ANNOTATION_KEYS)
+
+
+def write_annotations(result_file_path, annotations):
+    """
+    Atomically writes the annotations sidecar of a result file. The result file itself is not touched, so this costs
+    the same regardless of the size of the measurement.
+
+    Parameters
+    ----------
+    result_file_path : str
+        Path of the annotated result file.
+    annotations : dict
+        The annotations, entries with keys other than ANNOTATION_KEYS are ignored.
+    """
+    sidecar_path = annotations_path(result_file_path)
+    tmp_path = sidecar_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(OrderedDict((k, annotations[k]) for k in ANNOTATION_KEYS if k in annotations), f, indent=4)
+    replace(tmp_path, sidecar_path)
+
+
+def merge_annotations(meas_dict, result_file_path):
+    """
+    Merges the annotations sidecar into a measurement record loaded from a result file. The sidecar takes precedence
+    over annotations saved in the result file itself, which older LabExT versions did.
+
+    Returns
+    -------
+    dict
+        The meas_dict, for convenience.
+    """
+    annotations = read_annotations(result_file_path)
+    if annotations is not None:
+        for key in ANNOTATION_KEYS:
+            meas_dict.pop(key, None)
+        meas_dict.update(annotations)
+    return meas_dict
+
+
+def migrate_annotations(meas_dict, result_file_path):
+    """
+    Moves annotations saved in a result file by older LabExT versions into a sidecar, so the result file never needs
+    to be rewritten for editing them. The annotations are left in the result file, the sidecar takes precedence.
+
+    Parameters
+    ----------
+    meas_dict : dict
+        The record loaded from result_file_path.
+    result_file_path : str
+        Path of the result file.
+
+    Returns
+    -------
+    bool
+        True if a sidecar was written.
+    """
+    annotations = annotations_of(meas_dict)
+    if not annotations or isfile(annotations_path(result_file_path)):
+        return False
+    write_annotations(result_file_path, annotations)
+    return True
@@ -7,6 +7,14 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import json
 from collections import OrderedDict
+from os import remove, rename, replace, stat
+from os.path import exists
+
+import numpy as np
+
+from LabExT.Experiments.Compression import open_text
+from LabExT.Experiments.PersistenceService import snapshot
+from LabExT.Utils import NumpyJSONEncoder
 
 
 class AutosaveDict(OrderedDict):
@@ -14,7 +22,8 @@ class AutosaveDict(OrderedDict):
     Dictionary Class which automatically saves its content over time.
     """
 
-    def __init__(self, freq=10, file_path="tmp.json", auto_save=True, *args, **kwargs):
+    def __init__(self, freq=10, file_path="tmp.json", auto_save=True, *args, compression=None, compression_level=None,
+                 **kwargs):
         """
         Constructor
 
@@ -24,12 +33,18 @@ class AutosaveDict(OrderedDict):
             Number of accesses and modifications between saving
         file_path : str
             The file path to the file we want to save.
+        compression : str, optional
+            Codec to compress the save file with, see LabExT.Experiments.Compression. Defaults to plain JSON.
+        compression_level : int, optional
+            Compression level, defaults to the codec's default level.
         """
         super().__init__(*args, **kwargs)
         self.freq = freq
         self.file_path = file_path
         self.modify_count = 0
         self.auto_save = auto_save
+        self.compression = compression
+        self.compression_level = compression_level
 
     def __setitem__(self, *args, **kwargs):
         self.modified()
@@ -54,5 +69,343 @@ class AutosaveDict(OrderedDict):
         """
         Saves itself to a file.
         """
-        with open(self.file_path, "w+") as f:
-            json.dump(self, f, indent=4)
+        with open_text(self.file_path, "w", codec=self.compression, level=self.compression_level) as f:
+            json.dump(self, f, indent=4, cls=NumpyJSONEncoder)
+
+    def finalize(self, final_path):
+        """
+        Saves the content one last time, stops auto-saving and moves the save file to its final location.
+
+        Parameters
+        ----------
+        final_path : str
+            The file path the finished save file should be moved to.
+        """
+        self.save()
+        self.auto_save = False
+        rename(self.file_path, final_path)
+        self.file_path = final_path
+
+
+class _Written:
+    """
+    What the journal holds for a value: the children of a dict, the length and last item of a list, or a fingerprint
+    of any other value. Used to journal only what changed since the last save.
+    """
+
+    __slots__ = ('children', 'length', 'fingerprint')
+
+    def __init__(self, children=None, length=None, fingerprint=None):
+        self.children = children
+        self.length = length
+        self.fingerprint = fingerprint
+
+
+def _fingerprint(value):
+    if isinstance(value, np.ndarray):
+        return 'ndarray', value.shape, str(value.dtype), hash(value.tobytes())
+    return json.dumps(value, cls=NumpyJSONEncoder)
+
+
+def _is_journaled_dict(value):
+    # paths in the journal are JSON lists, only string keys survive the round trip
+    return isinstance(value, dict) and all(isinstance(k, str) for k in value.keys())
+
+
+def _written(value):
+    if _is_journaled_dict(value):
+        return _Written(children={k: _written(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return _Written(length=len(value), fingerprint=_fingerprint(value[-1]) if value else None)
+    return _Written(fingerprint=_fingerprint(value))
+
+
+def _diff(path, value, written, changes):
+    """
+    Appends the changes needed to turn the journaled state `written` at `path` into `value` and returns the new state.
+    Lists which only grew at the end are journaled as appends.
+    """
+    if written is not None and written.children is not None and _is_journaled_dict(value):
+        children = {}
+        for k, v in value.items():
+            children[k] = _diff(path + [k], v, written.children.get(k), changes)
+        for k in written.children.keys():
+            if k not in value:
+                changes.append(('d', path + [k], None))
+        return _Written(children=children)
+
+    if written is not None and written.length is not None and isinstance(value, list) \
+            and len(value) >= written.length \
+            and (written.length == 0 or _fingerprint(value[written.length - 1]) == written.fingerprint):
+        if len(value) > written.length:
+            changes.append(('a', path, value[written.length:]))
+            return _Written(length=len(value), fingerprint=_fingerprint(value[-1]))
+        return written
+
+    if written is not None and written.children is None and written.length is None and not isinstance(value, list) \
+            and not _is_journaled_dict(value) and _fingerprint(value) == written.fingerprint:
+        return written
+
+    changes.append(('s', path, value))
+    return _written(value)
+
+
+class JournaledAutosaveDict(AutosaveDict):
+    """
+    AutosaveDict which keeps its save file as an append-only journal instead of rewriting the whole document.
+
+    Every save appends only what changed since the last save to the journal: values set at any depth of nested dicts,
+    items appended to lists, and deletions. Changes made in place to containers are found on the next save, e.g.
+    `data['values']['x'].append(y)`. Reading a container counts as a modification towards the save frequency, since
+    it is how measurements fill their values. Reading other values does not. Changes of list items other than the last
+    journaled one are not detected, these only end up in the finalized file. If the journal grows larger than
+    compaction_factor times the size of its still valid lines, it is atomically rewritten with one line per key.
+
+    If a PersistenceService is given, saving only takes a snapshot of the changes and the serialization and writing
+    is done on the service's writer thread.
+
+    On finalize, the content is materialized atomically as the usual indented JSON document and the journal is removed.
+    A journal left behind by a crash can be read with load_autosave_file. The journal itself is never compressed, such
+    that all lines but a truncated last one can be read after a crash. The compression applies to the finalized file.
+    """
+
+    journal_header = {"labext_journal": 1}
+
+    def __init__(self, freq=10, file_path="tmp.json.part", auto_save=True, compaction_factor=4, persistence=None,
+                 *args, **kwargs):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        freq : int
+            Number of modifications between saving
+        file_path : str
+            The file path to the journal file.
+        compaction_factor : float
+            The journal gets compacted when it is larger than this factor times the size of its valid lines.
+        persistence : PersistenceService, optional
+            If given, all file writes are executed on this service's writer thread.
+        """
+        self._dirty_keys = OrderedDict()  # key -> True if set or possibly modified in place, False if deleted
+        self._written = {}  # key -> _Written state of its value in the journal
+        self._journal_started = False
+        self._journal_broken = False  # set if a write failed, the next save rewrites the whole journal
+        self._valid_bytes = {}  # path tuple -> bytes of the journal lines still describing the value at this path
+        self._valid_total = 0  # sum of _valid_bytes, kept separately as it is read while the writer thread updates it
+        self.compaction_factor = compaction_factor
+        self.persistence = persistence
+        self.journal_bytes = 0  # current size of the journal on disk
+        self.written_bytes = 0  # total bytes written by this object, for statistics
+        super().__init__(freq, file_path, auto_save, *args, **kwargs)
+        if self.auto_save:
+            # write the header right away, an empty file would look like a reservation left behind by a crash
+            self.save()
+
+    def __setitem__(self, key, value):
+        OrderedDict.__setitem__(self, key, value)
+        self._dirty_keys[key] = True
+        self.modified()
+
+    def __getitem__(self, key):
+        value = OrderedDict.__getitem__(self, key)
+        if isinstance(value, (dict, list, np.ndarray)):
+            # containers can be modified in place after we return them, so mark them dirty after a save triggered here
+            self.modified()
+            self._dirty_keys[key] = True
+        return value
+
+    def __delitem__(self, key):
+        OrderedDict.__delitem__(self, key)
+        self._dirty_keys[key] = False
+        self.modified()
+
+    def save(self):
+        """
+        Appends the changes since the last save to the journal.
+        """
+        take_copy = snapshot if self.persistence is not None else (lambda v: v)
+
+        if not self._journal_started or self._journal_broken \
+                or self.journal_bytes > self.compaction_factor * max(self._valid_total, 1):
+            self._dirty_keys.clear()
+            self._written = {key: _written(value) for key, value in OrderedDict.items(self)}
+            content = [(key, take_copy(value)) for key, value in OrderedDict.items(self)]
+            self._journal_started = True
+            self._journal_broken = False
+            self._submit(self._compact, content, supersedes=True)
+            return
+
+        changes = []
+        for key, present in self._dirty_keys.items():
+            if present and key in self:
+                self._written[key] = _diff([key], OrderedDict.__getitem__(self, key), self._written.get(key), changes)
+            elif not present and key in self._written:
+                del self._written[key]
+                changes.append(('d', [key], None))
+        self._dirty_keys.clear()
+        if not changes:
+            return
+
+        self._submit(self._write_changes, [(kind, path, take_copy(value)) for kind, path, value in changes])
+
+    def _submit(self, write_func, *args, supersedes=False):
+        if self.persistence is None:
+            write_func(*args)
+        else:
+            self.persistence.submit(self, write_func, *args, supersedes=supersedes)
+
+    def _write_changes(self, changes):
+        """
+        Serializes the changes and appends them to the journal.
+        """
+        if self._journal_broken:
+            return  # changes based on a failed write, the next save rewrites the whole journal anyway
+        lines = []
+        for kind, path, value in changes:
+            if kind == 's':
+                entry = {"k": path[0], "v": value} if len(path) == 1 else {"p": path, "v": value}
+            elif kind == 'a':
+                entry = {"a": path, "v": value}
+            else:
+                entry = {"d": path[0]} if len(path) == 1 else {"d": path}
+            line = json.dumps(entry, cls=NumpyJSONEncoder) + "\n"
+            lines.append(line)
+
+            path = tuple(path)
+            if kind in ('s', 'd'):
+                # lines about this value and its children are superseded
+                for p in [p for p in self._valid_bytes.keys() if p[:len(path)] == path]:
+                    self._valid_total -= self._valid_bytes.pop(p)
+            if kind != 'd':
+                self._valid_bytes[path] = self._valid_bytes.get(path, 0) + len(line)
+                self._valid_total += len(line)
+
+        chunk = "".join(lines)
+        try:
+            with open(self.file_path, "a") as f:
+                f.write(chunk)
+        except Exception:
+            self._journal_broken = True
+            raise
+        self.journal_bytes += len(chunk)
+        self.written_bytes += len(chunk)
+
+    def _compact(self, content):
+        """
+        Atomically replaces the journal by one that contains exactly one line per key.
+        """
+        lines = [json.dumps({"k": key, "v": value}, cls=NumpyJSONEncoder) + "\n" for key, value in content]
+        chunk = json.dumps(self.journal_header) + "\n" + "".join(lines)
+
+        tmp_path = self.file_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(chunk)
+            replace(tmp_path, self.file_path)
+        except Exception:
+            self._journal_broken = True
+            raise
+
+        self._valid_bytes = {(key,): len(line) for (key, _), line in zip(content, lines)}
+        self._valid_total = sum(self._valid_bytes.values())
+        self.journal_bytes = len(chunk)
+        self.written_bytes += len(chunk)
+
+    def finalize(self, final_path, writer=None):
+        """
+        Atomically materializes the content at final_path and removes the journal. Blocks until the file is written,
+        also if a persistence service is used.
+
+        Parameters
+        ----------
+        final_path : str
+            The file path of the finished save file.
+        writer : callable, optional
+            Function writer(dict, file_path) which writes the content in the desired file format. Defaults to an
+            indented JSON document.
+        """
+        self.auto_save = False
+
+        if self.persistence is None:
+            self._materialize(final_path, writer)
+        else:
+            # we block until written, so there is no need to take a snapshot of the content
+            self.persistence.submit(self, self._materialize, final_path, writer, supersedes=True)
+            self.persistence.flush(self)
+
+    def _materialize(self, final_path, writer=None):
+        tmp_path = final_path + ".tmp"
+        if writer is None:
+            with open_text(tmp_path, "w", codec=self.compression, level=self.compression_level) as f:
+                json.dump(self, f, indent=4, cls=NumpyJSONEncoder)
+        else:
+            writer(self, tmp_path)
+        self.written_bytes += stat(tmp_path).st_size
+        replace(tmp_path, final_path)
+
+        if exists(self.file_path):
+            remove(self.file_path)
+        self._dirty_keys.clear()
+        self._written.clear()
+        self._valid_bytes.clear()
+        self._valid_total = 0
+        self.journal_bytes = 0
+        self.file_path = final_path
+
+
+def load_autosave_file(file_path):
+    """
+    Loads the content of a save file written by an AutosaveDict. Journals written by JournaledAutosaveDict are
+    replayed, a truncated last line (e.g. due to a crash during writing) is ignored. Compressed files are detected from
+    their content.
+
+    Parameters
+    ----------
+    file_path : str
+        The file path to either a JSON document or a journal.
+
+    Returns
+    -------
+    OrderedDict
+        The recovered content.
+    """
+    with open_text(file_path) as f:
+        first_line = f.readline()
+        try:
+            is_journal = json.loads(first_line) == JournaledAutosaveDict.journal_header
+        except json.JSONDecodeError:
+            is_journal = False
+
+        if not is_journal:
+            f.seek(0)
+            return json.load(f, object_pairs_hook=OrderedDict)
+
+        content = OrderedDict()
+        for line in f:
+            try:
+                entry = json.loads(line, object_pairs_hook=OrderedDict)
+            except json.JSONDecodeError:
+                # incompletely written line, only possible at the end of the journal
+                break
+            if "k" in entry:
+                content[entry["k"]] = entry["v"]
+            elif "p" in entry:
+                parent, key = _parent(content, entry["p"])
+                parent[key] = entry["v"]
+            elif "a" in entry:
+                parent, key = _parent(content, entry["a"])
+                parent[key].extend(entry["v"])
+            elif "d" in entry and isinstance(entry["d"], list):
+                parent, key = _parent(content, entry["d"])
+                parent.pop(key, None)
+            elif "d" in entry:
+                content.pop(entry["d"], None)
+        return content
+
+
+def _parent(content, path):
+    node = content
+    for key in path[:-1]:
+        node = node[key]
+    return node, path[-1]
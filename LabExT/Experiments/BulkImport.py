@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from os import cpu_count
+from threading import Event
+
+from LabExT.Experiments.ResultFile import read_result_metadata, lazy_record
+
+
+def _read_chunk(file_paths):
+    """
+    Reads the meta-data of some result files, executed in the worker processes. Exceptions are returned as text, since
+    not all of them can be pickled. References to the content store are resolved by lazy_record in the calling
+    process, so the records share the referenced documents.
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append((file_path, read_result_metadata(file_path, resolve=False), None))
+        except Exception as exc:
+            results.append((file_path, None, repr(exc)))
+    return results
+
+
+class BulkImporter:
+    """
+    Reads many result files in parallel.
+
+    Parsing JSON is CPU-bound, so the files are read in a pool of processes, in chunks of chunk_size files. Only the
+    meta-data is read, the values of the records are loaded on demand (see LazyValues). Few files are read in the
+    calling process, since starting the pool would take longer than reading them.
+
+    The import can be cancelled from any thread, the files read until then are kept.
+    """
+
+    def __init__(self, file_paths, max_workers=None, chunk_size=16, min_files_for_pool=32):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_paths : list of str
+            The result files to read.
+        max_workers : int, optional
+            Number of worker processes, defaults to the number of CPUs.
+        chunk_size : int
+            Number of files read by one task of a worker process.
+        min_files_for_pool : int
+            Fewer files are read in the calling process.
+        """
+        self.file_paths = list(file_paths)
+        self.max_workers = max_workers if max_workers is not None else (cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.min_files_for_pool = min_files_for_pool
+
+        self.n_total = len(self.file_paths)
+        self.n_done = 0
+        self._cancel_event = Event()
+
+        self.logger = logging.getLogger()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """ Stops reading files, files which are being read by the workers right now are still finished. """
+        self._cancel_event.set()
+
+    def run(self, progress_callback=None):
+        """
+        Reads all files. Blocks until done or cancelled.
+
+        Parameters
+        ----------
+        progress_callback : callable, optional
+            Called as progress_callback(n_done, n_total) after every chunk of files, from the calling thread.
+
+        Returns
+        -------
+        tuple
+            (list of (record, file path) in the order of file_paths, list of (file path, error description)). The
+            records are not validated yet, see StandardExperiment.load_measurement_datasets.
+        """
+        self.n_done = 0
+        results = {}  # file path -> (metadata, error)
+
+        chunks = [self.file_paths[i:i + self.chunk_size] for i in range(0, self.n_total, self.chunk_size)]
+        if self.n_total >= self.min_files_for_pool and self.max_workers > 1:
+            try:
+                self._read_in_pool(chunks, results, progress_callback)
+            except (BrokenProcessPool, OSError) as exc:
+                self.logger.warning('Reading result files in worker processes failed, continuing in this process: %s',
+                                    repr(exc))
+        # read all files which were not read by the pool, or all of them if there is no pool
+        remaining = [fp for fp in self.file_paths if fp not in results]
+        for i in range(0, len(remaining), self.chunk_size):
+            if self.cancelled:
+                break
+            self._collect(_read_chunk(remaining[i:i + self.chunk_size]), results, progress_callback)
+
+        records = []
+        errors = []
+        for file_path in self.file_paths:
+            if file_path not in results:
+                continue  # cancelled before reading it
+            metadata, error = results[file_path]
+            if error is not None:
+                errors.append((file_path, error))
+                continue
+            try:
+                records.append((lazy_record(file_path, metadata), file_path))
+            except KeyError as exc:
+                errors.append((file_path, repr(exc)))  # a referenced document of the content store is missing
+
+        if self.cancelled:
+            self.logger.info('Result file import cancelled after %d of %d files.', len(results), self.n_total)
+        return records, errors
+
+    def _read_in_pool(self, chunks, results, progress_callback):
+        # spawn instead of fork, the GUI process runs Tk and several threads which must not be copied
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(chunks)),
+                                 mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(_read_chunk, chunk) for chunk in chunks]
+            try:
+                for future in as_completed(futures):
+                    if self.cancelled:
+                        break
+                    self._collect(future.result(), results, progress_callback)
+            finally:
+                # tasks which did not start yet are dropped, the executor waits for the running ones
+                for future in futures:
+                    future.cancel()
+
+    def _collect(self, chunk_results, results, progress_callback):
+        for file_path, metadata, error in chunk_results:
+            results[file_path] = (metadata, error)
+        self.n_done += len(chunk_results)
+        if progress_callback is not None:
+            progress_callback(self.n_done, self.n_total)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import gzip
+from collections import OrderedDict
+
+try:
+    import zstandard
+
+    ZSTD_PRESENT = True
+except ImportError:
+    ZSTD_PRESENT = False
+
+try:
+    import lz4.frame
+
+    LZ4_PRESENT = True
+except ImportError:
+    LZ4_PRESENT = False
+
+GZIP = 'gzip'
+ZSTD = 'zstd'
+LZ4 = 'lz4'
+
+# file name extension appended for every codec, e.g. meas.json.gz
+COMPRESSION_EXTENSIONS = OrderedDict([
+    (GZIP, '.gz'),
+    (ZSTD, '.zst'),
+    (LZ4, '.lz4'),
+])
+
+# the first bytes of compressed files, used to detect the codec on load independently of the file name
+_MAGIC_BYTES = OrderedDict([
+    (GZIP, b'\x1f\x8b'),
+    (ZSTD, b'\x28\xb5\x2f\xfd'),
+    (LZ4, b'\x04\x22\x4d\x18'),
+])
+
+# valid and default compression levels of every codec: (min, max, default)
+COMPRESSION_LEVELS = {
+    GZIP: (1, 9, 6),
+    ZSTD: (1, 22, 3),
+    LZ4: (0, 16, 0),
+}
+
+
+def available_codecs():
+    """ Returns the codecs which can be used, gzip is always available, zstd and lz4 if their packages are installed. """
+    present = {GZIP: True, ZSTD: ZSTD_PRESENT, LZ4: LZ4_PRESENT}
+    return [c for c in COMPRESSION_EXTENSIONS if present[c]]
+
+
+def codec_of_path(file_path):
+    """ Returns the codec given by the extension of file_path, or None if the extension is not a compressed one. """
+    for codec, ext in COMPRESSION_EXTENSIONS.items():
+        if file_path.endswith(ext):
+            return codec
+    return None
+
+
+def detect_codec(file_path):
+    """ Returns the codec a file is compressed with, detected from its first bytes, or None if it is not compressed. """
+    with open(file_path, 'rb') as f:
+        head = f.read(4)
+    for codec, magic in _MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def compression_level(codec, level=None):
+    """
+    Returns a valid compression level for codec. None or 0 select the codec's default level, other levels are clipped
+    to the range of the codec.
+    """
+    min_level, max_level, default_level = COMPRESSION_LEVELS[codec]
+    if not level:
+        return default_level
+    return min(max(int(level), min_level), max_level)
+
+
+def open_text(file_path, mode='r', codec=None, level=None):
+    """
+    Opens a text file which is optionally compressed.
+
+    Parameters
+    ----------
+    file_path : str
+        The file to open.
+    mode : str
+        'r' to read, the codec is then detected from the file content. 'w' to write.
+    codec : str, optional
+        Codec to compress with when writing, one of COMPRESSION_EXTENSIONS. None writes uncompressed text.
+    level : int, optional
+        Compression level when writing, see compression_level().
+
+    Returns
+    -------
+    file object
+        Text stream, use it as context manager.
+    """
+    if 'r' in mode:
+        codec = detect_codec(file_path)
+    mode = mode.replace('+', '')
+    if codec is None:
+        return open(file_path, mode)
+
+    if codec == GZIP:
+        return gzip.open(file_path, mode + 't', compresslevel=compression_level(codec, level))
+    if codec == ZSTD:
+        if not ZSTD_PRESENT:
+            raise ImportError("The zstandard package is needed for zstd compressed files: {:s}".format(file_path))
+        return zstandard.open(file_path, mode + 't',
+                              cctx=zstandard.ZstdCompressor(level=compression_level(codec, level)))
+    if codec == LZ4:
+        if not LZ4_PRESENT:
+            raise ImportError("The lz4 package is needed for lz4 compressed files: {:s}".format(file_path))
+        return lz4.frame.open(file_path, mode + 't', compression_level=compression_level(codec, level))
+    raise ValueError("Unknown compression codec {:s}.".format(str(codec)))
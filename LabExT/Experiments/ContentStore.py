@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from os import makedirs, replace
+from os.path import join, isfile, isdir, dirname, abspath
+from threading import Lock
+
+from LabExT.Utils import NumpyJSONEncoder
+
+CAS_DIRECTORY_NAME = '.labext_cas'
+
+# sub-documents of a record which are (mostly) identical for all records of a run
+DEDUPLICATED_KEYS = ('software', 'chip', 'experiment settings', 'instruments')
+
+# a sub-document stored in the content store is replaced by {REFERENCE_KEY: <SHA-256 hex digest of its JSON>}
+REFERENCE_KEY = 'labext_cas'
+
+
+def _is_reference(value):
+    return isinstance(value, dict) and len(value) == 1 and isinstance(value.get(REFERENCE_KEY), str)
+
+
+class ContentStore:
+    """
+    Content-addressed store of JSON documents, used to save sub-documents which repeat in every record of a run only
+    once.
+
+    Every document is stored as file <digest[:2]>/<digest>.json in the store directory, where digest is the SHA-256 of
+    its compact JSON serialization. Documents are never modified or deleted, so writing an already stored document is
+    a no-op and loaded documents can be cached.
+    """
+
+    _instances = {}  # store directory -> ContentStore, shares the caches between all users of a store
+    _instances_lock = Lock()
+
+    def __init__(self, directory, max_cached=256):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        directory : str
+            The store directory, created on the first write.
+        max_cached : int
+            Maximum number of loaded documents kept in memory.
+        """
+        self.directory = abspath(directory)
+        self.max_cached = max_cached
+        self._known_digests = set()  # documents known to exist on disk
+        self._cache = OrderedDict()  # digest -> loaded document, least recently used first
+        self._lock = Lock()
+
+    @classmethod
+    def for_directory(cls, directory):
+        """ Returns the shared store instance of a store directory. """
+        directory = abspath(directory)
+        with cls._instances_lock:
+            if directory not in cls._instances:
+                cls._instances[directory] = cls(directory)
+            return cls._instances[directory]
+
+    @classmethod
+    def find_for_file(cls, file_path):
+        """
+        Returns the store next to a result file, i.e. in the closest parent directory of the file, or None if there
+        is none.
+        """
+        directory = dirname(abspath(file_path))
+        while True:
+            if isdir(join(directory, CAS_DIRECTORY_NAME)):
+                return cls.for_directory(join(directory, CAS_DIRECTORY_NAME))
+            parent = dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    def _blob_path(self, digest):
+        return join(self.directory, digest[:2], digest + '.json')
+
+    def put(self, document):
+        """
+        Stores a JSON serializable document and returns its digest.
+        """
+        blob = json.dumps(document, separators=(',', ':'), cls=NumpyJSONEncoder).encode('utf-8')
+        digest = hashlib.sha256(blob).hexdigest()
+        if digest in self._known_digests:
+            return digest
+
+        blob_path = self._blob_path(digest)
+        if not isfile(blob_path):
+            makedirs(dirname(blob_path), exist_ok=True)
+            # unique temporary file, other threads or processes might store the same document right now
+            tmp_path = '{:s}.{:d}.tmp'.format(blob_path, id(blob))
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+            replace(tmp_path, blob_path)
+        self._known_digests.add(digest)
+        return digest
+
+    def get(self, digest):
+        """
+        Returns the document with the given digest. Documents are cached and shared between all records referencing
+        them, they must not be modified.
+
+        Raises
+        ------
+        KeyError
+            If the document is not in the store.
+        """
+        with self._lock:
+            if digest in self._cache:
+                self._cache.move_to_end(digest)
+                return self._cache[digest]
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                document = json.loads(f.read().decode('utf-8'), object_pairs_hook=OrderedDict)
+        except FileNotFoundError:
+            raise KeyError("Document {:s} not found in content store {:s}.".format(digest, self.directory))
+        with self._lock:
+            self._cache[digest] = document
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        self._known_digests.add(digest)
+        return document
+
+
+def deduplicated_record(meas_dict, store, keys=DEDUPLICATED_KEYS):
+    """
+    Returns a shallow copy of a measurement record, in which the sub-documents under keys are saved in the content
+    store and replaced by references.
+    """
+    record = OrderedDict(meas_dict.items())
+    for key in keys:
+        if isinstance(record.get(key), dict) and not _is_reference(record[key]):
+            record[key] = {REFERENCE_KEY: store.put(record[key])}
+    return record
+
+
+def has_references(meas_dict):
+    """ Returns True if any sub-document of a record is a reference to the content store. """
+    return any(_is_reference(v) for v in meas_dict.values())
+
+
+def resolve_references(meas_dict, file_path):
+    """
+    Replaces the references to the content store in a record loaded from file_path by the referenced documents, in
+    place. The store is searched next to the result file.
+
+    Returns
+    -------
+    dict
+        The meas_dict, for convenience.
+
+    Raises
+    ------
+    KeyError
+        If the record has references, but the store or a referenced document is missing.
+    """
+    if not has_references(meas_dict):
+        return meas_dict
+    store = ContentStore.find_for_file(file_path)
+    if store is None:
+        raise KeyError("Result file {:s} references a content store ({:s}), but there is none.".format(
+            file_path, CAS_DIRECTORY_NAME))
+    for key, value in meas_dict.items():
+        if _is_reference(value):
+            meas_dict[key] = store.get(value[REFERENCE_KEY])
+    return meas_dict
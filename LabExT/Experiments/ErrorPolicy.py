@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import logging
+from collections import OrderedDict
+
+from LabExT.Utils import get_configuration_file_path
+
+# actions of an error policy
+PAUSE = 'pause'
+RETRY = 'retry'
+SKIP = 'skip'
+ERROR_ACTIONS = (PAUSE, RETRY, SKIP)
+
+# outcomes of a failed measurement, i.e. what the experiment does with the failed ToDo
+PAUSED = 'paused'  # the ToDo stays at the front of the queue and the experiment pauses
+RETRIED = 'retried'  # the ToDo stays at the front of the queue and is executed again right away
+REQUEUED = 're-queued'  # the ToDo is moved to the end of the queue
+SKIPPED = 'skipped'  # the ToDo is removed from the queue
+
+DEFAULT_POLICY_KEY = 'default'
+
+
+class ErrorPolicy:
+    """
+    Decides what happens with a ToDo whose measurement raised an exception.
+
+    * pause: the experiment pauses and shows the error, the ToDo stays in the queue. This was the only behaviour before
+      error policies were introduced.
+    * retry: the ToDo is executed again up to `retries` times, optionally after a search for peak. If it still fails,
+      it is handled like with skip.
+    * skip: the experiment continues with the next ToDo. If `requeue` is set, the failed ToDo is moved to the end of
+      the queue once and gets its retries again there, otherwise it is dropped.
+    """
+
+    def __init__(self, action=PAUSE, retries=2, search_for_peak=True, requeue=True):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        action : str
+            One of ERROR_ACTIONS.
+        retries : int
+            Number of immediate re-executions for the retry action.
+        search_for_peak : bool
+            Execute a search for peak before each retry, to recover from a lost fiber coupling.
+        requeue : bool
+            Move ToDos failing with the retry or skip action to the end of the queue once, instead of dropping them.
+        """
+        if action not in ERROR_ACTIONS:
+            raise ValueError("Unknown error policy action {:s}, must be one of {:s}.".format(
+                str(action), ", ".join(ERROR_ACTIONS)))
+        self.action = action
+        self.retries = max(0, int(retries))
+        self.search_for_peak = bool(search_for_peak)
+        self.requeue = bool(requeue)
+
+    def __str__(self):
+        if self.action == PAUSE:
+            return PAUSE
+        desc = self.action
+        if self.action == RETRY:
+            desc += " {:d}x".format(self.retries) + (" with search for peak" if self.search_for_peak else "")
+        if self.requeue:
+            desc += ", re-queue once"
+        return desc
+
+    def decide(self, todo):
+        """
+        Returns the outcome for a failed ToDo, one of PAUSED, RETRIED, REQUEUED or SKIPPED.
+
+        Parameters
+        ----------
+        todo : ToDo
+            The failed ToDo. Its failed_attempts must already include the current failure.
+        """
+        if self.action == PAUSE:
+            return PAUSED
+        if self.action == RETRY and todo.failed_attempts <= self.retries:
+            return RETRIED
+        if self.requeue and not todo.requeued:
+            return REQUEUED
+        return SKIPPED
+
+    def as_dict(self):
+        return OrderedDict([
+            ('action', self.action),
+            ('retries', self.retries),
+            ('search for peak', self.search_for_peak),
+            ('requeue', self.requeue),
+        ])
+
+    @classmethod
+    def from_dict(cls, policy_dict):
+        return cls(action=policy_dict.get('action', PAUSE),
+                   retries=policy_dict.get('retries', 2),
+                   search_for_peak=policy_dict.get('search for peak', True),
+                   requeue=policy_dict.get('requeue', True))
+
+
+class ErrorPolicies:
+    """
+    The error policies of all measurement classes. Measurement classes without their own policy use the default one.
+    """
+
+    def __init__(self, default=None, per_class=None):
+        self.default = default if default is not None else ErrorPolicy()
+        self.per_class = dict(per_class) if per_class is not None else {}  # measurement class name -> ErrorPolicy
+
+    def policy_for(self, measurement):
+        """ Returns the error policy for a measurement object. """
+        return self.per_class.get(measurement.__class__.__name__, self.default)
+
+    def as_dict(self):
+        policies = OrderedDict([(DEFAULT_POLICY_KEY, self.default.as_dict())])
+        for class_name in sorted(self.per_class):
+            policies[class_name] = self.per_class[class_name].as_dict()
+        return policies
+
+    @classmethod
+    def from_dict(cls, policies_dict):
+        """
+        Creates the policies from a dictionary of measurement class name -> policy dictionary. The policy under the
+        key 'default' applies to all other measurement classes.
+        """
+        per_class = {name: ErrorPolicy.from_dict(pd) for name, pd in policies_dict.items()
+                     if name != DEFAULT_POLICY_KEY}
+        default = ErrorPolicy.from_dict(policies_dict[DEFAULT_POLICY_KEY]) \
+            if DEFAULT_POLICY_KEY in policies_dict else None
+        return cls(default=default, per_class=per_class)
+
+    @classmethod
+    def load(cls, file_path=None):
+        """
+        Loads the policies from the settings file. Returns the default policies (pause on any error) if the file does
+        not exist or cannot be read.
+        """
+        if file_path is None:
+            file_path = get_configuration_file_path('error_policies.json')
+        try:
+            with open(file_path, 'r') as fp:
+                return cls.from_dict(json.load(fp))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, AttributeError) as exc:
+            logging.getLogger().warning('Could not load error policies from %s, using defaults: %s',
+                                        file_path, repr(exc))
+            return cls()
+
+    def save(self, file_path=None):
+        """ Saves the policies to the settings file. """
+        if file_path is None:
+            file_path = get_configuration_file_path('error_policies.json')
+        with open(file_path, 'w') as fp:
+            json.dump(self.as_dict(), fp, indent=4)
+
+
+class FailureSummary:
+    """
+    Collects the failed measurements of an experiment run and what was done about them.
+    """
+
+    def __init__(self):
+        self.entries = []  # list of (ToDo, exception description, outcome)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, todo, exc, outcome):
+        self.entries.append((todo, repr(exc), outcome))
+
+    @property
+    def skipped_todos(self):
+        """ The ToDos which were finally given up, i.e. removed from the queue without successful measurement. """
+        return [todo for todo, _, outcome in self.entries if outcome == SKIPPED]
+
+    def text(self):
+        """ Returns a human readable summary with one line per failed ToDo. """
+        if not self.entries:
+            return ""
+        per_todo = OrderedDict()
+        for todo, error, outcome in self.entries:
+            n_failures, _, _ = per_todo.get(id(todo), (0, None, None))
+            per_todo[id(todo)] = (n_failures + 1, todo, (error, outcome))
+
+        lines = ["{:d} measurement errors on {:d} ToDos, {:d} ToDos skipped:".format(
+            len(self.entries), len(per_todo), len(self.skipped_todos))]
+        for n_failures, todo, (error, outcome) in per_todo.values():
+            lines.append("{!s}: failed {:d}x, last error {:s}, then {:s}".format(todo, n_failures, error, outcome))
+        return "\n".join(lines)
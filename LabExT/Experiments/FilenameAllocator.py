@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import os
+import time
+from bisect import bisect_left, insort
+from os.path import basename, dirname, join, normpath
+
+# seconds after which an empty reservation file is considered left behind by a crash, the journal writes its header
+# right after the reservation
+ORPHANED_RESERVATION_AGE_S = 60.0
+
+
+class FilenameAllocator:
+    """
+    Allocates unique save file names in one output directory without scanning the directory for every allocation.
+
+    The directory is listed once on construction and kept as sorted list. Names added later, e.g. by allocations, are
+    kept in a set and a separate sorted list, such that adding a name does not shift the whole directory listing. A
+    name counts as taken if any file name in the directory starts with it, i.e. the same semantics as globbing for
+    "name*". Checking a name is a binary search in both sorted lists.
+
+    Other processes may write to the same directory. To be safe against races, an allocated name is reserved by
+    atomically creating the file name + reserve_ending with O_EXCL. If this fails, the name is marked as taken and the
+    next candidate is tried. Empty reservation files older than ORPHANED_RESERVATION_AGE_S were left behind by a crash
+    and are removed on construction.
+    """
+
+    def __init__(self, directory, reserve_ending=".json.part"):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        directory : str
+            The output directory, must exist.
+        reserve_ending : str
+            File ending of the empty file created to reserve an allocated name.
+        """
+        self.directory = normpath(directory)
+        self.reserve_ending = reserve_ending
+        with os.scandir(self.directory) as entries:
+            listed = [e.name for e in entries if not self._remove_if_orphaned(e)]
+        self._listed = sorted(listed)  # never modified, names added later go to _added
+        self._names = set(listed)
+        self._added = []  # sorted
+
+    def __len__(self):
+        return len(self._names)
+
+    def _remove_if_orphaned(self, entry):
+        """ Removes an empty reservation file left behind by a crash. Returns True if it was removed. """
+        if not entry.name.endswith(self.reserve_ending):
+            return False
+        try:
+            stat = entry.stat()
+            if stat.st_size > 0 or time.time() - stat.st_mtime < ORPHANED_RESERVATION_AGE_S:
+                return False
+            os.remove(entry.path)
+        except OSError:
+            return False  # e.g. written or removed in the meantime
+        logging.getLogger().info('Removed empty reservation file %s left behind by an interrupted measurement.',
+                                 entry.path)
+        return True
+
+    @staticmethod
+    def _has_prefix(sorted_names, name):
+        idx = bisect_left(sorted_names, name)
+        return idx < len(sorted_names) and sorted_names[idx].startswith(name)
+
+    def is_taken(self, name):
+        """ Returns True if any known file name in the directory starts with name. """
+        return name in self._names or self._has_prefix(self._listed, name) or self._has_prefix(self._added, name)
+
+    def add(self, name):
+        """ Marks a file name as existing, e.g. because it was created by other means than this allocator. """
+        if name not in self._names:
+            self._names.add(name)
+            insort(self._added, name)
+
+    def allocate(self, desired_path):
+        """
+        Returns a unique save file path (without file ending) and reserves it on disk.
+
+        If no file in the directory starts with the desired file name, it is used as is. Otherwise "_2", "_3", ... is
+        appended until a free name is found.
+
+        Parameters
+        ----------
+        desired_path : str
+            The desired path of the save file without file ending. Must be located in this allocator's directory.
+
+        Returns
+        -------
+        str
+            The allocated path without file ending. The file path + reserve_ending exists and is empty.
+        """
+        if normpath(dirname(desired_path)) != self.directory:
+            raise ValueError("Path {:s} is not located in {:s}.".format(desired_path, self.directory))
+
+        desired_name = basename(desired_path)
+        candidate = desired_name
+        add_idx = 2
+        while True:
+            if not self.is_taken(candidate) and self._reserve(candidate):
+                return join(self.directory, candidate)
+            candidate = desired_name + "_" + str(add_idx)
+            add_idx += 1
+
+    def _reserve(self, name):
+        """ Atomically creates the reservation file for name. Returns False if it already exists. """
+        reserved_name = name + self.reserve_ending
+        try:
+            fd = os.open(join(self.directory, reserved_name), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # somebody else created it since we listed the directory
+            self.add(reserved_name)
+            return False
+        os.close(fd)
+        self.add(reserved_name)
+        return True
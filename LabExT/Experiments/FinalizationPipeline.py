@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class FinalizationPipeline:
+    """
+    Single worker stage used by the experiment to finalize a measurement record (saving, renaming, table insert and
+    plotting) while the experiment thread already continues with the next ToDo, e.g. moving the stages.
+
+    Jobs are executed strictly in submission order and at most one job is outstanding at any time. Exceptions raised
+    in a job are re-raised in the experiment thread on the next call to wait() or submit().
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="LabExT Finalization")
+        self._pending = None
+
+        # bookkeeping to report the overlap gained by pipelining
+        self.busy_time_s = 0.0  # total time the worker spent executing jobs
+        self.wait_time_s = 0.0  # total time the experiment thread was blocked waiting for the worker
+        self.n_jobs = 0
+
+    @property
+    def saved_time_s(self):
+        """ Wall-clock time which was hidden behind the experiment thread's work. """
+        return max(0.0, self.busy_time_s - self.wait_time_s)
+
+    def _timed_job(self, func, args, kwargs):
+        t_start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.busy_time_s += time.monotonic() - t_start
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Waits for the previously submitted job, then schedules func(*args, **kwargs) on the worker.
+        """
+        self.wait()
+        self._pending = self._executor.submit(self._timed_job, func, args, kwargs)
+        self.n_jobs += 1
+
+    def wait(self):
+        """
+        Blocks until the outstanding job is done. Re-raises any exception of that job.
+        """
+        if self._pending is None:
+            return
+        t_start = time.monotonic()
+        try:
+            self._pending.result()
+        finally:
+            self.wait_time_s += time.monotonic() - t_start
+            self._pending = None
+
+    def shutdown(self):
+        """
+        Waits for all outstanding jobs and stops the worker thread.
+        """
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from LabExT.Experiments.ErrorPolicy import ErrorPolicies
+from LabExT.Experiments.ResultFile import RESULT_FILE_FORMATS
+from LabExT.Experiments.StandardExperiment import StandardExperiment
+from LabExT.Measurements.MeasAPI import MeasParamBool, MeasParamInt, MeasParamString
+
+
+class HeadlessExperiment(StandardExperiment):
+    """
+    StandardExperiment which runs without GUI, used by the batch runner.
+
+    The ToDos are executed by the same routine as in the GUI, so the result files are identical. Instead of Tk
+    variables, the chip and save parameters are plain measurement parameters. Errors during a measurement are handled
+    by the error policies like in the GUI, except that the pause action stops the run instead of showing a dialog.
+
+    Stage movement and search for peak are not supported.
+    """
+
+    def __init__(self, experiment_manager, chip, error_policies=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        experiment_manager : BatchRunner
+            Provides the instrument_api and addon_settings, like the ExperimentManager does in the GUI.
+        chip : Chip
+            The chip whose devices are measured.
+        error_policies : ErrorPolicies, optional
+            How to handle errors during a measurement, defaults to stopping the run on any error.
+        """
+        self.saved_file_paths = []  # paths of all successfully finished result files
+        super().__init__(experiment_manager, None, chip, mover=None)
+        # recorded in every result file, the devices are measured wherever the stages are
+        self.exctrl_auto_move_stages = False
+        # do not use the policies configured in the GUI, a batch run should only depend on its recipe
+        self.error_policies = error_policies if error_policies is not None else ErrorPolicies()
+
+    @property
+    def failed_todos(self):
+        """ The ToDos of the last run which failed and were removed from the queue. """
+        return self.last_run_failures.skipped_todos
+
+    def __setup__(self):
+        """Initialise all experiment specific parameters.
+        """
+        self.chip_parameters['Chip name'] = MeasParamString(value=self._chip._name if self._chip else 'UnknownChip')
+        self.chip_parameters['Chip path'] = MeasParamString(value=self._chip._path if self._chip else '')
+        self.save_parameters['Raw output path'] = MeasParamString(value=self._default_save_path)
+        self.save_parameters['Result file format'] = MeasParamString(value=next(iter(RESULT_FILE_FORMATS)))
+        self.save_parameters['Compression level (0: default)'] = MeasParamInt(value=0)
+        self.save_parameters['Store repeated metadata once'] = MeasParamBool(value=False)
+
+    def show_meas_finished_infobox(self):
+        self.logger.info("Measurements finished!")
+
+    def sync_execution_control(self):
+        # the exctrl_* variables are set directly, there is no GUI to read them from
+        pass
+
+    def pause_on_error(self, todo, exc):
+        # stop after this ToDo, it stays in the queue
+        self.exctrl_pause_after_device = True
+
+    def load_measurement_dataset(self, meas_dict, file_path, force_gui_update=True):
+        # records are not kept in memory, there is nobody to look at them during an unattended run
+        self.saved_file_paths.append(file_path)
+
+    def update(self, plot_new_meas=False):
+        pass
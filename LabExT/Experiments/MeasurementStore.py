@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from collections import OrderedDict
+
+
+def calc_measurement_key(measurement):
+    """calculate the unique but hardly one-way functional 'hash' of a measurement"""
+    hash_str = str(measurement["timestamp_iso_known"])
+    hash_str += str(measurement["device"]["id"])
+    hash_str += str(measurement["device"]["type"])
+    hash_str += str(measurement["name_known"])
+    return hash_str
+
+
+def calc_device_key(measurement):
+    """calculate the key under which the measurement's device is indexed: (chip name, device id, device type)"""
+    chip = measurement.get("chip")
+    chip_name = chip.get("name") if isinstance(chip, dict) else None
+    return str(chip_name), str(measurement["device"]["id"]), str(measurement["device"]["type"])
+
+
+class MeasurementStore:
+    """
+    Ordered in-memory store of finished measurement records.
+
+    Records are indexed by their measurement key (see calc_measurement_key) and by their device (see calc_device_key),
+    such that duplicate detection, lookup and removal are O(1). Records must have been validated by
+    StandardExperiment.load_measurement_dataset, i.e. carry the *_known keys.
+
+    Like ObservableList, the store notifies subscribers via the callback lists item_added, item_removed and on_clear.
+    The item_added and item_removed callbacks always receive the list of affected records. Bulk operations notify
+    only once.
+    """
+
+    def __init__(self):
+        self._records = OrderedDict()  # measurement key -> record
+        self._by_device = {}  # device key -> OrderedDict of measurement key -> record
+        self._keys = []  # measurement keys in insertion order for positional access, None if outdated by a removal
+
+        self.item_added = list()
+        self.item_removed = list()
+        self.on_clear = list()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    def __getitem__(self, index):
+        """ Returns the index-th record in insertion order. """
+        if index < 0:
+            index += len(self._records)
+        if not 0 <= index < len(self._records):
+            raise IndexError("measurement store index out of range")
+        if self._keys is None:
+            self._keys = list(self._records.keys())
+        return self._records[self._keys[index]]
+
+    def __contains__(self, record):
+        return self.contains_hash(calc_measurement_key(record))
+
+    def contains_hash(self, meas_hash):
+        """ Returns True if a record with the given measurement key is stored. """
+        return meas_hash in self._records
+
+    def get(self, meas_hash, default=None):
+        """ Returns the record with the given measurement key. """
+        return self._records.get(meas_hash, default)
+
+    def hashes(self):
+        """ Returns the measurement keys of all records in insertion order. """
+        return list(self._records.keys())
+
+    def records_of_device(self, chip_name, device_id, device_type):
+        """ Returns all records of the given device in insertion order. """
+        by_hash = self._by_device.get((str(chip_name), str(device_id), str(device_type)), {})
+        return list(by_hash.values())
+
+    def add(self, record, notify=True):
+        """
+        Adds a record to the store.
+
+        Parameters
+        ----------
+        record : dict
+            The validated measurement record.
+        notify : bool
+            Set to False to not notify the item_added subscribers.
+
+        Raises
+        ------
+        ValueError
+            If a record with the same measurement key is already stored.
+        """
+        meas_hash = calc_measurement_key(record)
+        if meas_hash in self._records:
+            raise ValueError("Duplicate measurement found!")
+        self._insert(meas_hash, record)
+
+        if notify:
+            for callback in self.item_added:
+                callback([record])
+
+    def add_many(self, records, notify=True):
+        """
+        Adds multiple records to the store and notifies the item_added subscribers once. No record is added if
+        any of them is a duplicate.
+
+        Raises
+        ------
+        ValueError
+            If any record has the same measurement key as a stored one or another one of records.
+        """
+        hashed = [(calc_measurement_key(r), r) for r in records]
+        new_hashes = set()
+        for meas_hash, _ in hashed:
+            if meas_hash in self._records or meas_hash in new_hashes:
+                raise ValueError("Duplicate measurement found!")
+            new_hashes.add(meas_hash)
+
+        for meas_hash, record in hashed:
+            self._insert(meas_hash, record)
+
+        if notify and hashed:
+            for callback in self.item_added:
+                callback([r for _, r in hashed])
+
+    def remove(self, record, notify=True):
+        """
+        Removes a record from the store.
+
+        Raises
+        ------
+        KeyError
+            If the record is not stored.
+        """
+        self._delete(calc_measurement_key(record))
+
+        if notify:
+            for callback in self.item_removed:
+                callback([record])
+
+    def remove_many(self, records, notify=True):
+        """
+        Removes multiple records from the store and notifies the item_removed subscribers once. Records which are
+        not stored are ignored.
+        """
+        removed = []
+        for record in records:
+            meas_hash = calc_measurement_key(record)
+            if meas_hash in self._records:
+                removed.append(self._delete(meas_hash))
+
+        if notify and removed:
+            for callback in self.item_removed:
+                callback(removed)
+
+    def clear(self, notify=True):
+        """
+        Removes all records from the store.
+        """
+        self._records.clear()
+        self._by_device.clear()
+        self._keys = []
+
+        if notify:
+            for callback in self.on_clear:
+                callback()
+
+    def _insert(self, meas_hash, record):
+        self._records[meas_hash] = record
+        if self._keys is not None:
+            self._keys.append(meas_hash)
+        self._by_device.setdefault(calc_device_key(record), OrderedDict())[meas_hash] = record
+
+    def _delete(self, meas_hash):
+        record = self._records.pop(meas_hash)
+        self._keys = None  # rebuilt on the next positional access, once for many removals
+        dev_key = calc_device_key(record)
+        dev_records = self._by_device[dev_key]
+        dev_records.pop(meas_hash)
+        if not dev_records:
+            del self._by_device[dev_key]
+        return record
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+import time
+from collections import deque
+from queue import Queue
+from threading import Thread, Event, Lock
+
+import numpy as np
+
+
+def snapshot(obj):
+    """
+    Returns a structural copy of obj, such that later modifications of obj do not alter the copy. Dicts, lists and
+    tuples are copied recursively, NumPy arrays are copied, all other objects are treated as immutable and are shared.
+
+    This is much cheaper than a deep copy or a serialization, since only container objects are duplicated.
+    """
+    if isinstance(obj, dict):
+        return {k: snapshot(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [snapshot(v) for v in obj]
+    elif isinstance(obj, np.ndarray):
+        return obj.copy()
+    else:
+        return obj
+
+
+class PersistenceService:
+    """
+    Writes files on a dedicated writer thread, such that the experiment thread does not stall during serialization.
+
+    Jobs are queued in a bounded FIFO queue and executed in order. If the queue is full, submit() blocks until the
+    writer caught up. Exceptions raised by jobs are stored per owner and re-raised by flush(), unless a later job of
+    the same owner rewrote everything the failed job should have written.
+    """
+
+    def __init__(self, max_queue_size=16, n_latencies_kept=1000):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        max_queue_size : int
+            Maximum number of queued write jobs before submit() blocks.
+        n_latencies_kept : int
+            Number of most recent write latencies kept for statistics.
+        """
+        self.logger = logging.getLogger()
+
+        self._queue = Queue(maxsize=max_queue_size)
+        self._errors = {}  # owner token -> exception of last failed job
+        self._errors_lock = Lock()
+
+        # metrics
+        self.max_queue_depth = 0
+        self.n_writes = 0
+        self.n_failed_writes = 0
+        self.write_latencies_s = deque(maxlen=n_latencies_kept)
+
+        self._thread = Thread(target=self._writer_loop, name="LabExT Persistence", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_depth(self):
+        """ Number of currently queued write jobs. """
+        return self._queue.qsize()
+
+    @staticmethod
+    def _token(owner):
+        # unlike id(owner), the token cannot be reused by another object after the owner was garbage collected
+        token = getattr(owner, '_persistence_token', None)
+        if token is None:
+            token = owner._persistence_token = object()
+        return token
+
+    def submit(self, owner, write_func, *args, supersedes=False):
+        """
+        Queues write_func(*args) for execution on the writer thread.
+
+        Parameters
+        ----------
+        owner : object
+            Object on whose behalf the job writes, used to attribute errors in flush(). Must allow setting attributes.
+        write_func : callable
+            Function executing the write. Its arguments must not be modified after submission.
+        supersedes : bool
+            Set if the job rewrites everything earlier jobs of the owner wrote, e.g. a whole file. If it succeeds,
+            the errors of the earlier jobs are discarded.
+        """
+        self._queue.put((self._token(owner), write_func, args, supersedes))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def flush(self, owner=None):
+        """
+        Blocks until all jobs submitted so far are written.
+
+        Parameters
+        ----------
+        owner : object, optional
+            If given, the exception of a failed job of this owner is re-raised.
+        """
+        done = Event()
+        self._queue.put((None, done.set, (), False))
+        done.wait()
+
+        if owner is not None:
+            with self._errors_lock:
+                exc = self._errors.pop(self._token(owner), None)
+            if exc is not None:
+                raise exc
+
+    def stats(self):
+        """
+        Returns a dictionary with the queue depth and write latency metrics of this service.
+        """
+        latencies = sorted(self.write_latencies_s)
+        n = len(latencies)
+        return {
+            'queue depth': self.queue_depth,
+            'max queue depth': self.max_queue_depth,
+            'writes': self.n_writes,
+            'failed writes': self.n_failed_writes,
+            'mean write latency s': sum(latencies) / n if n else 0.0,
+            'p95 write latency s': latencies[min(n - 1, int(0.95 * n))] if n else 0.0,
+            'max write latency s': latencies[-1] if n else 0.0,
+        }
+
+    def _writer_loop(self):
+        while True:
+            owner_token, write_func, args, supersedes = self._queue.get()
+            if owner_token is None:
+                # flush marker, nothing to measure
+                write_func(*args)
+                continue
+
+            t_start = time.monotonic()
+            try:
+                write_func(*args)
+                self.n_writes += 1
+                if supersedes:
+                    with self._errors_lock:
+                        self._errors.pop(owner_token, None)
+            except Exception as exc:
+                self.n_failed_writes += 1
+                self.logger.exception('Background write failed: %s', repr(exc))
+                with self._errors_lock:
+                    self._errors[owner_token] = exc
+            finally:
+                self.write_latencies_s.append(time.monotonic() - t_start)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+
+class PhaseTimer:
+    """
+    Measures the time spent in named phases with a monotonic clock.
+
+    Phases can be nested, e.g. the z-lift within a stage move. The time of a nested phase is only attributed to the
+    nested phase and is subtracted from the enclosing one, such that the durations of all phases add up to the total
+    time measured. Phases entered multiple times accumulate their durations.
+    """
+
+    def __init__(self):
+        self.durations = OrderedDict()  # phase name -> accumulated duration in seconds
+        self._nested_time_stack = []  # time spent in nested phases, for every currently open phase
+
+    @contextmanager
+    def phase(self, name):
+        """ Context manager timing the enclosed code as phase name. """
+        self._nested_time_stack.append(0.0)
+        t_start = time.monotonic()
+        try:
+            yield
+        finally:
+            total = time.monotonic() - t_start
+            nested = self._nested_time_stack.pop()
+            self.add(name, total - nested)
+            if self._nested_time_stack:
+                self._nested_time_stack[-1] += total
+
+    def add(self, name, duration_s):
+        """ Adds duration_s seconds to the phase name. """
+        self.durations[name] = self.durations.get(name, 0.0) + duration_s
+
+    def as_dict(self):
+        """ Returns the phase durations in seconds, rounded to microseconds. """
+        return OrderedDict((name, round(d, 6)) for name, d in self.durations.items())
+
+
+def timed_phase(phase_timer, name):
+    """ Returns a context manager timing phase name on phase_timer, or doing nothing if phase_timer is None. """
+    if phase_timer is None:
+        return nullcontext()
+    return phase_timer.phase(name)
+
+
+class RunTimingSummary:
+    """
+    Aggregates the phase timings of all measurement records of an experiment run.
+    """
+
+    def __init__(self):
+        self._samples = OrderedDict()  # phase name -> list of durations in seconds
+        self._devices = set()
+        self.n_records = 0
+        self._t_start = time.monotonic()
+        self.wall_clock_s = 0.0
+
+    def add_record(self, durations, device_key=None):
+        """
+        Adds the phase durations of one measurement record.
+
+        Parameters
+        ----------
+        durations : dict
+            Phase name -> duration in seconds.
+        device_key : hashable, optional
+            Identifies the measured device, used to count the devices per hour.
+        """
+        for name, duration_s in durations.items():
+            self._samples.setdefault(name, []).append(duration_s)
+        if device_key is not None:
+            self._devices.add(device_key)
+        self.n_records += 1
+
+    def stop(self):
+        """ Stops the wall-clock time of the run. """
+        self.wall_clock_s = time.monotonic() - self._t_start
+
+    @property
+    def devices_per_hour(self):
+        if self.wall_clock_s <= 0.0:
+            return 0.0
+        return len(self._devices) * 3600.0 / self.wall_clock_s
+
+    def summary(self):
+        """ Returns the aggregated timings as dictionary. """
+        phases = OrderedDict()
+        for name, samples in self._samples.items():
+            phases[name] = OrderedDict([
+                ('count', len(samples)),
+                ('total s', round(float(np.sum(samples)), 6)),
+                ('p50 s', round(float(np.percentile(samples, 50)), 6)),
+                ('p95 s', round(float(np.percentile(samples, 95)), 6)),
+            ])
+        return OrderedDict([
+            ('records', self.n_records),
+            ('devices', len(self._devices)),
+            ('wall clock s', round(self.wall_clock_s, 3)),
+            ('devices per hour', round(self.devices_per_hour, 2)),
+            ('phases', phases),
+        ])
+
+    def status_text(self):
+        """ Returns a one-line summary for the main window's status area. """
+        if not self._samples:
+            return ""
+        slowest = max(self._samples.items(), key=lambda kv: np.sum(kv[1]))
+        return "Last run: {:d} records, {:.1f} devices/h, p50 per record: {:s}. Most time spent in {:s}.".format(
+            self.n_records,
+            self.devices_per_hour,
+            ", ".join("{:s} {:.2f}s".format(name, float(np.percentile(samples, 50)))
+                      for name, samples in self._samples.items()),
+            slowest[0])
+
+    def write(self, file_path):
+        """ Writes the summary as JSON document to file_path. """
+        with open(file_path, 'w') as f:
+            json.dump(self.summary(), f, indent=4)
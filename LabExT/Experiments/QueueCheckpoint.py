@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import json
+import logging
+import os
+from os.path import exists
+
+from LabExT.Utils import NumpyJSONEncoder, get_configuration_file_path
+
+
+CHECKPOINT_VERSION = 1
+
+
+def todo_to_dict(todo, save_file_path=None):
+    """
+    Serializes a ToDo to everything needed to re-create it: the device, the measurement class, the measurement's
+    parameter values and its selected instruments.
+
+    Parameters
+    ----------
+    todo : ToDo
+        The ToDo to serialize.
+    save_file_path : str, optional
+        Allocated save file path (without file ending) if the ToDo is currently being executed.
+    """
+    device = todo.device
+    measurement = todo.measurement
+    entry = {
+        'device': {
+            'id': device._id,
+            'in_position': device._in_position,
+            'out_position': device._out_position,
+            'type': device._type,
+            'parameters': device._parameters,
+        },
+        'measurement': measurement.__class__.__name__,
+        'parameters': {pname: param.value for pname, param in measurement.parameters.items()},
+        'selected_instruments': measurement.selected_instruments,
+    }
+    if todo.pinned:
+        entry['pinned'] = True
+    if save_file_path is not None:
+        entry['save file path'] = save_file_path
+    return entry
+
+
+class QueueCheckpoint:
+    """
+    Persists the pending ToDo queue of an experiment run, such that a run interrupted by a crash can be resumed.
+
+    The checkpoint is a single compact JSON document. Every save atomically replaces the whole file, so the checkpoint
+    on disk is always either the old or the new queue, never a partially written one.
+
+    The ToDo which is currently executed is saved together with its allocated save file path. If its final result file
+    exists when resuming, the ToDo finished before the crash and is skipped.
+    """
+
+    def __init__(self, file_path=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_path : str, optional
+            Path of the checkpoint file, defaults to queue_checkpoint.json in the LabExT settings directory.
+        """
+        self.logger = logging.getLogger()
+        if file_path is None:
+            file_path = get_configuration_file_path('queue_checkpoint.json')
+        self.file_path = file_path
+
+    def exists(self):
+        return exists(self.file_path)
+
+    def save(self, todos, chip_name=None, chip_path=None, output_path=None, result_file_ext=".json",
+             current_save_file_path=None):
+        """
+        Atomically writes the pending ToDos to the checkpoint file.
+
+        Parameters
+        ----------
+        todos : list
+            The pending ToDos in execution order.
+        chip_name, chip_path : str, optional
+            The chip the ToDos belong to.
+        output_path : str, optional
+            The directory the result files are saved to.
+        result_file_ext : str
+            File ending of successfully finished result files.
+        current_save_file_path : str, optional
+            Allocated save file path of the first ToDo, if it is currently being executed.
+        """
+        document = {
+            'version': CHECKPOINT_VERSION,
+            'saved': datetime.datetime.now().isoformat(),
+            'chip name': chip_name,
+            'chip path': chip_path,
+            'output path': output_path,
+            'result file ending': result_file_ext,
+            'todos': [todo_to_dict(todo, current_save_file_path if idx == 0 else None)
+                      for idx, todo in enumerate(todos)],
+        }
+
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(document, f, separators=(',', ':'), cls=NumpyJSONEncoder)
+            # the data must be on disk before the rename, otherwise a power loss can leave an empty checkpoint
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
+    def load(self):
+        """
+        Returns the checkpoint document, or None if there is no (readable) checkpoint.
+        """
+        if not self.exists():
+            return None
+        try:
+            with open(self.file_path) as f:
+                document = json.load(f)
+        except (OSError, json.JSONDecodeError) as exc:
+            self.logger.warning('Could not read queue checkpoint %s: %s', self.file_path, exc)
+            return None
+        if document.get('version') != CHECKPOINT_VERSION or not document.get('todos'):
+            return None
+        return document
+
+    def clear(self):
+        """ Removes the checkpoint file. """
+        if self.exists():
+            os.remove(self.file_path)
+
+    @staticmethod
+    def is_finished(entry, document):
+        """ Returns True if the final result file of the checkpointed ToDo entry exists. """
+        save_file_path = entry.get('save file path')
+        if save_file_path is None:
+            return False
+        return exists(save_file_path + document.get('result file ending', ".json"))
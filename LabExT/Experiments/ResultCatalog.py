@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import datetime
+import json
+import logging
+import sqlite3
+from contextlib import contextmanager
+from os import walk, stat
+from os.path import join, relpath, abspath, sep, dirname, isfile
+
+from LabExT.Experiments.Annotations import USER_FLAGS_KEY, USER_COMMENT_KEY, USER_PLOT_LABEL_KEY, annotations_path, \
+    migrate_annotations
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Experiments.ResultFile import RESULT_FILE_EXTENSIONS
+from LabExT.Utils import NumpyJSONEncoder
+
+CATALOG_FILE_NAME = '.labext_catalog.sqlite'
+CATALOG_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    file_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    chip_name TEXT,
+    device_id,
+    device_type TEXT,
+    measurement_name TEXT,
+    timestamp_start TEXT,
+    timestamp_end TEXT,
+    finished INTEGER,
+    error TEXT,
+    settings TEXT,
+    user_comment TEXT,
+    user_flags TEXT,
+    user_plot_label TEXT
+);
+CREATE INDEX IF NOT EXISTS records_device ON records (chip_name, device_id, device_type);
+CREATE INDEX IF NOT EXISTS records_measurement ON records (measurement_name);
+CREATE INDEX IF NOT EXISTS records_timestamp ON records (timestamp_start);
+CREATE TABLE IF NOT EXISTS other_files (
+    file_path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+"""
+
+_RECORD_COLUMNS = ('file_path', 'mtime', 'size', 'chip_name', 'device_id', 'device_type', 'measurement_name',
+                   'timestamp_start', 'timestamp_end', 'finished', 'error', 'settings', 'user_comment', 'user_flags',
+                   'user_plot_label')
+
+
+def iso_timestamp(timestamp):
+    """
+    Converts a LabExT timestamp (e.g. 2022-06-01_120000) to ISO format (2022-06-01T12:00:00), such that timestamps
+    can be compared as strings. Timestamps which are already in ISO format are returned unchanged.
+    """
+    if timestamp is None:
+        return None
+    try:
+        return datetime.datetime.strptime(str(timestamp), '%Y-%m-%d_%H%M%S').isoformat()
+    except ValueError:
+        return str(timestamp)
+
+
+def is_measurement_record(meas_dict):
+    """ Returns True if a loaded JSON document looks like a measurement record, not e.g. like a run timing summary. """
+    return isinstance(meas_dict, dict) and isinstance(meas_dict.get('device'), dict) and 'values' in meas_dict
+
+
+def _file_signature(file_path):
+    """
+    Returns (mtime, size) of a result file, used to detect changes. Editing the annotations sidecar counts as change,
+    so the newer modification time of the result file and its sidecar is used.
+    """
+    st = stat(file_path)
+    mtime = st.st_mtime
+    sidecar_path = annotations_path(file_path)
+    if isfile(sidecar_path):
+        mtime = max(mtime, stat(sidecar_path).st_mtime)
+    return mtime, st.st_size
+
+
+def _record_row(rel_path, mtime, size, meas_dict):
+    """ Returns the catalog row of a measurement record, in the order of _RECORD_COLUMNS. """
+    chip = meas_dict.get('chip')
+    device = meas_dict['device']
+    error = meas_dict.get('error') or None
+    if isinstance(error, dict):
+        error = error.get('desc', json.dumps(error, cls=NumpyJSONEncoder))
+    start = meas_dict.get('timestamp iso start', meas_dict.get('timestamp start', meas_dict.get('timestamp')))
+    end = meas_dict.get('timestamp end', meas_dict.get('timestamp'))
+    flags = meas_dict.get(USER_FLAGS_KEY)
+    return (rel_path,
+            mtime,
+            size,
+            chip.get('name') if isinstance(chip, dict) else None,
+            device.get('id'),
+            device.get('type'),
+            meas_dict.get('measurement name', meas_dict.get('name')),
+            iso_timestamp(start),
+            iso_timestamp(end),
+            int(bool(meas_dict.get('finished', False))),
+            None if error is None else str(error),
+            json.dumps(meas_dict.get('measurement settings', {}), cls=NumpyJSONEncoder),
+            meas_dict.get(USER_COMMENT_KEY) or None,
+            json.dumps(flags) if flags else None,
+            meas_dict.get(USER_PLOT_LABEL_KEY) or None)
+
+
+class ResultCatalog:
+    """
+    SQLite index of all measurement records below a directory, usually the raw output path of the experiment.
+
+    The catalog stores the meta-data of every record (chip, device, measurement name, timestamps, finished and error
+    state, measurement settings and the user annotations) but no values. It is kept in the file .labext_catalog.sqlite
+    in the directory, paths are stored relative to it such that the directory can be moved.
+
+    The experiment adds every result file it saves, files copied in or changed otherwise are added by rescan(), which
+    only reads files whose modification time or size changed.
+
+    Every method opens its own database connection, so the catalog can be used from any thread.
+    """
+
+    def __init__(self, directory, file_path=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        directory : str
+            The directory whose result files are indexed.
+        file_path : str, optional
+            Path of the SQLite database, defaults to .labext_catalog.sqlite in directory.
+        """
+        self.directory = abspath(directory)
+        self.file_path = file_path if file_path is not None else join(self.directory, CATALOG_FILE_NAME)
+        self.logger = logging.getLogger()
+
+        with self._connection() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != CATALOG_SCHEMA_VERSION:
+                # the catalog only contains data from the result files, so an outdated one is simply rebuilt
+                conn.executescript('DROP TABLE IF EXISTS records; DROP TABLE IF EXISTS other_files;')
+                conn.executescript(_SCHEMA)
+                conn.execute('PRAGMA user_version = {:d}'.format(CATALOG_SCHEMA_VERSION))
+
+    @classmethod
+    def find_for_file(cls, file_path):
+        """
+        Returns the catalog indexing a result file, i.e. the one in the closest parent directory of the file, or None
+        if there is none.
+        """
+        directory = dirname(abspath(file_path))
+        while True:
+            if isfile(join(directory, CATALOG_FILE_NAME)):
+                return cls(directory)
+            parent = dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.file_path, timeout=30)
+        try:
+            with conn:  # commits on success, rolls back on exceptions
+                yield conn
+        finally:
+            conn.close()
+
+    def _relative(self, file_path):
+        return relpath(abspath(file_path), self.directory).replace(sep, '/')
+
+    def _absolute(self, rel_path):
+        return join(self.directory, *rel_path.split('/'))
+
+    def __len__(self):
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def add_record(self, file_path, meas_dict):
+        """
+        Adds or updates the catalog entry of a result file.
+
+        Parameters
+        ----------
+        file_path : str
+            Path of the result file, must be below the catalog directory.
+        meas_dict : dict
+            The measurement record saved in the file. Its values are not accessed.
+        """
+        mtime, size = _file_signature(file_path)
+        row = _record_row(self._relative(file_path), mtime, size, meas_dict)
+        with self._connection() as conn:
+            self._insert_records(conn, [row])
+
+    def remove(self, file_path):
+        """ Removes the catalog entry of a result file. """
+        with self._connection() as conn:
+            conn.execute('DELETE FROM records WHERE file_path = ?', (self._relative(file_path),))
+            conn.execute('DELETE FROM other_files WHERE file_path = ?', (self._relative(file_path),))
+
+    @staticmethod
+    def _insert_records(conn, rows):
+        conn.executemany('INSERT OR REPLACE INTO records ({:s}) VALUES ({:s})'.format(
+            ', '.join(_RECORD_COLUMNS), ', '.join('?' * len(_RECORD_COLUMNS))), rows)
+        conn.executemany('DELETE FROM other_files WHERE file_path = ?', [(row[0],) for row in rows])
+
+    def rescan(self, progress_callback=None):
+        """
+        Brings the catalog up to date with the result files in the directory. Only new files and files whose
+        modification time or size changed are read, entries of deleted files are removed.
+
+        Parameters
+        ----------
+        progress_callback : callable, optional
+            Called as progress_callback(n_done, n_total) while reading the changed files.
+
+        Returns
+        -------
+        tuple
+            (number of added or updated files, number of removed files)
+        """
+        with self._connection() as conn:
+            known = {r[0]: (r[1], r[2]) for r in conn.execute('SELECT file_path, mtime, size FROM records')}
+            known.update({r[0]: (r[1], r[2]) for r in conn.execute('SELECT file_path, mtime, size FROM other_files')})
+
+        present = set()
+        changed = {}  # absolute path -> (relative path, mtime, size)
+        for dir_path, dir_names, file_names in walk(self.directory):
+            # hidden directories, e.g. the content store, do not contain result files
+            dir_names[:] = [d for d in dir_names if not d.startswith('.')]
+            for file_name in file_names:
+                # unfinished journals (.json.part) are not indexed
+                if file_name.startswith('.') or not file_name.endswith(RESULT_FILE_EXTENSIONS):
+                    continue
+                file_path = join(dir_path, file_name)
+                try:
+                    mtime, size = _file_signature(file_path)
+                except OSError:
+                    continue  # deleted in the meantime
+                rel_path = self._relative(file_path)
+                present.add(rel_path)
+                if known.get(rel_path) != (mtime, size):
+                    changed[file_path] = (rel_path, mtime, size)
+        removed = [rel_path for rel_path in known if rel_path not in present]
+
+        records, errors = BulkImporter(list(changed)).run(progress_callback=progress_callback)
+
+        record_rows = []
+        other_rows = []
+        for meas_dict, file_path in records:
+            rel_path, mtime, size = changed[file_path]
+            if is_measurement_record(meas_dict):
+                try:
+                    if migrate_annotations(meas_dict, file_path):
+                        # the new sidecar changes the signature of the file
+                        mtime, size = _file_signature(file_path)
+                except OSError as exc:
+                    self.logger.warning('Could not move annotations of %s to a sidecar: %s', file_path, repr(exc))
+                record_rows.append(_record_row(rel_path, mtime, size, meas_dict))
+            else:
+                other_rows.append((rel_path, mtime, size))
+        for file_path, error in errors:
+            # e.g. a JSON file which is not a measurement record, it is read again only when it changes
+            self.logger.debug('Result catalog: cannot read %s: %s', file_path, error)
+            other_rows.append(changed[file_path])
+
+        with self._connection() as conn:
+            conn.executemany('DELETE FROM records WHERE file_path = ?', [(p,) for p in removed])
+            conn.executemany('DELETE FROM other_files WHERE file_path = ?', [(p,) for p in removed])
+            conn.executemany('DELETE FROM records WHERE file_path = ?', [(row[0],) for row in other_rows])
+            conn.executemany('INSERT OR REPLACE INTO other_files (file_path, mtime, size) VALUES (?, ?, ?)',
+                             other_rows)
+            self._insert_records(conn, record_rows)
+
+        self.logger.info('Rescanned result catalog of %s: %d files added or updated, %d removed.',
+                         self.directory, len(record_rows), len(removed))
+        return len(record_rows), len(removed)
+
+    @staticmethod
+    def _where_clause(chip_name=None, device_id=None, device_type=None, measurement_name=None, since=None,
+                      until=None, finished=None, with_error=None, flag=None, comment=None):
+        conditions = []
+        params = []
+        for column, value in (('chip_name', chip_name), ('device_id', device_id), ('device_type', device_type),
+                              ('measurement_name', measurement_name)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                conditions.append('{:s} IN ({:s})'.format(column, ', '.join('?' * len(value))))
+                params.extend(value)
+            else:
+                conditions.append('{:s} = ?'.format(column))
+                params.append(value)
+        if since is not None:
+            conditions.append('timestamp_start >= ?')
+            params.append(iso_timestamp(since))
+        if until is not None:
+            until = iso_timestamp(until)
+            if len(until) == len('2022-06-01'):
+                until += 'T23:59:59.999999'  # include the whole day
+            conditions.append('timestamp_start <= ?')
+            params.append(until)
+        if finished is not None:
+            conditions.append('finished = ?')
+            params.append(int(bool(finished)))
+        if with_error is not None:
+            conditions.append('error IS NOT NULL' if with_error else 'error IS NULL')
+        if flag is not None:
+            conditions.append('user_flags LIKE ?')
+            params.append('%' + json.dumps(flag) + '%')
+        if comment is not None:
+            conditions.append('user_comment LIKE ?')
+            params.append('%' + comment + '%')
+        return (' WHERE ' + ' AND '.join(conditions)) if conditions else '', params
+
+    def query(self, limit=None, **criteria):
+        """
+        Returns the catalog entries matching all given criteria, ordered by start timestamp.
+
+        Parameters
+        ----------
+        limit : int, optional
+            Maximum number of entries returned.
+        chip_name, device_id, device_type, measurement_name : optional
+            Exact value, or a list of allowed values.
+        since, until : str, optional
+            Inclusive range of the start timestamp, in LabExT or ISO format. Also a date alone (2022-06-01) works.
+        finished : bool, optional
+            Whether the measurement was finished.
+        with_error : bool, optional
+            Whether the measurement raised an error.
+        flag : str, optional
+            A user flag the record must have.
+        comment : str, optional
+            Text the user comment must contain.
+
+        Returns
+        -------
+        list of dict
+            The entries, with the keys of the catalog columns. The file path is absolute, settings and user flags are
+            decoded.
+        """
+        where, params = self._where_clause(**criteria)
+        sql = 'SELECT {:s} FROM records{:s} ORDER BY timestamp_start, file_path'.format(
+            ', '.join(_RECORD_COLUMNS), where)
+        if limit is not None:
+            sql += ' LIMIT {:d}'.format(int(limit))
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        entries = []
+        for row in rows:
+            entry = dict(zip(_RECORD_COLUMNS, row))
+            entry['file_path'] = self._absolute(entry['file_path'])
+            entry['finished'] = bool(entry['finished'])
+            entry['settings'] = json.loads(entry['settings']) if entry['settings'] else {}
+            entry['user_flags'] = json.loads(entry['user_flags']) if entry['user_flags'] else []
+            entries.append(entry)
+        return entries
+
+    def file_paths(self, **criteria):
+        """ Returns the absolute paths of all result files matching the criteria, see query(). """
+        where, params = self._where_clause(**criteria)
+        with self._connection() as conn:
+            rows = conn.execute('SELECT file_path FROM records{:s} ORDER BY timestamp_start, file_path'.format(where),
+                                params).fetchall()
+        return [self._absolute(r[0]) for r in rows]
+
+    def count(self, **criteria):
+        """ Returns the number of records matching the criteria, see query(). """
+        where, params = self._where_clause(**criteria)
+        with self._connection() as conn:
+            return conn.execute('SELECT COUNT(*) FROM records' + where, params).fetchone()[0]
+
+    def distinct(self, column):
+        """ Returns the sorted distinct values of a column, e.g. all chip names or measurement names. """
+        if column not in _RECORD_COLUMNS:
+            raise ValueError("Unknown catalog column {:s}.".format(str(column)))
+        with self._connection() as conn:
+            rows = conn.execute('SELECT DISTINCT {:s} FROM records WHERE {:s} IS NOT NULL ORDER BY {:s}'.format(
+                column, column, column)).fetchall()
+        return [r[0] for r in rows]
@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import re
+from functools import partial
+from collections import OrderedDict
+from collections.abc import Mapping
+from os import stat
+from os.path import basename, splitext
+from threading import Lock
+
+import h5py
+import numpy as np
+
+from LabExT.Experiments.Annotations import merge_annotations
+from LabExT.Experiments.AutosaveDict import JournaledAutosaveDict, load_autosave_file
+from LabExT.Experiments.Compression import COMPRESSION_EXTENSIONS, GZIP, available_codecs, codec_of_path, \
+    compression_level as codec_compression_level, open_text
+from LabExT.Experiments.ContentStore import deduplicated_record, resolve_references
+from LabExT.Utils import NumpyJSONEncoder
+
+# GUI names of the supported result file formats and their file extensions, compressed JSON only for the available
+# compression codecs
+RESULT_FILE_FORMATS = OrderedDict([
+    ('JSON (.json)', '.json'),
+    ('HDF5 (.h5)', '.h5'),
+])
+for _codec in available_codecs():
+    RESULT_FILE_FORMATS['JSON {:s} (.json{:s})'.format(_codec, COMPRESSION_EXTENSIONS[_codec])] = \
+        '.json' + COMPRESSION_EXTENSIONS[_codec]
+
+# extensions of all result files LabExT can write, also compressed ones whose codec is not installed here
+RESULT_FILE_EXTENSIONS = ('.json', '.h5') + tuple('.json' + ext for ext in COMPRESSION_EXTENSIONS.values())
+
+HDF5_SIGNATURE = b'\x89HDF\r\n\x1a\n'
+HDF5_FORMAT_VERSION = 1
+
+# upper limit of the memory used by the values of lazily loaded records, see ValuesCache
+DEFAULT_RESIDENT_VALUES_BYTES = 256 * 1024 ** 2
+
+# next token which changes the nesting depth of a JSON document, strings are matched as a whole to skip brackets in
+# them. Everything else (numbers, commas) is consumed by the leading character class, which is much faster than
+# letting the regex engine search for the alternation.
+_JSON_STRING_OR_BRACKET = re.compile(r'[^"\[\]{}]*("[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}])')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _record_content(meas_dict, with_values=True):
+    """ Returns the measurement record without the keys added by LabExT on load, optionally without values. """
+    content = OrderedDict((k, v) for k, v in meas_dict.items()
+                          if not k.endswith('_known') and (with_values or k != 'values'))
+    if isinstance(content.get('values'), LazyValues):
+        # load them before the writer truncates the file they are read from
+        content['values'] = OrderedDict(content['values'].items())
+    return content
+
+
+def write_json_record(meas_dict, file_path, compression=None, compression_level=None):
+    """
+    Writes a measurement record as indented JSON document, optionally compressed.
+
+    Parameters
+    ----------
+    meas_dict : dict
+        The measurement record.
+    file_path : str
+        The file path to write to.
+    compression : str, optional
+        Codec to compress the document with, see LabExT.Experiments.Compression.
+    compression_level : int, optional
+        Compression level, defaults to the codec's default level.
+    """
+    content = _record_content(meas_dict)
+    with open_text(file_path, 'w', codec=compression, level=compression_level) as f:
+        json.dump(content, f, indent=4, cls=NumpyJSONEncoder)
+
+
+def write_hdf5_record(meas_dict, file_path, compression_level=4):
+    """
+    Writes a measurement record to a HDF5 file.
+
+    The meta-data (everything except 'values') is stored as JSON string in the dataset 'labext_metadata'. Every entry
+    of 'values' is stored as chunked and compressed dataset in the group 'values', the original key is kept in the
+    dataset attribute 'labext_key'. Values which are not numeric are stored as JSON string.
+
+    Parameters
+    ----------
+    meas_dict : dict
+        The measurement record.
+    file_path : str
+        The file path to write to.
+    compression_level : int
+        gzip compression level of the values datasets, between 0 and 9.
+    """
+    content = _record_content(meas_dict)
+    with h5py.File(file_path, 'w') as h5f:
+        h5f.attrs['labext_format_version'] = HDF5_FORMAT_VERSION
+        h5f.create_dataset('labext_metadata', data=json.dumps(_record_content(content, with_values=False),
+                                                                 cls=NumpyJSONEncoder))
+
+        values_grp = h5f.create_group('values')
+        for idx, (key, vals) in enumerate(content['values'].items()):
+            # dataset names must not contain slashes, the original key is kept as attribute
+            ds_name = '{:d}_{:s}'.format(idx, str(key).replace('/', '_'))
+            arr = np.asarray(vals)
+            if arr.dtype.kind in 'biufc' and arr.size > 0:
+                ds = values_grp.create_dataset(ds_name,
+                                               data=arr,
+                                               chunks=True,
+                                               compression='gzip',
+                                               compression_opts=compression_level,
+                                               shuffle=True)
+            elif arr.dtype.kind in 'biufc':
+                ds = values_grp.create_dataset(ds_name, data=arr)
+            else:
+                ds = values_grp.create_dataset(ds_name, data=json.dumps(vals, cls=NumpyJSONEncoder))
+                ds.attrs['labext_encoding'] = 'json'
+            ds.attrs['labext_key'] = str(key)
+            ds.attrs['labext_index'] = idx
+
+
+def read_hdf5_record(file_path):
+    """
+    Reads a measurement record written by write_hdf5_record.
+
+    Parameters
+    ----------
+    file_path : str
+        The file path to read from.
+
+    Returns
+    -------
+    OrderedDict
+        The measurement record.
+    """
+    with h5py.File(file_path, 'r') as h5f:
+        meas_dict = json.loads(h5f['labext_metadata'][()], object_pairs_hook=OrderedDict)
+        meas_dict['values'] = _read_hdf5_values(h5f)
+
+    return meas_dict
+
+
+def _hdf5_values_datasets(h5f):
+    """ Returns the datasets of the values group in the order of the original values dictionary. """
+    return sorted(h5f['values'].values(), key=lambda d: d.attrs['labext_index'])
+
+
+def _read_hdf5_values(h5f):
+    values = OrderedDict()
+    for ds in _hdf5_values_datasets(h5f):
+        if ds.attrs.get('labext_encoding') == 'json':
+            values[ds.attrs['labext_key']] = json.loads(ds[()])
+        else:
+            values[ds.attrs['labext_key']] = ds[()]
+    return values
+
+
+def is_hdf5_file(file_path):
+    """ Returns True if the file at file_path starts with the HDF5 signature. """
+    with open(file_path, 'rb') as f:
+        return f.read(len(HDF5_SIGNATURE)) == HDF5_SIGNATURE
+
+
+def result_file_stem(file_path):
+    """
+    Returns the file name without directory and result file extension, e.g. 'meas' for '/data/meas.json.gz'. The
+    '.part' ending of unfinished journals is removed as well.
+    """
+    name = basename(file_path)
+    if name.endswith('.part'):
+        name = name[:-len('.part')]
+    for ext in sorted(RESULT_FILE_EXTENSIONS, key=len, reverse=True):
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return splitext(name)[0]
+
+
+def _write_deduplicated(writer, content_store, meas_dict, file_path):
+    writer(deduplicated_record(meas_dict, content_store), file_path)
+
+
+def result_file_writer(file_path, compression_level=None, content_store=None):
+    """
+    Returns the function writer(meas_dict, file_path) which writes result files in the format given by the extension
+    of file_path. Defaults to JSON. JSON files with the extension of a compression codec (e.g. .json.gz) are
+    compressed.
+
+    Parameters
+    ----------
+    file_path : str
+        The path of the result file.
+    compression_level : int, optional
+        Compression level of compressed JSON and the HDF5 datasets, defaults to the codec's default level.
+    content_store : ContentStore, optional
+        If given, the sub-documents repeated in all records of a run (software, chip, instruments...) are saved once
+        in this store and only referenced by the result file. The store must be in the directory of the result file or
+        one of its parents, so readers find it.
+    """
+    if file_path.endswith('.h5'):
+        if compression_level:
+            # HDF5 datasets are gzip compressed
+            writer = partial(write_hdf5_record, compression_level=codec_compression_level(GZIP, compression_level))
+        else:
+            writer = write_hdf5_record
+    elif codec_of_path(file_path) is not None:
+        writer = partial(write_json_record, compression=codec_of_path(file_path), compression_level=compression_level)
+    else:
+        writer = write_json_record
+    if content_store is not None:
+        return partial(_write_deduplicated, writer, content_store)
+    return writer
+
+
+def values_as_arrays(values):
+    """
+    Converts all numeric vectors in a values dictionary to NumPy arrays in place. Vectors which are not numeric
+    (e.g. strings or nested lists of different lengths) are left as they are.
+
+    Parameters
+    ----------
+    values : dict
+        The 'values' dictionary of a measurement record.
+    """
+    for key, vals in values.items():
+        if isinstance(vals, np.ndarray) or not isinstance(vals, list):
+            continue
+        try:
+            arr = np.asarray(vals)
+        except ValueError:
+            continue
+        if arr.dtype.kind in 'iuf':
+            values[key] = arr
+
+
+def load_result_file(file_path):
+    """
+    Loads a measurement record from any result file LabExT writes. The format is detected from the file content.
+    References to the content store are resolved and the user annotations of the annotations sidecar are merged into
+    the record.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a JSON, HDF5 or unfinished journal (.json.part) result file.
+
+    Returns
+    -------
+    OrderedDict
+        The measurement record, numeric vectors in 'values' are NumPy arrays.
+    """
+    if is_hdf5_file(file_path):
+        meas_dict = read_hdf5_record(file_path)
+    else:
+        meas_dict = load_autosave_file(file_path)
+    if isinstance(meas_dict.get('values'), dict):
+        values_as_arrays(meas_dict['values'])
+    return merge_annotations(resolve_references(meas_dict, file_path), file_path)
+
+
+def _skip_json_object(text, start):
+    """
+    Finds the end of the JSON object starting at text[start] without decoding it. Returns the index after the closing
+    brace and the list of the object's keys.
+    """
+    depth = 0
+    keys = []
+    for match in _JSON_STRING_OR_BRACKET.finditer(text, start):
+        token = match.group(1)
+        if token[0] == '"':
+            # a string on the first level is a key if it is followed by a colon
+            if depth == 1:
+                colon_idx = _JSON_WHITESPACE.match(text, match.end()).end()
+                if text[colon_idx:colon_idx + 1] == ':':
+                    keys.append(json.loads(token))
+        elif token in '[{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return match.end(), keys
+    raise ValueError("Unterminated JSON object at index {:d}.".format(start))
+
+
+def _scan_json_record(text):
+    """
+    Decodes a measurement record JSON document except for its 'values' object, which is only skipped over.
+
+    Returns
+    -------
+    tuple
+        (record, keys of values, (start, end) index of the values object in text). The record contains None as
+        placeholder for the values. If the record has no values object, the keys and the span are None.
+    """
+    decoder = json.JSONDecoder(object_pairs_hook=OrderedDict)
+    skip_ws = _JSON_WHITESPACE.match
+
+    record = OrderedDict()
+    values_keys = values_span = None
+
+    idx = skip_ws(text, 0).end()
+    if text[idx:idx + 1] != '{':
+        raise ValueError("Result file does not contain a JSON object.")
+    idx = skip_ws(text, idx + 1).end()
+    if text[idx:idx + 1] == '}':
+        return record, values_keys, values_span
+
+    while True:
+        key, idx = decoder.raw_decode(text, idx)
+        idx = skip_ws(text, idx).end()
+        if not isinstance(key, str) or text[idx:idx + 1] != ':':
+            raise ValueError("Invalid JSON object key at index {:d}.".format(idx))
+        idx = skip_ws(text, idx + 1).end()
+
+        if key == 'values' and text[idx:idx + 1] == '{':
+            end_idx, values_keys = _skip_json_object(text, idx)
+            values_span = (idx, end_idx)
+            record[key] = None
+            idx = end_idx
+        else:
+            record[key], idx = decoder.raw_decode(text, idx)
+
+        idx = skip_ws(text, idx).end()
+        delimiter = text[idx:idx + 1]
+        idx = skip_ws(text, idx + 1).end()
+        if delimiter == '}':
+            return record, values_keys, values_span
+        if delimiter != ',':
+            raise ValueError("Expected ',' or '}' at index {:d}.".format(idx))
+
+
+def _is_journal(text):
+    first_line = text.split('\n', 1)[0]
+    try:
+        return json.loads(first_line) == JournaledAutosaveDict.journal_header
+    except json.JSONDecodeError:
+        return False
+
+
+def _values_nbytes(values):
+    """ Estimates the memory used by the vectors of a values dictionary. """
+    n_bytes = 0
+    for vals in values.values():
+        if isinstance(vals, np.ndarray):
+            n_bytes += vals.nbytes
+        elif isinstance(vals, (list, tuple)):
+            n_bytes += 8 * len(vals)
+    return n_bytes
+
+
+class ValuesCache:
+    """
+    Least recently used cache of the values which LazyValues hold in memory.
+
+    If the resident values use more than max_bytes, the values of the least recently used records are unloaded. Their
+    LazyValues load them again from disk on the next access. The most recently used values are always kept, even if
+    they alone exceed the limit.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_RESIDENT_VALUES_BYTES):
+        self.max_bytes = max_bytes
+        self.resident_bytes = 0
+        self._resident = OrderedDict()  # id(LazyValues) -> (LazyValues, size in bytes)
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._resident)
+
+    def touch(self, lazy_values, n_bytes=None):
+        """
+        Marks the values as most recently used. If n_bytes is given, the values were just loaded and use n_bytes.
+        """
+        evicted = []
+        with self._lock:
+            key = id(lazy_values)
+            if key in self._resident:
+                self._resident.move_to_end(key)
+            if n_bytes is not None:
+                _, old_bytes = self._resident.pop(key, (None, 0))
+                self._resident[key] = (lazy_values, n_bytes)
+                self.resident_bytes += n_bytes - old_bytes
+            while self.resident_bytes > self.max_bytes and len(self._resident) > 1:
+                _, (oldest, oldest_bytes) = self._resident.popitem(last=False)
+                self.resident_bytes -= oldest_bytes
+                evicted.append(oldest)
+        for lv in evicted:
+            lv.unload()
+
+    def discard(self, lazy_values):
+        """ Forgets values which were unloaded by their owner. """
+        with self._lock:
+            _, n_bytes = self._resident.pop(id(lazy_values), (None, 0))
+            self.resident_bytes -= n_bytes
+
+    def clear(self):
+        with self._lock:
+            resident = [lv for lv, _ in self._resident.values()]
+            self._resident.clear()
+            self.resident_bytes = 0
+        for lv in resident:
+            lv.unload()
+
+
+# cache shared by all lazily loaded records
+VALUES_CACHE = ValuesCache()
+
+
+class LazyValues(Mapping):
+    """
+    Read-only stand-in for the 'values' dictionary of a measurement record, which loads the vectors from the result
+    file on first access.
+
+    Only the keys are kept in memory permanently, so listing the available axes does not touch the disk. The loaded
+    vectors are accounted in a ValuesCache and unloaded again if too many records are resident.
+    """
+
+    def __init__(self, file_path, keys, values=None, cache=None, json_span=None):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        file_path : str
+            The result file holding the values.
+        keys : iterable of str
+            The keys of the values dictionary, in order.
+        values : dict, optional
+            Values which are already in memory, e.g. of a record which was just written.
+        cache : ValuesCache, optional
+            The cache to account the resident values in, defaults to the cache shared by all records.
+        json_span : tuple, optional
+            (file size, mtime, start, end) of the values object in a JSON file, as returned by read_result_metadata.
+            Saves scanning the file again on first access.
+        """
+        self.file_path = file_path
+        self._keys = list(keys)
+        self._cache = cache if cache is not None else VALUES_CACHE
+        self._values = None
+        self._json_span = json_span
+        self._load_lock = Lock()
+        if values is not None:
+            self._values = values
+            self._cache.touch(self, _values_nbytes(values))
+
+    @property
+    def is_loaded(self):
+        return self._values is not None
+
+    def _get_values(self):
+        values = self._values
+        if values is not None:
+            self._cache.touch(self)
+            return values
+        with self._load_lock:
+            if self._values is None:
+                values = self._read_values()
+                self._values = values
+                self._cache.touch(self, _values_nbytes(values))
+            return self._values
+
+    def _read_values(self):
+        if is_hdf5_file(self.file_path):
+            with h5py.File(self.file_path, 'r') as h5f:
+                values = _read_hdf5_values(h5f)
+        else:
+            with open_text(self.file_path) as f:
+                text = f.read()
+            st = stat(self.file_path)
+            if self._json_span is not None and self._json_span[:2] == (st.st_size, st.st_mtime):
+                start, end = self._json_span[2:]
+            else:
+                # first load, or the file was re-written in the meantime
+                _, _, (start, end) = _scan_json_record(text)
+                self._json_span = (st.st_size, st.st_mtime, start, end)
+            values = json.loads(text[start:end], object_pairs_hook=OrderedDict)
+        values_as_arrays(values)
+        return values
+
+    def unload(self):
+        """ Frees the loaded values, they are loaded again on the next access. """
+        self._values = None
+        self._cache.discard(self)
+
+    def __getitem__(self, key):
+        return self._get_values()[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def keys(self):
+        return list(self._keys)
+
+    def __repr__(self):
+        return "LazyValues({!r}, keys={!r}, loaded={!r})".format(self.file_path, self._keys, self.is_loaded)
+
+
+def read_result_metadata(file_path, resolve=True):
+    """
+    Reads the meta-data of a measurement record and the keys of its values, but not the values themselves.
+
+    The return value only consists of builtin types, so it can be passed between processes. Use
+    load_lazy_result_file to get a record with values which are loaded on demand.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a JSON, HDF5 or unfinished journal (.json.part) result file.
+    resolve : bool
+        If False, references to the content store are kept in the record, they are resolved by lazy_record. Resolving
+        them in the receiving process lets all records share one copy of the referenced documents.
+
+    Returns
+    -------
+    tuple
+        (record, keys of values, json span). The values of the record are None, the json span is the position of the
+        values in a JSON file as expected by LazyValues. Records which cannot be read lazily (unfinished journals,
+        JSON documents without values object) are returned completely, with keys and json span None.
+    """
+    if is_hdf5_file(file_path):
+        with h5py.File(file_path, 'r') as h5f:
+            meas_dict = json.loads(h5f['labext_metadata'][()], object_pairs_hook=OrderedDict)
+            keys = [ds.attrs['labext_key'] for ds in _hdf5_values_datasets(h5f)]
+        meas_dict['values'] = None
+        return _metadata_record(meas_dict, file_path, resolve), keys, None
+
+    with open_text(file_path) as f:
+        text = f.read()
+    if _is_journal(text):
+        return load_result_file(file_path), None, None
+
+    st = stat(file_path)
+    meas_dict, keys, span = _scan_json_record(text)
+    if span is None:
+        return load_result_file(file_path), None, None
+    return _metadata_record(meas_dict, file_path, resolve), keys, (st.st_size, st.st_mtime) + span
+
+
+def _metadata_record(meas_dict, file_path, resolve):
+    if resolve:
+        resolve_references(meas_dict, file_path)
+    return merge_annotations(meas_dict, file_path)
+
+
+def lazy_record(file_path, metadata, cache=None):
+    """
+    Returns the record of the result of read_result_metadata, with a LazyValues object as values. References to the
+    content store are resolved.
+
+    Parameters
+    ----------
+    file_path : str
+        The file path given to read_result_metadata.
+    metadata : tuple
+        The return value of read_result_metadata.
+    cache : ValuesCache, optional
+        The cache to account the resident values in, defaults to the cache shared by all records.
+    """
+    meas_dict, keys, json_span = metadata
+    resolve_references(meas_dict, file_path)
+    if keys is not None:
+        meas_dict['values'] = LazyValues(file_path, keys, cache=cache, json_span=json_span)
+    return meas_dict
+
+
+def load_lazy_result_file(file_path, cache=None):
+    """
+    Loads a measurement record like load_result_file, but only its meta-data. The 'values' are a LazyValues object
+    which reads the vectors from the file on first access.
+
+    Records which cannot be loaded lazily (unfinished journals, JSON documents which do not contain a values object)
+    are loaded completely.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to a JSON, HDF5 or unfinished journal (.json.part) result file.
+    cache : ValuesCache, optional
+        The cache to account the resident values in, defaults to the cache shared by all records.
+
+    Returns
+    -------
+    OrderedDict
+        The measurement record.
+    """
+    return lazy_record(file_path, read_result_metadata(file_path), cache=cache)
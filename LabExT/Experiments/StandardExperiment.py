@@ -12,34 +12,34 @@ import sys
 import time
 import traceback
 from collections import OrderedDict
-from glob import glob
-from os import rename, makedirs
-from os.path import dirname, join
+from os import makedirs
+from os.path import dirname, join, normpath
 from pathlib import Path
-from tkinter import Tk, messagebox
 
-from LabExT.Experiments.AutosaveDict import AutosaveDict
+from LabExT.Experiments.AutosaveDict import JournaledAutosaveDict
+from LabExT.Experiments.ErrorPolicy import ErrorPolicies, FailureSummary, PAUSED, RETRIED, REQUEUED, SKIPPED
+from LabExT.Experiments.FilenameAllocator import FilenameAllocator
+from LabExT.Experiments.FinalizationPipeline import FinalizationPipeline
+from LabExT.Experiments.MeasurementStore import MeasurementStore, calc_measurement_key, calc_device_key
+from LabExT.Experiments.PersistenceService import PersistenceService
+from LabExT.Experiments.PhaseTimer import PhaseTimer, RunTimingSummary
+from LabExT.Experiments.QueueCheckpoint import QueueCheckpoint
+from LabExT.Experiments.ResultCatalog import ResultCatalog
+from LabExT.Experiments.ContentStore import CAS_DIRECTORY_NAME, ContentStore
+from LabExT.Experiments.ResultFile import RESULT_FILE_FORMATS, LazyValues, result_file_writer
+from LabExT.Experiments.ToDo import ToDo
 from LabExT.Measurements.MeasAPI.Measurement import Measurement
 from LabExT.PluginLoader import PluginLoader
+from LabExT.Wafer.Device import Device
 from LabExT.Utils import make_filename_compliant, get_labext_version
-from LabExT.View.Controls.ParameterTable import ConfigParameter
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
 
 
-def calc_measurement_key(measurement):
-    """calculate the unique but hardly one-way functional 'hash' of a measurement"""
-    hash_str = str(measurement["timestamp_iso_known"])
-    hash_str += str(measurement["device"]["id"])
-    hash_str += str(measurement["device"]["type"])
-    hash_str += str(measurement["name_known"])
-    return hash_str
-
-
 class StandardExperiment:
     """ StandardExperiment implements the routine of performing single or multiple measurements and gathers their
     output data dictionary. """
 
-    def __init__(self, experiment_manager, parent: Tk, chip, mover=None):
+    def __init__(self, experiment_manager, parent, chip, mover=None):
 
         self.logger = logging.getLogger()
 
@@ -63,6 +63,9 @@ class StandardExperiment:
         self.param_output_path = ""
         self.param_chip_file_path = ""
         self.param_chip_name = ""
+        self.param_result_file_ext = ".json"
+        self.param_compression_level = 0
+        self.param_deduplicate_metadata = False
 
         # plot collections, main window plot observe these lists
         self.live_plot_collection = ObservableList()  # right plot, measurements can plot during run
@@ -83,10 +86,27 @@ class StandardExperiment:
         self.exctrl_auto_move_stages = False
         self.exctrl_enable_sfp = False
         self.exctrl_inter_measurement_wait_time = 0.0
+        self.exctrl_pipelined_execution = False
+        self.exctrl_fast_metadata = False  # take unchanged instrument settings from the drivers' metadata cache
+
+        # allocates unique save file names in the output path, re-created at every run start
+        self._filename_allocator = None
+        self.last_run_saved_time_s = 0.0  # wall-clock time saved by pipelined execution during the last run
+        self.last_run_timing = None  # RunTimingSummary of the last run, aggregates the phase timings of all records
+
+        # writes measurement records on a background thread, see stats() for queue depth and write latencies
+        self.persistence = PersistenceService()
 
-        # data structures for FINISHED measurements
-        self.measurements = ObservableList()
-        self.measurements_hashes = []
+        # persists the pending ToDos during a run, such that a crashed run can be resumed on next start
+        self.queue_checkpoint = QueueCheckpoint()
+
+        # decides per measurement class what happens on measurement errors, failures are collected per run
+        self.error_policies = ErrorPolicies.load()
+        self.last_run_failures = FailureSummary()
+        self._sfp_before_retry = False  # set by the error policy, search for peak before re-executing a ToDo
+
+        # data structure for FINISHED measurements
+        self.measurements = MeasurementStore()
 
         self.__setup__()
 
@@ -98,6 +118,9 @@ class StandardExperiment:
     def __setup__(self):
         """Initialise all experiment specific parameters.
         """
+        # imported here such that the experiment module can be used without Tk, see HeadlessExperiment
+        from LabExT.View.Controls.ParameterTable import ConfigParameter
+
         self.chip_parameters['Chip name'] = ConfigParameter(
             self._parent,
             value=self._chip._name if self._chip else 'UnknownChip',
@@ -111,28 +134,125 @@ class StandardExperiment:
             self._parent,
             value=self._default_save_path,
             parameter_type='folder')
+        self.save_parameters['Result file format'] = ConfigParameter(
+            self._parent,
+            value=list(RESULT_FILE_FORMATS.keys()),
+            parameter_type='dropdown')
+        self.save_parameters['Compression level (0: default)'] = ConfigParameter(
+            self._parent,
+            value=0,
+            parameter_type='number_int')
+        self.save_parameters['Store repeated metadata once'] = ConfigParameter(
+            self._parent,
+            value=False,
+            parameter_type='bool')
 
     def read_parameters_to_variables(self):
         # update local parameters
         self.param_chip_name = str(self.chip_parameters['Chip name'].value)
         self.param_chip_file_path = str(self.chip_parameters['Chip path'].value)
         self.param_output_path = str(self.save_parameters['Raw output path'].value)
+        self.param_result_file_ext = RESULT_FILE_FORMATS.get(self.save_parameters['Result file format'].value, ".json")
+        self.param_compression_level = int(self.save_parameters['Compression level (0: default)'].value)
+        self.param_deduplicate_metadata = bool(self.save_parameters['Store repeated metadata once'].value)
         makedirs(self.param_output_path, exist_ok=True)
+        self._filename_allocator = FilenameAllocator(self.param_output_path)
 
     def show_meas_finished_infobox(self):
-        messagebox.showinfo("Measurements finished!", "Measurements finished!")
+        from tkinter import messagebox
+        if self.last_run_failures:
+            messagebox.showwarning("Measurements finished!",
+                                   "Measurements finished!\n\n" + self.last_run_failures.text())
+        else:
+            messagebox.showinfo("Measurements finished!", "Measurements finished!")
+
+    def sync_execution_control(self):
+        """Updates the exctrl_* variables from the execution control settings in the GUI."""
+        self._experiment_manager.main_window.model.exctrl_vars_changed()
+
+    def handle_measurement_error(self, todo, exc):
+        """Called when the measurement of a ToDo raised an exception. Applies the error policy of the measurement.
+
+        Parameters
+        ----------
+        todo : ToDo
+            The ToDo whose measurement failed, still the first element of the to_do_list.
+        exc : Exception
+            The exception raised by the measurement.
+
+        Returns
+        -------
+        str
+            The outcome, i.e. what to do with the failed ToDo: PAUSED, RETRIED, REQUEUED or SKIPPED.
+        """
+        policy = self.error_policies.policy_for(todo.measurement)
+        todo.failed_attempts += 1
+        outcome = policy.decide(todo)
+        self.last_run_failures.add(todo, exc, outcome)
+        self.logger.error('Error occurred during measurement %s: %s. Error policy "%s": ToDo %s.',
+                          todo, repr(exc), policy, outcome, exc_info=exc)
+
+        if outcome == PAUSED:
+            self.pause_on_error(todo, exc)
+        elif outcome == RETRIED:
+            self._sfp_before_retry = policy.search_for_peak
+        return outcome
+
+    def pause_on_error(self, todo, exc):
+        """Pauses the experiment after a failed measurement and informs the user."""
+        from tkinter import messagebox
+        # error during measurement, go into pause mode
+        self._experiment_manager.main_window.model.var_mm_pause.set(True)
+        messagebox.showinfo('Measurement Error', 'Error occurred during measurement: ' + repr(exc))
 
     def run(self):
         self.logger.info('Running experiment.')
 
         # update local exctrl variables from GUI, just for safety
-        self._experiment_manager.main_window.model.exctrl_vars_changed()
+        self.sync_execution_control()
 
         self.read_parameters_to_variables()
 
+        # in pipelined mode, the previous record is finalized on a worker while we continue with the next ToDo
+        pipeline = FinalizationPipeline() if self.exctrl_pipelined_execution else None
+        self.last_run_saved_time_s = 0.0
+        self.last_run_timing = RunTimingSummary()
+        self.last_run_failures = FailureSummary()
+        self._sfp_before_retry = False
+
+        self._save_queue_checkpoint()
+        try:
+            self._run_to_do_list(pipeline)
+        finally:
+            if pipeline is not None:
+                pipeline.shutdown()
+                self.last_run_saved_time_s = pipeline.saved_time_s
+                self.logger.info('Pipelined execution saved %.2fs of wall-clock time over %d measurements.',
+                                 pipeline.saved_time_s,
+                                 pipeline.n_jobs)
+            self.logger.info('Persistence statistics: %s', self.persistence.stats())
+            self._save_run_timing(self.last_run_timing)
+            if self.last_run_failures:
+                self.logger.warning(self.last_run_failures.text())
+            # all records are finalized now, the checkpoint only needs to hold the ToDos not yet executed
+            self._save_queue_checkpoint()
+
+    def _run_to_do_list(self, pipeline=None):
+        """
+        Executes the ToDos in the to_do_list until either the list is empty or a pause is requested.
+
+        Parameters
+        ----------
+        pipeline : FinalizationPipeline, optional
+            If given, the finalization of each measurement record is executed on this worker stage.
+        """
         # we iterate over every measurement of every device in the To Do Queue
         while 0 < len(self.to_do_list):
 
+            # times the phases of this ToDo, saved in the record and aggregated in the run's timing summary
+            timer = PhaseTimer()
+            t_metadata_start = time.monotonic()
+
             current_todo = self.to_do_list[0]
             device = current_todo.device
             measurement = current_todo.measurement
@@ -158,7 +278,9 @@ class StandardExperiment:
             save_file_ending = ".json.part"
 
             # create and populate output data save dictionary
-            data = AutosaveDict(freq=50, file_path=save_file_path + save_file_ending)
+            data = JournaledAutosaveDict(freq=50,
+                                         file_path=save_file_path + save_file_ending,
+                                         persistence=self.persistence)
 
             data['software'] = OrderedDict()
             data['software']['name'] = "LabExT"
@@ -170,6 +292,8 @@ class StandardExperiment:
             data['experiment settings']['pause after each device'] = self.exctrl_pause_after_device
             data['experiment settings']['auto move stages to device'] = self.exctrl_auto_move_stages
             data['experiment settings']['execute search for peak'] = self.exctrl_enable_sfp
+            data['experiment settings']['fast instrument metadata'] = self.exctrl_fast_metadata
+            data['experiment settings']['previous failed attempts'] = current_todo.failed_attempts
 
             data['chip'] = OrderedDict()
             data['chip']['name'] = self.param_chip_name
@@ -183,35 +307,58 @@ class StandardExperiment:
 
             data['measurement name'] = measurement.name
             data['measurement name and id'] = measurement.get_name_with_id()
-            data['instruments'] = measurement._get_data_from_all_instruments()
+            data['instruments'] = measurement._get_data_from_all_instruments(use_cache=self.exctrl_fast_metadata)
             data['measurement settings'] = {}
             data['values'] = OrderedDict()
             data['error'] = {}
 
             data['finished'] = False
 
+            # write the meta-data to the journal before anything can go wrong
+            data.save()
+            timer.add('metadata capture', time.monotonic() - t_metadata_start)
+
             # only move if automatic movement is enabled
             if self.exctrl_auto_move_stages:
-                self._mover.move_to_device(device)
+                self._mover.phase_timer = timer
+                try:
+                    with timer.phase('stage move'):
+                        self._mover.move_to_device(device)
+                finally:
+                    self._mover.phase_timer = None
                 self.logger.info('Automatically moved to device:' + str(device.short_str()))
 
-            # execute automatic search for peak
-            if self.exctrl_enable_sfp:
-                self._peak_searcher.update_params_from_savefile()
-                data['search for peak'] = self._peak_searcher.search_for_peak()
+            # execute automatic search for peak, also if the error policy asks for it before retrying a failed ToDo
+            sfp_for_retry = self._sfp_before_retry and self._peak_searcher is not None \
+                and self._peak_searcher.initialized
+            self._sfp_before_retry = False
+            if self.exctrl_enable_sfp or sfp_for_retry:
+                with timer.phase('search for peak'):
+                    self._peak_searcher.update_params_from_savefile()
+                    data['search for peak'] = self._peak_searcher.search_for_peak()
                 self.logger.info('Search for peak done.')
             else:
                 data['search for peak'] = None
                 self.logger.debug('Search for peak not enabled. Not executing automatic search for peak.')
 
+            # the previous record must be completely finalized before we start to measure again
+            if pipeline is not None:
+                pipeline.wait()
+
+            # all previous ToDos are finalized, checkpoint the queue including this ToDo and its save file path
+            self._save_queue_checkpoint(current_save_file_path=save_file_path)
+
             self.logger.info('Executing measurement %s on device %s.',
                              measurement.get_name_with_id(),
                              device.short_str())
 
             measurement_executed = False
+            error_outcome = None
+            measurement.phase_timer = timer
             try:
-                measurement.measure(device, data)
-                save_file_ending = ".json"
+                with timer.phase('algorithm'):
+                    measurement.measure(device, data)
+                save_file_ending = self.param_result_file_ext
                 measurement_executed = True
             except Exception as exc:
                 # log error to file
@@ -220,12 +367,8 @@ class StandardExperiment:
                 data['error']['type'] = str(etype)
                 data['error']['desc'] = repr(evalue)
                 data['error']['traceback'] = traceback.format_exc()
-                # error during measurement, go into pause mode
-                self._experiment_manager.main_window.model.var_mm_pause.set(True)
-                msg = 'Error occurred during measurement: ' + repr(exc)
-                messagebox.showinfo('Measurement Error', msg)
-                self.logger.exception(msg)
-                save_file_ending = "_error.json"
+                error_outcome = self.handle_measurement_error(current_todo, exc)
+                save_file_ending = "_error" + self.param_result_file_ext
             except SystemExit:
                 # log error to file
                 etype, evalue, _ = sys.exc_info()
@@ -233,43 +376,45 @@ class StandardExperiment:
                 data['error']['type'] = "Abort"
                 data['error']['desc'] = "Measurement aborted by user."
                 data['error']['traceback'] = traceback.format_exc()
-                save_file_ending = "_abort.json"
+                save_file_ending = "_abort" + self.param_result_file_ext
 
             finally:
+                measurement.phase_timer = None
 
                 # clear live plots after experiment finished
                 while len(self.live_plot_collection) > 0:
                     self.live_plot_collection.remove(self.live_plot_collection[0])
 
                 # save instrument parameters again
-                data['instruments'] = measurement._get_data_from_all_instruments()
+                with timer.phase('metadata capture'):
+                    data['instruments'] = measurement._get_data_from_all_instruments(
+                        use_cache=self.exctrl_fast_metadata)
 
                 # get measurement end timestamp
                 ts = str('{date:%Y-%m-%d_%H%M%S}'.format(date=datetime.datetime.now()))
                 data['timestamp end'] = ts
                 data['timestamp'] = ts
                 data['finished'] = True
-
-                # save current measurement's data on disk
-                data.save()
-                data.auto_save = False
-                final_path = save_file_path + save_file_ending
-                rename(data.file_path, final_path)
-
-                self.logger.info('Saved data of current measurement: %s to %s',
-                                 measurement.get_name_with_id(),
-                                 final_path)
+                data['timing'] = timer.as_dict()
 
                 # save to do reference in case user hits "Redo last measurement" button
                 self.last_executed_todo = (device, measurement)
 
-            # shift to do to executed measurements when successful
-            if measurement_executed:
-                self.load_measurement_dataset(data, final_path, force_gui_update=False)
-                self.to_do_list.pop(0)
-
-            # tell GUI to update
-            self.update(plot_new_meas=True)
+                # shift to do to executed measurements when successful, or apply the error policy's outcome
+                if measurement_executed or error_outcome in (SKIPPED, REQUEUED):
+                    self.to_do_list.pop(0)
+                if error_outcome == REQUEUED:
+                    current_todo.requeued = True
+                    current_todo.failed_attempts = 0
+                    self.to_do_list.append(current_todo)
+
+                # save to disk, register and plot the record, either right here or on the pipeline worker
+                if pipeline is None:
+                    self._finalize_measurement_record(data, measurement, save_file_path, save_file_ending,
+                                                      measurement_executed, timer)
+                else:
+                    pipeline.submit(self._finalize_measurement_record, data, measurement, save_file_path,
+                                    save_file_ending, measurement_executed, timer)
 
             # if manual mode activated, break here
             if self.exctrl_pause_after_device:
@@ -278,6 +423,8 @@ class StandardExperiment:
             # if we finished all the devices in the to_do_list
             # then we finished measuring everything
             if not self.to_do_list:
+                if pipeline is not None:
+                    pipeline.wait()
                 self.show_meas_finished_infobox()
                 self.logger.info("Experiment and hereby all measurements finished.")
                 return
@@ -286,11 +433,250 @@ class StandardExperiment:
                 self.logger.info(f"Waiting {self.exctrl_inter_measurement_wait_time:.0f}s before continuing...")
                 time.sleep(self.exctrl_inter_measurement_wait_time)
 
+    def _finalize_measurement_record(self, data, measurement, save_file_path, save_file_ending, measurement_executed,
+                                     timer=None):
+        """
+        Saves a finished measurement record to disk, adds it to the executed measurements and updates the GUI.
+
+        The time spent saving and updating the GUI is not part of the record's 'timing' entry, since the record is
+        already written. It is only aggregated in the run's timing summary.
+
+        Parameters
+        ----------
+        data : JournaledAutosaveDict
+            The measurement record, must not be modified by anybody else anymore.
+        measurement : Measurement
+            The measurement object which produced the record.
+        save_file_path : str
+            Path of the save file without file ending.
+        save_file_ending : str
+            File ending of the final save file, depends on the measurement's outcome.
+        measurement_executed : bool
+            True if the measurement finished without error.
+        timer : PhaseTimer, optional
+            The phase timer of the record, its durations are added to the timing summary of the current run.
+        """
+        timer = timer if timer is not None else PhaseTimer()
+
+        # save current measurement's data on disk
+        final_path = save_file_path + save_file_ending
+        with timer.phase('save'):
+            # with a persistence service, the writer (and thus the compression) runs on its writer thread
+            data.finalize(final_path, writer=result_file_writer(final_path, self.param_compression_level,
+                                                                content_store=self._content_store()))
+
+        self.logger.info('Saved data of current measurement: %s to %s',
+                         measurement.get_name_with_id(),
+                         final_path)
+
+        with timer.phase('save'):
+            self._add_to_result_catalog(final_path, data)
+
+        with timer.phase('GUI update'):
+            # add record to executed measurements when successful
+            if measurement_executed:
+                # the values are unloaded again if too many records are in memory, they can be re-read from the file
+                data['values'] = LazyValues(final_path, data['values'].keys(), values=data['values'])
+                self.load_measurement_dataset(data, final_path, force_gui_update=False)
+
+            # tell GUI to update
+            self.update(plot_new_meas=True)
+
+        if self.last_run_timing is not None:
+            self.last_run_timing.add_record(timer.durations, calc_device_key(data))
+
+    def _content_store(self):
+        """
+        Returns the content store of the output directory if repeated metadata is stored only once, None otherwise.
+        """
+        if not self.param_deduplicate_metadata:
+            return None
+        return ContentStore.for_directory(join(self.param_output_path, CAS_DIRECTORY_NAME))
+
+    def _add_to_result_catalog(self, file_path, data):
+        """
+        Adds a saved result file to the catalog of the output directory. A failure is only logged, the record is
+        added by the next rescan of the catalog.
+        """
+        try:
+            ResultCatalog(self.param_output_path).add_record(file_path, data)
+        except Exception as exc:
+            self.logger.warning('Could not add %s to the result catalog: %s', file_path, repr(exc))
+
+    def _save_run_timing(self, run_timing):
+        """
+        Writes the timing summary of a run next to the results and logs it.
+
+        Parameters
+        ----------
+        run_timing : RunTimingSummary
+            The timing summary of the finished run.
+        """
+        run_timing.stop()
+        if run_timing.n_records == 0:
+            return
+
+        ts = str('{date:%Y-%m-%d_%H%M%S}'.format(date=datetime.datetime.now()))
+        file_name = make_filename_compliant(str(self.param_chip_name) + '_run_timing_' + ts) + '.json'
+        file_path = join(self.param_output_path, file_name)
+        try:
+            run_timing.write(file_path)
+            self.logger.info('Saved timing summary of this run to %s', file_path)
+        except OSError as exc:
+            self.logger.warning('Could not save timing summary of this run: %s', repr(exc))
+        self.logger.info(run_timing.status_text())
+
+    def _save_queue_checkpoint(self, current_save_file_path=None):
+        """
+        Writes the pending ToDos to the queue checkpoint, or removes the checkpoint if no ToDos are left. Failing to
+        write the checkpoint is logged but does not interrupt the experiment.
+
+        Parameters
+        ----------
+        current_save_file_path : str, optional
+            Allocated save file path of the first ToDo, if it is currently being executed.
+        """
+        try:
+            if not self.to_do_list:
+                self.queue_checkpoint.clear()
+                return
+            self.queue_checkpoint.save(self.to_do_list,
+                                       chip_name=self.param_chip_name,
+                                       chip_path=self.param_chip_file_path,
+                                       output_path=self.param_output_path,
+                                       result_file_ext=self.param_result_file_ext,
+                                       current_save_file_path=current_save_file_path)
+        except Exception as exc:
+            self.logger.warning('Could not write queue checkpoint: %s', repr(exc))
+
+    def restore_queue_checkpoint(self, document):
+        """
+        Re-creates the ToDos of a queue checkpoint and appends them to the to_do_list. ToDos whose final result file
+        already exists are skipped. Devices are taken from the currently loaded chip if it contains a device with the
+        same ID and type, otherwise they are re-created from the checkpoint.
+
+        Parameters
+        ----------
+        document : dict
+            The checkpoint as returned by QueueCheckpoint.load().
+
+        Returns
+        -------
+        tuple
+            (number of restored ToDos, number of skipped finished ToDos, list of error messages of ToDos which could
+            not be restored)
+        """
+        chip_devices = self._chip._devices if self._chip is not None else {}
+        n_restored = 0
+        n_finished = 0
+        errors = []
+
+        for entry in document['todos']:
+            if QueueCheckpoint.is_finished(entry, document):
+                n_finished += 1
+                continue
+
+            dev_data = entry['device']
+            device = chip_devices.get(dev_data['id'])
+            if device is None or str(device._type) != str(dev_data['type']):
+                device = Device(dev_data['id'],
+                                dev_data['in_position'],
+                                dev_data['out_position'],
+                                dev_data['type'],
+                                dev_data.get('parameters'))
+
+            class_name = entry['measurement']
+            meas_class = self.measurements_classes.get(class_name)
+            if meas_class is None:
+                errors.append('Measurement {:s} on device {:s}: measurement class not loaded.'.format(
+                    class_name, device.short_str()))
+                continue
+
+            try:
+                measurement = meas_class(experiment=self, experiment_manager=self._experiment_manager)
+                measurement.selected_instruments.update(entry['selected_instruments'])
+                measurement.init_instruments()
+                for pname, pval in entry['parameters'].items():
+                    if pname in measurement.parameters:
+                        measurement.parameters[pname].value = pval
+            except Exception as exc:
+                errors.append('Measurement {:s} on device {:s}: {:s}'.format(
+                    class_name, device.short_str(), repr(exc)))
+                continue
+
+            todo = ToDo(device, measurement)
+            todo.pinned = entry.get('pinned', False)
+            self.to_do_list.append(todo)
+            n_restored += 1
+
+        self.logger.info('Restored %d ToDos from queue checkpoint, skipped %d finished ones, %d failed.',
+                         n_restored, n_finished, len(errors))
+        return n_restored, n_finished, errors
+
     def load_measurement_dataset(self, meas_dict, file_path, force_gui_update=True):
         """
         Use this to add a dictionary of a measurement recorded dataset to the measurements. This function
         takes over error checking of loaded datasets.
         """
+        self._validate_measurement_dataset(meas_dict, file_path)
+
+        # check for duplicates
+        if self.measurements.contains_hash(calc_measurement_key(meas_dict)):
+            raise ValueError("Duplicate measurement found!")
+
+        # all good, append to measurements
+        self.measurements.add(meas_dict, notify=False)  # dont trigger gui update if not explicitly requested by kwarg
+
+        # tell GUI to update
+        if force_gui_update:
+            self.update()
+
+    def load_measurement_datasets(self, records, force_gui_update=True):
+        """
+        Adds many measurement recorded datasets at once, with the same error checking as load_measurement_dataset.
+        Invalid and duplicate datasets are left out, all others are added and the GUI is updated only once.
+
+        Parameters
+        ----------
+        records : iterable of (dict, str)
+            The measurement records and the file paths they were loaded from.
+        force_gui_update : bool
+            Update the GUI after adding the records.
+
+        Returns
+        -------
+        tuple
+            (list of file paths of added records, list of (file path, exception) of records left out)
+        """
+        valid = []
+        added_paths = []
+        errors = []
+        batch_hashes = set()
+        for meas_dict, file_path in records:
+            try:
+                self._validate_measurement_dataset(meas_dict, file_path)
+                meas_hash = calc_measurement_key(meas_dict)
+                if self.measurements.contains_hash(meas_hash) or meas_hash in batch_hashes:
+                    raise ValueError("Duplicate measurement found!")
+            except Exception as exc:
+                errors.append((file_path, exc))
+                continue
+            batch_hashes.add(meas_hash)
+            valid.append(meas_dict)
+            added_paths.append(file_path)
+
+        self.measurements.add_many(valid, notify=False)
+
+        if force_gui_update and valid:
+            self.update()
+
+        return added_paths, errors
+
+    def _validate_measurement_dataset(self, meas_dict, file_path):
+        """
+        Checks a measurement recorded dataset and adds the *_known keys and its file path. Raises KeyError or
+        ValueError if the dataset is not valid. Does not check for duplicates.
+        """
         # trigger key error if chip is not present
         _ = meas_dict['chip']
         # trigger key error if device is not present
@@ -321,22 +707,9 @@ class StandardExperiment:
         if not len(meas_dict['values']) > 0:
             raise ValueError("Measurement record needs to contain at least one values dict.")
 
-        # check for duplicates
-        meas_hash = calc_measurement_key(meas_dict)
-        if meas_hash in self.measurements_hashes:
-            raise ValueError("Duplicate measurement found!")
-
         # add file path to dictionary
         meas_dict["file_path_known"] = file_path
 
-        # all good, append to measurements
-        self.measurements_hashes.extend([meas_hash])
-        self.measurements.extend([meas_dict])  # dont trigger gui update if not explicitly requested by kwarg
-
-        # tell GUI to update
-        if force_gui_update:
-            self.update()
-
     def import_measurement_classes(self):
         """
         Load all measurement files in Measurement folder and update
@@ -357,10 +730,14 @@ class StandardExperiment:
         self.logger.debug('Available measurements loaded. Found: %s', self.measurement_list)
 
     def remove_measurement_dataset(self, meas_dict):
-        mh = calc_measurement_key(meas_dict)
-        self.measurements_hashes.remove(mh)
         self.measurements.remove(meas_dict)
 
+    def remove_measurement_datasets(self, meas_dicts):
+        """
+        Removes multiple measurement records at once, subscribers of the measurements are notified only once.
+        """
+        self.measurements.remove_many(meas_dicts)
+
     def create_measurement_object(self, class_name):
         """Import, load and initialise measurement.
 
@@ -417,16 +794,8 @@ class StandardExperiment:
         self._experiment_manager.main_window.update_tables(plot_new_meas=plot_new_meas)
 
     def uniquify_safe_file_name(self, desired_filename):
-        """ Makes filename unique for safe files. """
-        existing = glob(desired_filename + "*")
-        if len(existing) > 0:
-            add_idx = 2
-            while True:
-                new_fn = desired_filename + "_" + str(add_idx)
-                existing = glob(new_fn + "*")
-                if not existing:
-                    return new_fn
-                else:
-                    add_idx += 1
-        else:
-            return desired_filename
+        """ Makes filename unique for safe files and reserves it by creating the (empty) .json.part file. """
+        allocator = self._filename_allocator
+        if allocator is None or allocator.directory != normpath(dirname(desired_filename)):
+            allocator = self._filename_allocator = FilenameAllocator(dirname(desired_filename))
+        return allocator.allocate(desired_filename)
@@ -16,6 +16,9 @@ class ToDo:
         self.device = device
         self.measurement = measurement
         self._timestamp = int(time.time() * 1e6)
+        self.pinned = False  # pinned ToDos keep their place in the queue when the queue order is optimized
+        self.failed_attempts = 0  # failed executions since queued, used by the error policies
+        self.requeued = False  # True once the ToDo was moved to the end of the queue after failing
 
     def __getitem__(self, item):
         """ make To-Do class compatible with old code which used (device,measurement) tuples as ToDos """
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamString
+
+# estimated time in seconds to change an instrument setting, the first matching part of the parameter name is used
+RECONFIGURATION_TIMES_S = OrderedDict([
+    ('range', 1.0),  # power meter range switching
+    ('sweep', 2.0),  # sweep speed and sweep setup
+    ('span', 1.0),  # OSA span
+    ('averag', 0.5),  # averaging time
+    ('wavelength', 0.5),
+    ('power', 0.3),
+])
+DEFAULT_RECONFIGURATION_TIME_S = 0.2
+# number of rows of the distance matrix computed at once, bounds the temporary memory
+DISTANCE_BLOCK_ROWS = 256
+
+
+def device_position(device, mover=None):
+    """
+    Returns the positions of a device's input and output as array of shape (n_stages, 2).
+
+    If a mover with a coordinate transformation is given, the positions are in stage coordinates, otherwise in
+    chip coordinates.
+    """
+    if mover is not None and mover.trafo_enabled:
+        in_, out_ = mover.device_stage_positions(device)
+        coords = [in_] if out_ is None else [in_, out_]
+    else:
+        coords = [device._in_position, device._out_position]
+    return np.array([[float(c[0]), float(c[1])] for c in coords])
+
+
+def travel_distances(positions):
+    """
+    Returns the matrix of travel distances between all pairs of positions.
+
+    The stages move simultaneously, hence the travel between two devices is the longest distance any stage has to
+    move.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Array of shape (n_devices, n_stages, 2) as returned by device_position for every device.
+
+    Returns
+    -------
+    np.ndarray
+        float32 matrix of shape (n_devices, n_devices). It is computed in blocks of rows, such that no temporary array
+        is larger than DISTANCE_BLOCK_ROWS rows.
+    """
+    positions = np.asarray(positions, dtype=float)
+    n = positions.shape[0]
+    dist = np.zeros((n, n), dtype=np.float32)
+    for start in range(0, n, DISTANCE_BLOCK_ROWS):
+        rows = dist[start:start + DISTANCE_BLOCK_ROWS]
+        for stage in range(positions.shape[1]):
+            np.maximum(rows, cdist(positions[start:start + DISTANCE_BLOCK_ROWS, stage], positions[:, stage]),
+                       out=rows, casting='unsafe')
+    return dist
+
+
+def device_key(device):
+    """ Returns the key under which ToDos are grouped by device. """
+    return device._id, device._type
+
+
+def measurement_settings(measurement):
+    """
+    Returns the instrument settings a measurement applies, i.e. its parameter values by parameter name. Free-text
+    comments do not configure any instrument and are left out.
+    """
+    params = getattr(measurement, 'parameters', None)
+    if not isinstance(params, dict):
+        return {}
+    settings = {}
+    for name, param in params.items():
+        if isinstance(param, MeasParamString) and 'comment' in name.lower():
+            continue
+        value = getattr(param, 'value', param)
+        settings[name] = tuple(value) if isinstance(value, list) else value
+    return settings
+
+
+def reconfiguration_time(parameter_name, reconfiguration_times=None):
+    """ Returns the estimated time in seconds to change the setting of the given parameter. """
+    times = RECONFIGURATION_TIMES_S if reconfiguration_times is None else reconfiguration_times
+    lower_name = parameter_name.lower()
+    for name_part, time_s in times.items():
+        if name_part in lower_name:
+            return time_s
+    return DEFAULT_RECONFIGURATION_TIME_S
+
+
+def estimate_reconfigurations(todos, reconfiguration_times=None):
+    """
+    Estimates the instrument reconfigurations needed to execute a ToDo queue.
+
+    Instruments keep the last value set for every parameter name. A ToDo needs a reconfiguration for every parameter
+    whose value differs from the current one. The settings of the first ToDo are counted as well, as the instrument
+    state before the run is not known.
+
+    Returns
+    -------
+    tuple
+        (number of reconfigurations, estimated reconfiguration time in seconds)
+    """
+    state = {}
+    n_reconf = 0
+    time_s = 0.0
+    for todo in todos:
+        for name, value in measurement_settings(todo.measurement).items():
+            if name in state and state[name] == value:
+                continue
+            state[name] = value
+            n_reconf += 1
+            time_s += reconfiguration_time(name, reconfiguration_times)
+    return n_reconf, time_s
+
+
+def _settings_distance(settings_a, settings_b):
+    """ Number of parameters which differ between two settings, a parameter set in only one of them counts too. """
+    return sum(1 for k in set(settings_a) | set(settings_b)
+               if k not in settings_a or k not in settings_b or settings_a[k] != settings_b[k])
+
+
+def _settings_signature(todo):
+    return repr(sorted(measurement_settings(todo.measurement).items(), key=lambda kv: kv[0]))
+
+
+def _settings_rank(todos):
+    """
+    Returns a rank for every distinct instrument settings in the queue. Consecutive ranks need few reconfigurations,
+    the order is found like a route through the settings.
+    """
+    distinct = OrderedDict()
+    for todo in todos:
+        distinct.setdefault(_settings_signature(todo), measurement_settings(todo.measurement))
+    sigs = list(distinct.keys())
+    cost = np.array([[_settings_distance(distinct[a], distinct[b]) for b in sigs] for a in sigs], dtype=float)
+    # fix the start at the settings used first by the user
+    start_cost = cost[0].copy()
+    start_cost[0] = -1.0
+    route = optimize_route(cost, start_cost=start_cost)
+    return {sigs[r]: rank for rank, r in enumerate(route)}
+
+
+def optimize_route(cost, start_cost=None, end_cost=None, max_passes=50):
+    """
+    Finds a short open path visiting every node once using nearest-neighbour construction and 2-opt improvement.
+
+    Parameters
+    ----------
+    cost : np.ndarray
+        Symmetric matrix of shape (n, n) with the costs of going from node i to node j.
+    start_cost : np.ndarray, optional
+        Costs of going from a fixed start point to every node. If None, the path may start at any node.
+    end_cost : np.ndarray, optional
+        Costs of going from every node to a fixed end point. If None, the path may end at any node.
+    max_passes : int
+        Maximum number of 2-opt improvement passes.
+
+    Returns
+    -------
+    list
+        The node indices in the order of the path.
+    """
+    n = cost.shape[0]
+    if n <= 1:
+        return list(range(n))
+
+    # extend the matrix by a virtual start node n and end node n + 1, free ends cost nothing
+    full = np.zeros((n + 2, n + 2), dtype=np.result_type(cost, np.float32))
+    full[:n, :n] = cost
+    if start_cost is not None:
+        full[n, :n] = full[:n, n] = start_cost
+    if end_cost is not None:
+        full[n + 1, :n] = full[:n, n + 1] = end_cost
+
+    # nearest neighbour construction, ties are resolved in favour of the original order
+    route = [n]
+    visited = np.zeros(n, dtype=bool)
+    for _ in range(n):
+        nxt = int(np.argmin(np.where(visited, np.inf, full[route[-1], :n])))
+        route.append(nxt)
+        visited[nxt] = True
+    route.append(n + 1)
+    route = np.array(route)
+
+    # 2-opt: reverse the sub-path route[i:k+1] as long as this shortens the path
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n):
+            k = np.arange(i + 1, n + 1)
+            delta = full[route[i - 1], route[k]] + full[route[i], route[k + 1]] \
+                - full[route[i - 1], route[i]] - full[route[k], route[k + 1]]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                route[i:k[best] + 1] = route[i:k[best] + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+
+    return [int(node) for node in route[1:-1]]
+
+
+class ScheduleReport:
+    """
+    Estimated costs of a ToDo queue before and after its order was optimized.
+    """
+
+    def __init__(self, n_todos, n_devices, travel_before, travel_after, travel_unit,
+                 reconfigurations_before=0, reconfigurations_after=0,
+                 reconfiguration_time_before_s=0.0, reconfiguration_time_after_s=0.0):
+        self.n_todos = n_todos
+        self.n_devices = n_devices
+        self.travel_before = travel_before
+        self.travel_after = travel_after
+        self.travel_unit = travel_unit
+        self.reconfigurations_before = reconfigurations_before
+        self.reconfigurations_after = reconfigurations_after
+        self.reconfiguration_time_before_s = reconfiguration_time_before_s
+        self.reconfiguration_time_after_s = reconfiguration_time_after_s
+
+    def __str__(self):
+        return "{:d} ToDos on {:d} devices, estimated stage travel {:.1f} {:s} before and {:.1f} {:s} after " \
+               "optimization. Estimated instrument reconfigurations {:d} ({:.1f}s) before and {:d} ({:.1f}s) " \
+               "after optimization.".format(self.n_todos, self.n_devices,
+                                            self.travel_before, self.travel_unit,
+                                            self.travel_after, self.travel_unit,
+                                            self.reconfigurations_before, self.reconfiguration_time_before_s,
+                                            self.reconfigurations_after, self.reconfiguration_time_after_s)
+
+
+def _segments(todos):
+    """
+    Splits the ToDo queue into the pinned ToDos and the runs of unpinned ToDos between them.
+
+    Returns a list of (pinned, todos) tuples, where todos is either the single pinned ToDo or the list of unpinned ones.
+    """
+    segments = []
+    for todo in todos:
+        if getattr(todo, 'pinned', False):
+            segments.append((True, [todo]))
+        elif segments and not segments[-1][0]:
+            segments[-1][1].append(todo)
+        else:
+            segments.append((False, [todo]))
+    return segments
+
+
+def optimize_todo_order(todos, mover=None, start_position=None, reconfiguration_times=None):
+    """
+    Reorders a ToDo queue such that the stages travel a short route between the devices and the instruments need
+    few reconfigurations.
+
+    All ToDos of the same device are executed consecutively. Pinned ToDos (see ToDo.pinned) keep their place in the
+    queue, only the unpinned ToDos between them are reordered. The route of each such segment starts at the device of
+    the preceding pinned ToDo and ends close to the next pinned ToDo's device.
+
+    Within a device, the measurements are ordered along a common sequence of instrument settings, which is traversed
+    forwards and backwards on alternate devices. Like this, consecutive devices mostly start with the settings the
+    previous device ended with. Measurements with equal settings keep their relative order.
+
+    Parameters
+    ----------
+    todos : list
+        The ToDo queue, is not modified.
+    mover : Mover, optional
+        If given and a coordinate transformation was done, distances are computed in stage coordinates.
+    start_position : np.ndarray, optional
+        The current stage position as array of shape (n_stages, 2), in the same coordinates as the device positions.
+    reconfiguration_times : dict, optional
+        Estimated reconfiguration time in seconds by parameter name part, defaults to RECONFIGURATION_TIMES_S.
+
+    Returns
+    -------
+    tuple
+        (reordered list of ToDos, ScheduleReport)
+    """
+    use_stage_coords = mover is not None and mover.trafo_enabled
+    unit = 'um' if use_stage_coords else 'chip units'
+
+    positions = OrderedDict()
+    for todo in todos:
+        key = device_key(todo.device)
+        if key not in positions:
+            positions[key] = device_position(todo.device, mover)
+    keys = list(positions.keys())
+    key_idx = {k: i for i, k in enumerate(keys)}
+    if not keys:
+        return list(todos), ScheduleReport(0, 0, 0.0, 0.0, unit)
+    settings_rank = _settings_rank(todos)
+    dist = travel_distances(np.array(list(positions.values())))
+
+    def queue_travel(queue):
+        travel = 0.0
+        last_pos = start_position
+        last_idx = None
+        for todo in queue:
+            idx = key_idx[device_key(todo.device)]
+            if last_idx is not None:
+                travel += dist[last_idx, idx]
+            elif last_pos is not None:
+                travel += float(np.max(np.linalg.norm(positions[keys[idx]] - last_pos, axis=-1)))
+            last_idx = idx
+        return travel
+
+    def distance_to(idx_list, pos):
+        return np.max(np.linalg.norm(np.array([positions[keys[i]] for i in idx_list]) - pos, axis=-1), axis=-1)
+
+    segments = _segments(todos)
+    new_order = []
+    for seg_idx, (pinned, seg_todos) in enumerate(segments):
+        if pinned:
+            new_order.extend(seg_todos)
+            continue
+
+        groups = OrderedDict()
+        for todo in seg_todos:
+            groups.setdefault(key_idx[device_key(todo.device)], []).append(todo)
+        group_idxs = list(groups.keys())
+        cost = dist[np.ix_(group_idxs, group_idxs)]
+
+        # anchor the segment at the neighbouring pinned ToDos or the current stage position
+        if new_order:
+            start_cost = dist[key_idx[device_key(new_order[-1].device)], group_idxs]
+        elif start_position is not None:
+            start_cost = distance_to(group_idxs, start_position)
+        else:
+            start_cost = None
+        if seg_idx + 1 < len(segments):
+            end_cost = dist[key_idx[device_key(segments[seg_idx + 1][1][0].device)], group_idxs]
+        else:
+            end_cost = None
+
+        route = optimize_route(cost, start_cost=start_cost, end_cost=end_cost)
+        for route_pos, r in enumerate(route):
+            # sorting is stable, ToDos with equal settings keep their order
+            new_order.extend(sorted(groups[group_idxs[r]],
+                                    key=lambda t: settings_rank[_settings_signature(t)],
+                                    reverse=route_pos % 2 == 1))
+
+    travel_before = queue_travel(todos)
+    travel_after = queue_travel(new_order)
+    reconf_before, reconf_time_before = estimate_reconfigurations(todos, reconfiguration_times)
+    reconf_after, reconf_time_after = estimate_reconfigurations(new_order, reconfiguration_times)
+    if travel_after > travel_before and reconf_time_after >= reconf_time_before:
+        # the heuristic never makes the queue worse than the user's order
+        new_order = list(todos)
+        travel_after, reconf_after, reconf_time_after = travel_before, reconf_before, reconf_time_before
+
+    return new_order, ScheduleReport(len(todos), len(keys), travel_before, travel_after, unit,
+                                     reconf_before, reconf_after, reconf_time_before, reconf_time_after)
@@ -62,7 +62,7 @@ class DummyInstrument(Instrument):
         """
         self.logger.debug("DummyInstrument exiting context.")
 
-    def get_instrument_parameter(self):
+    def get_instrument_parameter(self, use_cache=False):
         return {'idn': self.idn()}
 
     @Instrument._open.getter  # weird way to override the parent's class property getter
@@ -9,7 +9,7 @@ import logging
 from os.path import dirname
 
 from LabExT.Instruments.InstrumentAPI._Instrument import Instrument
-from LabExT.Instruments.InstrumentAPI.InstrumentSetup import create_instrument_obj_impl
+from LabExT.Instruments.InstrumentAPI.InstrumentSetup import create_instrument_obj_impl, create_instrument_objs_impl
 from LabExT.PluginLoader import PluginLoader
 
 
@@ -20,6 +20,7 @@ class InstrumentAPI:
         self.plugin_loader = PluginLoader()
         self.plugin_loader_stats = {}
         self.instruments = {}
+        self.interactive = True  # set to False to not show error dialogs, e.g. when running without GUI
 
     def load_all_instruments(self):
         """ executes the loading of additional Instrument classes from all configured addon directories """
@@ -55,3 +56,22 @@ class InstrumentAPI:
         Initialised instrument.
         """
         return create_instrument_obj_impl(self, instrument_type, selected_instruments, initialized_instruments)
+
+    def create_instrument_objs(self, instrument_types, selected_instruments, initialized_instruments):
+        """Initialises several instruments concurrently, see create_instrument_obj.
+
+        Parameters
+        ----------
+        instrument_types : list of str
+            Types of instruments: Laser, PowerMeter etc. as specified in instruments.config file.
+        selected_instruments : dict
+            A dictionary containing the instrument type strings as key and the chosen description dict as value
+        initialized_instruments : dict
+            A dictionary to which the instantiated instrument objects should be stored. Uses a tuple
+            (instr type, class name) as keys and the instantiated instrument object as value.
+
+        Returns
+        -------
+        List of the reasons why instruments could not be initialised, empty if all were initialised.
+        """
+        return create_instrument_objs_impl(self, instrument_types, selected_instruments, initialized_instruments)
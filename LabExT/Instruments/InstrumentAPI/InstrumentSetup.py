@@ -6,10 +6,24 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import logging
-from tkinter import messagebox
+import threading
+import time
 
+# maximum number of instruments which are created or opened at the same time
+MAX_PARALLEL_INSTRUMENTS = 8
+# seconds to wait for a single instrument to be created or opened
+INSTRUMENT_SETUP_TIMEOUT = 30.0
 
-def create_instrument_obj_impl(api, instrument_type, selected_instruments, initialized_instruments):
+
+class InstrumentSetupError(RuntimeError):
+    """Raised if one or more instruments could not be created or opened. Holds the messages of all failures."""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__('{:d} instrument(s) failed: '.format(len(self.errors)) + '; '.join(self.errors))
+
+
+def create_instrument_obj_impl(api, instrument_type, selected_instruments, initialized_instruments, errors=None):
     """Initialises instrument based on type and category.
 
     Parameters
@@ -23,6 +37,9 @@ def create_instrument_obj_impl(api, instrument_type, selected_instruments, initi
     initialized_instruments : dict
         A dictionary to which the instantiated instrument objects should be stored. Uses a tuple
         (instr type, class name) as keys and the instantiated instrument object as value.
+    errors : list, optional
+        If given, the reasons why the instrument could not be initialised are appended to this list instead of
+        being shown in a dialog.
 
     Returns
     -------
@@ -58,6 +75,8 @@ def create_instrument_obj_impl(api, instrument_type, selected_instruments, initi
             instr_pointer = inst_class(visa_address=visa_address, channel=channel, **kwargs)
         except Exception as ex:
             logger.error(ex)
+            if errors is not None:
+                errors.append('{:s} ({:s}): {:s}'.format(instrument_type, str(class_name), repr(ex)))
             instr_pointer = None
 
         if instr_pointer is not None:
@@ -73,6 +92,243 @@ def create_instrument_obj_impl(api, instrument_type, selected_instruments, initi
         msg = 'Fatal TypeError: The config file specified a constructor argument that ' + \
               'is not available in the class of the instrument chosen, please choose another instrument.'
         logger.error(msg)
-        messagebox.showinfo('Error', msg)
+        if errors is not None:
+            errors.append('{:s} ({:s}): {:s}'.format(instrument_type, str(class_name), msg))
+        elif getattr(api, 'interactive', True):
+            # imported here such that instruments can be created without Tk, e.g. in the headless batch runner
+            from tkinter import messagebox
+            messagebox.showinfo('Error', msg)
         initialized_instruments[(instrument_type, class_name)] = None
         return None
+
+
+def create_instrument_objs_impl(api, instrument_types, selected_instruments, initialized_instruments,
+                                timeout=INSTRUMENT_SETUP_TIMEOUT, max_workers=MAX_PARALLEL_INSTRUMENTS):
+    """Initialises several instruments concurrently, see create_instrument_obj_impl.
+
+    Instruments sharing a VISA address (e.g. the channels of a mainframe) are initialised one after the other, all
+    others in parallel.
+
+    Parameters
+    ----------
+    api : InstrumentAPI
+        The reference to the InstrumentAPI object with loaded instrument classes.
+    instrument_types : list of str
+        Types of the instruments to initialise.
+    selected_instruments : dict
+        A dictionary containing the instrument type strings as key and the chosen description dict as value
+    initialized_instruments : dict
+        A dictionary to which the instantiated instrument objects should be stored, see create_instrument_obj_impl.
+    timeout : float
+        Seconds to wait for each instrument.
+    max_workers : int
+        Maximum number of instruments initialised at the same time.
+
+    Returns
+    -------
+    list of str
+        The reasons why instruments could not be initialised, empty if all were initialised.
+    """
+    errors = []
+
+    def create(instrument_type):
+        created = {}  # every type gets its own dict, such that the workers do not change the same dict
+        type_errors = []
+        try:
+            create_instrument_obj_impl(api, instrument_type, selected_instruments, created, errors=type_errors)
+        except Exception as exc:
+            type_errors.append('{:s}: {:s}'.format(instrument_type, repr(exc)))
+        return created, type_errors
+
+    selected_types = [it for it in instrument_types if it in selected_instruments]
+    tasks = [(selected_instruments[it].get('visa'), it, lambda it=it: create(it), None, None) for it in selected_types]
+    run_errors = {}
+    results = run_grouped_by_resource(tasks, timeout, max_workers, run_errors)
+
+    for instrument_type in instrument_types:
+        for key in [k for k in initialized_instruments.keys() if k[0] == instrument_type]:
+            del initialized_instruments[key]
+        if instrument_type not in selected_instruments:
+            errors.append('{:s}: no instrument selected.'.format(instrument_type))
+            continue
+        index = selected_types.index(instrument_type)
+        if index in results:
+            created, type_errors = results[index]
+            initialized_instruments.update(created)
+            errors.extend(type_errors)
+        else:
+            errors.append(run_errors[index])
+
+    return errors
+
+
+def open_instruments(instruments, timeout=INSTRUMENT_SETUP_TIMEOUT, max_workers=MAX_PARALLEL_INSTRUMENTS):
+    """Opens the connections to several instruments concurrently.
+
+    Instruments sharing a VISA address (e.g. the channels of a mainframe) are opened one after the other, all others in
+    parallel. Either all instruments are opened or, if any fails, the ones already opened are closed again.
+
+    Parameters
+    ----------
+    instruments : list of Instrument
+        The instruments to open.
+    timeout : float
+        Seconds to wait for each instrument.
+    max_workers : int
+        Maximum number of instruments opened at the same time.
+
+    Raises
+    ------
+    InstrumentSetupError
+        If any instrument could not be opened, with the reasons of all failures.
+    """
+    errors = {}
+
+    def open_instr(instr):
+        instr.open()
+        return instr
+
+    tasks = [(instr.instrument_parameters.get('visa'), _instrument_label(instr), lambda i=instr: open_instr(i),
+              lambda i: i.close(), lambda i=instr: _abort_open(i)) for instr in instruments]
+    opened = run_grouped_by_resource(tasks, timeout, max_workers, errors)
+
+    if errors:
+        for instr in opened.values():
+            try:
+                instr.close()
+            except Exception as exc:
+                logging.getLogger().warning('Could not close {:s}: {:s}'.format(_instrument_label(instr), repr(exc)))
+        raise InstrumentSetupError(errors[i] for i in sorted(errors))
+
+
+def run_grouped_by_resource(tasks, timeout, max_workers, errors):
+    """Runs tasks concurrently in a thread pool, except for tasks on the same VISA resource.
+
+    Parameters
+    ----------
+    tasks : list of tuple
+        (VISA address, label, function, cleanup, abort) for each task. Tasks with the same address run one after the
+        other in the given order, tasks without address (e.g. 'None' for simulators) are independent. If a task does
+        not finish within timeout seconds after it started, abort (if not None) is called from the calling thread to
+        unblock it, e.g. by closing its VISA session, and the later tasks on the same address are not run. If the
+        task still finishes, cleanup (if not None) is called with its result.
+    timeout : float
+        Seconds to wait for each task.
+    max_workers : int
+        Maximum number of tasks running at the same time. A thread running a timed out task does not count anymore.
+    errors : dict
+        The error message of every failed, timed out or skipped task is stored here by task index.
+
+    Returns
+    -------
+    dict
+        The results of the successful tasks by task index.
+    """
+    groups = {}
+    for i, (address, _, _, _, _) in enumerate(tasks):
+        key = address if address and address != 'None' else ('independent', i)
+        groups.setdefault(key, []).append(i)
+    if not groups:
+        return {}
+
+    pending_groups = list(groups.values())
+    results = {}
+    failures = {}
+    started = {}  # task index -> time.monotonic() when it started
+    finished = set()
+    timed_out = set()
+    condition = threading.Condition()
+
+    def run_groups():
+        while True:
+            with condition:
+                if not pending_groups:
+                    return
+                group = pending_groups.pop(0)
+            for i in group:
+                _, label, func, cleanup, _ = tasks[i]
+                with condition:
+                    if i in failures:
+                        break  # skipped, an earlier task on this resource timed out
+                    started[i] = time.monotonic()
+                    condition.notify_all()
+                try:
+                    result = func()
+                except Exception as exc:
+                    logging.getLogger().error('{:s}: {:s}'.format(label, repr(exc)))
+                    result, error = None, repr(exc)
+                else:
+                    error = None
+                with condition:
+                    finished.add(i)
+                    too_late = i in timed_out  # already reported
+                    if not too_late and error is not None:
+                        failures[i] = error
+                    elif not too_late:
+                        results[i] = result
+                    condition.notify_all()
+                if too_late:
+                    if error is None and cleanup is not None:
+                        cleanup(result)
+                    return  # the worker gave up its place, finish the thread
+
+    def start_worker():
+        threading.Thread(target=run_groups, name='InstrumentSetup', daemon=True).start()
+
+    for _ in range(min(max_workers, len(groups))):
+        start_worker()
+
+    with condition:
+        while len(results) + len(failures) < len(tasks):
+            now = time.monotonic()
+            newly_timed_out = [i for i, t_start in started.items()
+                               if i not in finished and i not in timed_out and now - t_start >= timeout]
+            for i in newly_timed_out:
+                timed_out.add(i)
+                failures[i] = 'timed out after {:.1f}s.'.format(timeout)
+                group = next(g for g in groups.values() if i in g)
+                for later in group[group.index(i) + 1:]:
+                    failures[later] = 'not run, {:s} on the same resource timed out.'.format(tasks[i][1])
+            if newly_timed_out:
+                condition.release()
+                try:
+                    for i in newly_timed_out:
+                        _abort_task(tasks[i])
+                        if pending_groups:
+                            start_worker()  # replaces the worker blocked by the timed out task
+                finally:
+                    condition.acquire()
+                continue
+            running = [started[i] for i in started if i not in finished and i not in timed_out]
+            condition.wait(timeout=max(min(running) + timeout - now, 0) if running else None)
+        done = dict(results)
+        failed = dict(failures)
+
+    for i, (_, label, _, _, _) in enumerate(tasks):
+        if i in failed:
+            errors[i] = '{:s}: {:s}'.format(label, failed[i])
+    return done
+
+
+def _abort_task(task):
+    _, label, _, _, abort = task
+    if abort is None:
+        return
+    try:
+        abort()
+    except Exception as exc:
+        logging.getLogger().warning('Could not abort {:s}: {:s}'.format(label, repr(exc)))
+
+
+def _abort_open(instr):
+    """Closes the VISA session of an instrument whose open() hangs, such that its I/O fails and releases the session."""
+    inst = instr._inst
+    if inst is not None and hasattr(instr._resource_manager, 'force_close_resource'):
+        instr._resource_manager.force_close_resource(inst)
+
+
+def _instrument_label(instr):
+    channel = instr.instrument_parameters.get('channel')
+    return '{:s}{:s} at {:s}'.format(instr.__class__.__name__,
+                                     '' if channel is None else ' channel ' + str(channel),
+                                     str(instr.instrument_parameters.get('visa')))
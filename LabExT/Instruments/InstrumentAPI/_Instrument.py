@@ -6,6 +6,10 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import logging
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from functools import wraps
 
 import pyvisa
@@ -14,10 +18,66 @@ from pyvisa import InvalidSession
 from LabExT.Instruments.ReusingResourceManager import ReusingResourceManager
 from LabExT.Utils import get_visa_lib_string
 
-try:
-    from LabExT.ExperimentManager import RESOURCE_MANAGER
-except ImportError:
-    RESOURCE_MANAGER = None
+# Importing the resource manager from the ExperimentManager would load the whole GUI on every driver import. Since
+# ReusingResourceManager is a singleton, instruments get the same manager by instantiating it, see __init__.
+RESOURCE_MANAGER = None
+
+# bits of the IEEE 488.2 event status register (*ESR?) signalling an error: query error, device dependent error,
+# execution error and command error
+ESR_ERROR_BITS = 0x3C
+
+# error check policies of instruments, see Instrument.error_check_policy
+ERROR_CHECK_ALWAYS = 'always'
+ERROR_CHECK_DEFERRED = 'deferred'
+ERROR_CHECK_SAMPLED = 'sampled'
+ERROR_CHECK_POLICIES = (ERROR_CHECK_ALWAYS, ERROR_CHECK_DEFERRED, ERROR_CHECK_SAMPLED)
+
+
+
+#
+# State shared by all drivers talking to the same instrument
+#
+
+class _SharedInstrumentState:
+    """Metadata caches of all driver objects with the same VISA address.
+
+    Several driver objects can control the same instrument (e.g. the drivers of two measurements using the same laser),
+    so what one driver knows about the instrument's settings becomes invalid when another one writes to it. The caches
+    are kept per driver class and channel, writes of unknown effect clear the caches of all of them.
+    """
+
+    def __init__(self):
+        self.property_caches = {}  # (class name, channel) -> {property name: value}
+        self.static_properties = {}  # (class name, channel) -> list of static property names
+        self.written_values = {}  # (class name, channel) -> {property name: value last set}
+
+    def property_cache(self, key, static_properties):
+        self.static_properties[key] = static_properties
+        return self.property_caches.setdefault(key, {})
+
+    def written_values_of(self, key):
+        return self.written_values.setdefault(key, {})
+
+    def invalidate(self, include_static=False):
+        for written in self.written_values.values():
+            written.clear()
+        for key, cache in self.property_caches.items():
+            static = () if include_static else self.static_properties.get(key, ())
+            for prop in list(cache.keys()):
+                if prop not in static:
+                    cache.pop(prop, None)
+
+
+_SHARED_STATES = weakref.WeakValueDictionary()  # VISA address -> _SharedInstrumentState, kept alive by the drivers
+_SHARED_STATES_LOCK = threading.Lock()
+
+
+def _shared_instrument_state(visa_address):
+    with _SHARED_STATES_LOCK:
+        state = _SHARED_STATES.get(visa_address)
+        if state is None:
+            state = _SHARED_STATES[visa_address] = _SharedInstrumentState()
+        return state
 
 
 #
@@ -52,6 +112,139 @@ def assert_instrument_connected(func):
     return wrapper
 
 
+#
+# Cached properties of instruments
+#
+
+_MISSING = object()
+
+
+def _same_value(a, b):
+    try:
+        return bool(a == b)
+    except Exception:  # e.g. arrays, which have no truth value
+        return False
+
+
+class cached_instrument_property(property):
+    """Property of an instrument driver whose value is cached, use it like the built-in property decorator.
+
+    The value read by the getter is kept until the property is set, the instrument is reset or anything is written to
+    the instrument outside of a setter, see Instrument.invalidate_metadata_cache(). After setting, the value is read
+    again on the next access, since instruments might coerce the set value (e.g. round it to their resolution).
+    Setting the value which was last set or read again does not send anything to the instrument.
+
+    Usage:
+        @cached_instrument_property
+        def wavelength(self):
+            return float(self.request(':WAV?'))
+
+        @cached_instrument_property(volatile=True)
+        def power(self):  # changes by itself, never cached
+            return float(self.query(':READ:POW?'))
+
+    Properties listed in the instrument's volatile_instrument_properties are never cached either. The hits and misses
+    are counted in Instrument.property_cache_stats.
+
+    The cached and last set values are shared by all driver objects of the same class and channel on one instrument,
+    such that a write through one driver is seen by the others. Opening a new VISA session forgets them, since the
+    instrument might have been changed while it was not connected.
+    """
+
+    def __init__(self, fget=None, fset=None, fdel=None, doc=None, volatile=False, elide_writes=True):
+        """
+        Arguments:
+            volatile (bool): the value changes without being set, it is read on every access and set on every write
+            elide_writes (bool): False to send every write, even if the value did not change
+        """
+        doc = doc if doc is not None else getattr(fget, '__doc__', None)
+        super().__init__(fget, fset, fdel, doc)
+        self.__doc__ = doc  # otherwise the docstring of this class shadows the one of the getter
+        self.volatile = volatile
+        self.elide_writes = elide_writes
+        self.name = getattr(fget, '__name__', None)
+
+    def __new__(cls, fget=None, *args, **kwargs):
+        # @cached_instrument_property(volatile=True) is called without getter and returns the decorator
+        if fget is None:
+            def decorator(getter):
+                return cls(getter, *args, **kwargs)
+            return decorator
+        return super().__new__(cls)
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def _copy(self, fget, fset, fdel):
+        prop = type(self)(fget, fset, fdel, self.__doc__, volatile=self.volatile, elide_writes=self.elide_writes)
+        prop.name = self.name
+        return prop
+
+    def getter(self, fget):
+        return self._copy(fget, self.fset, self.fdel)
+
+    def setter(self, fset):
+        return self._copy(self.fget, fset, self.fdel)
+
+    def deleter(self, fdel):
+        return self._copy(self.fget, self.fset, fdel)
+
+    def _is_volatile(self, instr):
+        return self.volatile or self.name in instr.volatile_instrument_properties
+
+    def __get__(self, instr, owner=None):
+        if instr is None:
+            return self
+        cache = instr.__dict__.get('_property_cache')
+        if cache is None or self._is_volatile(instr):
+            return super().__get__(instr, owner)
+        if self.name in cache:
+            instr._property_cache_hits += 1
+            return cache[self.name]
+        instr._property_cache_misses += 1
+        value = super().__get__(instr, owner)
+        cache[self.name] = value
+        return value
+
+    def __set__(self, instr, value):
+        cache = instr.__dict__.get('_property_cache')
+        if cache is None:
+            super().__set__(instr, value)
+            return
+        if self.elide_writes and not self._is_volatile(instr) and \
+                (_same_value(instr._written_values.get(self.name, _MISSING), value)
+                 or _same_value(cache.get(self.name, _MISSING), value)):
+            instr._elided_writes += 1
+            return
+
+        # the writes of the setter only make this property and its dependents dirty, not the whole cache
+        instr._setter_depth += 1
+        try:
+            super().__set__(instr, value)
+        finally:
+            instr._setter_depth -= 1
+            instr.invalidate_properties(self.name, *instr.dependent_instrument_properties.get(self.name, ()))
+        instr._written_values[self.name] = value
+
+
+def keeps_property_cache(func):
+    """
+    Decorator for driver methods which write to the instrument without changing any cached property, e.g. trigger
+    commands. Their writes do not mark the cached properties as dirty, see Instrument.invalidate_metadata_cache().
+    Use Instrument.invalidate_properties() for the properties they do change.
+    """
+
+    @wraps(func)
+    def wrapper(instr, *args, **kwargs):
+        instr._setter_depth += 1
+        try:
+            return func(instr, *args, **kwargs)
+        finally:
+            instr._setter_depth -= 1
+
+    return wrapper
+
+
 #
 # Exception used in case instruments report errors.
 #
@@ -88,12 +281,28 @@ class Instrument(object):
             the driver. Set during driver initialization in InstrumentAPI.
         networked_instrument_properties (list): Add to this list all object properties which should get freshly fetched
             and added to self.instrument_parameters on each get_instrument_parameter() call.
+        static_instrument_properties (list): Networked properties which never change, e.g. hardware limits. They are
+            read only once and then always taken from the metadata cache.
+        volatile_instrument_properties (list): Networked properties which can change without being set by the
+            driver, e.g. the range of an auto-ranging power meter. They are never taken from the metadata cache.
+        dependent_instrument_properties (dict): Property name -> list of networked property names whose value
+            changes when the property is set, e.g. the power reading when the unit is changed.
+        error_check_policy (str): When command() and request() read the error queue. `ERROR_CHECK_ALWAYS` (default)
+            after every call. `ERROR_CHECK_DEFERRED` only in flush_errors(). `ERROR_CHECK_SAMPLED` after every
+            `error_check_interval` calls. The low-level write() and query() never read the error queue and are not
+            counted. Use `error_checks()` to change the policy for a block of code, e.g. the inner loop of a
+            measurement.
+        error_check_interval (int): Number of calls between two error queue reads with `ERROR_CHECK_SAMPLED`.
+        batch_max_length (int): Maximum length in characters of one message sent by `batch()`. Set it in drivers of
+            instruments which support compound SCPI messages (commands separated by ';') and `*ESR?`. If None, which is
+            the default, `batch()` sends every command on its own.
     """
 
     # error numbers to ignore for this instrument when
     # querying the error queue
     error_query_string = 'SYST:ERR?'
     ignored_SCPI_error_numbers = [0]
+    batch_max_length = None
 
     def __init__(self,
                  visa_address,
@@ -122,6 +331,38 @@ class Instrument(object):
         # instrument parameter on network, add to this list all object properties which should get freshly fetched
         # and added to self.instrument_parameters on each get_instrument_parameter() call.
         self.networked_instrument_properties = []
+        # subsets of the networked properties which are never resp. always re-read in fast metadata mode
+        self.static_instrument_properties = []
+        self.volatile_instrument_properties = []
+        # property name -> networked properties which change their value if the property is set
+        self.dependent_instrument_properties = {}
+
+        # metadata cache for get_instrument_parameter(use_cache=True), properties are removed when they become dirty
+        self._idn_cache = None
+        self._setter_depth = 0  # >0 while a networked property setter runs
+        self._property_cache_hits = 0
+        self._property_cache_misses = 0
+        self._elided_writes = 0
+        # also the read-through cache of cached_instrument_property, shared with the other drivers of this class and
+        # channel on the same instrument
+        self._shared_state = _shared_instrument_state(visa_address)
+        # values last set with cached_instrument_property setters, to skip setting them again, shared as well
+        self._written_values = self._shared_state.written_values_of((self.__class__.__name__, channel))
+        self._property_cache = self._shared_state.property_cache((self.__class__.__name__, channel),
+                                                                 self.static_instrument_properties)
+
+        self.error_check_policy = ERROR_CHECK_ALWAYS
+        self.error_check_interval = 10
+        self._n_unchecked_calls = 0  # command() and request() calls since the error queue was last read
+
+        # state of batch(): pending (message unit, is query) tuples, None if no batch is active
+        self._batch_units = None
+        self._batch_sent = False
+        self._batch_failed_units = []
+        self._prefetched_answers = {}  # query string -> deque of answers read ahead in a batch
+        # query strings sent by the getters of the networked properties, to read them ahead in one batch
+        self._property_queries = {}
+        self._recorded_queries = None
 
         # instrument parameter dictionary
         self.instrument_parameters = {
@@ -141,16 +382,81 @@ class Instrument(object):
 
         self.logger.debug('Instrument class initialised with visa_address: %s', visa_address)
 
-    def get_instrument_parameter(self):
+    def __setattr__(self, name, value):
+        """Tracks which networked properties were set, such that they are re-read for the next metadata snapshot.
+
+        Setting any other property which writes to the instrument marks all cached properties as dirty, see write().
+        """
+        cache = self.__dict__.get('_property_cache')
+        if cache is None or isinstance(getattr(type(self), name, None), cached_instrument_property) or \
+                (name not in self.networked_instrument_properties and name not in self.dependent_instrument_properties):
+            # cached properties keep track of their state themselves
+            object.__setattr__(self, name, value)
+            return
+
+        self._setter_depth += 1
+        try:
+            object.__setattr__(self, name, value)
+        finally:
+            self._setter_depth -= 1
+            cache.pop(name, None)
+            for dependent in self.dependent_instrument_properties.get(name, ()):
+                cache.pop(dependent, None)
+
+    def invalidate_metadata_cache(self, include_static=False):
+        """Marks all cached networked properties as dirty, such that they are re-read for the next metadata snapshot.
+        Also the values of cached_instrument_property properties are read again on the next access and set again on
+        the next write.
+
+        Called automatically whenever something is written to the instrument outside of a property setter, e.g.
+        `*RST` by reset(). The caches of all other drivers of the same instrument are invalidated as well.
+
+        Arguments:
+            include_static (bool): also forget the cached `*IDN?` answer and the static properties.
+        """
+        if include_static:
+            self._idn_cache = None
+        self._shared_state.invalidate(include_static=include_static)
+
+    @property
+    def property_cache_stats(self):
+        """Counters of the cache of cached_instrument_property properties: reads from the cache ('hits'), reads from
+        the instrument ('misses') and writes which were skipped since the value did not change ('elided writes')."""
+        return {'hits': self._property_cache_hits,
+                'misses': self._property_cache_misses,
+                'elided writes': self._elided_writes}
+
+    def invalidate_properties(self, *names):
+        """Marks some cached properties as dirty, e.g. in driver methods which change them as a side effect."""
+        for name in names:
+            self._property_cache.pop(name, None)
+            self._written_values.pop(name, None)
+
+    def get_instrument_parameter(self, use_cache=False):
         """Return the currently set instrument parameters.
 
         Reads all properties directly from instrument if connection to instrument can be opened. This method is called
         before and after a measurement execution in LabExT to save the instrument state as meta data.
 
         Include all property names you want to read in the `self.networked_instrument_properties` list.
+
+        Arguments:
+            use_cache (bool): fast metadata mode: the `*IDN?` answer, static properties and properties which were not
+                set since they were last read are taken from the metadata cache. Only if anything needs to be read,
+                the connection is opened. Otherwise, everything is read from the instrument and the cache is renewed.
         """
         ret_dict = self.instrument_parameters.copy()
 
+        if use_cache:
+            to_read = [prop for prop in self.networked_instrument_properties
+                       if prop not in self._property_cache or prop in self.volatile_instrument_properties]
+            if self._idn_cache is not None and not to_read:
+                ret_dict['idn'] = self._idn_cache
+                ret_dict.update((prop, self._property_cache[prop]) for prop in self.networked_instrument_properties)
+                return ret_dict
+        else:
+            to_read = list(self.networked_instrument_properties)
+
         need_closing = False
         if not self._open:
             try:
@@ -164,17 +470,34 @@ class Instrument(object):
                 self.logger.warning(msg)
 
         if self._open:  # skip getting properties if instrument was not successfully opened above
-            ret_dict['idn'] = self.idn()
-            for prop in self.networked_instrument_properties:
-                try:
-                    val = getattr(self, prop)  # network access here
-                except AttributeError as e:
-                    val = "Attribute not found! class: " + str(self.__class__) + " " + str(e)
-                    self.logger.error(val)
-                except Exception as e:
-                    val = "ERROR getting up-to-date parameter " + prop + ": " + repr(e)
-                    self.logger.warning(val)
-                ret_dict[prop] = val
+            if self._idn_cache is None or not use_cache:
+                self._idn_cache = self.idn()
+            ret_dict['idn'] = self._idn_cache
+            try:
+                with self.batch():
+                    # the queries the getters sent last time are read ahead in as few transactions as possible
+                    self._prefetch([q for prop in to_read for q in self._property_queries.get(prop, ())])
+                    for prop in self.networked_instrument_properties:
+                        if prop not in to_read:
+                            ret_dict[prop] = self._property_cache[prop]
+                            continue
+                        self._recorded_queries = []
+                        self._property_cache.pop(prop, None)  # cached properties are read from the instrument
+                        try:
+                            val = getattr(self, prop)  # network access here
+                            self._property_cache[prop] = val
+                            self._property_queries[prop] = tuple(self._recorded_queries)
+                        except AttributeError as e:
+                            val = "Attribute not found! class: " + str(self.__class__) + " " + str(e)
+                            self.logger.error(val)
+                        except Exception as e:
+                            val = "ERROR getting up-to-date parameter " + prop + ": " + repr(e)
+                            self.logger.warning(val)
+                        finally:
+                            self._recorded_queries = None
+                        ret_dict[prop] = val
+            except InstrumentException as e:
+                self.logger.warning(self.__class__.__name__ + ": error reading up-to-date parameters: " + str(e))
 
         if need_closing:
             self.close()
@@ -202,11 +525,40 @@ class Instrument(object):
     def open(self):
         """Open the connection to the instrument.
 
-        Automatically re-uses any old connection if it is already open with the reusing-resource manager.
+        Automatically re-uses any old connection if it is already open with the reusing-resource manager. On the first
+        open of a new VISA session, on_first_open() is called.
         """
         self._inst = self._resource_manager.open_resource(self._address)
         self.logger.debug('opened instrument at %s.', self._address)
 
+        first_open_done = getattr(self._inst, 'lrm_first_open_done', None)
+        if not isinstance(first_open_done, set):
+            first_open_done = self._inst.lrm_first_open_done = set()
+        key = (self.__class__.__name__, self.channel)
+        if key not in first_open_done:
+            # new session: the settings might have been changed while we were not connected, e.g. on the front panel.
+            # A reused session stayed connected, so nobody else could have changed them.
+            for prop in list(self._property_cache.keys()):
+                if prop not in self.static_instrument_properties:
+                    self._property_cache.pop(prop, None)
+            self._written_values.clear()
+
+            first_open_done.add(key)
+            try:
+                self.on_first_open()
+            except BaseException:
+                first_open_done.discard(key)  # try again on the next open
+                raise
+
+    def on_first_open(self):
+        """Called by open() once per VISA session, for setup which stays valid as long as the session is open.
+
+        The resource manager keeps released sessions open for reuse, so open() is called much more often than a new
+        session is created. Put expensive setup (authentication, one-time configuration) here instead of in open().
+        Called once for each driver class and channel sharing the session.
+        """
+        pass
+
     def close(self):
         """Close the connection to the instrument.
 
@@ -248,6 +600,7 @@ class Instrument(object):
     def clear(self):
         """Clears all status registers.
         """
+        self._send_pending_batch()
         self._inst.write('*CLS')
 
     @assert_instrument_connected
@@ -261,7 +614,9 @@ class Instrument(object):
     def reset(self):
         """Reset the laboratory instrument.
         """
+        self._send_pending_batch()
         self._inst.write('*RST')
+        self.invalidate_metadata_cache()
 
     @assert_instrument_connected
     def ready_check_sync(self):
@@ -271,6 +626,7 @@ class Instrument(object):
         This call is BLOCKING until the instrument signals completion. If the instrument
         does not return an answer within the timeout, this call errors.
         """
+        self._send_pending_batch()
         self._inst.query('*OPC?')
         return True
 
@@ -281,6 +637,7 @@ class Instrument(object):
         Signal the instrument to reset the event status register (ESR) and start listening
         to operation complete signals to store into the ESR.
         """
+        self._send_pending_batch()
         self._inst.write('*CLS')  # clear event status register
         self._inst.write('*OPC')  # signal OPC bit to be set in ESR upon operation completion (not a query!)
 
@@ -298,6 +655,7 @@ class Instrument(object):
         Returns:
             bool: True if operation complete bit set, False otherwise
         """
+        self._send_pending_batch()
         esr_value = int(self._inst.query('*ESR?'))
         opc_bit_value = esr_value & 0x01  # OPC bit is bit 0 in ESR register
         if opc_bit_value > 0:
@@ -313,9 +671,24 @@ class Instrument(object):
         standard (notably all Agilent / Keysight ones). If it does not work for your instrument,
         don't hesitate to implement a working version.
 
+        Inside `batch()`, the pending commands are sent first and errors are attributed to the batched commands
+        causing them.
+
         Raises:
             InstrumentException: if the instrument reports an error
         """
+        if self._batch_units is not None:
+            self._send_pending_batch()
+            self._check_batch_errors()
+            return
+        self._n_unchecked_calls = 0
+        errors = self._read_error_queue()
+        if errors:
+            self.invalidate_metadata_cache()  # we do not know which setting failed to be applied
+            raise InstrumentException("Error queue reports these errors: " + str(errors))
+
+    def _read_error_queue(self):
+        """Reads the error queue of the instrument until it is empty and returns the errors which are not ignored."""
         errors = []
         while True:
             err_value = self._inst.query(self.error_query_string).strip()
@@ -327,9 +700,194 @@ class Instrument(object):
             else:
                 # the error queue is empty as soon as we read a 0 from it
                 break
+        return errors
+
+    def flush_errors(self):
+        """Reads the error queue if any call was not checked yet, e.g. with a deferred or sampled error check policy.
+
+        Raises:
+            InstrumentException: with all errors accumulated in the error queue since it was last read
+        """
+        if not self._n_unchecked_calls and self._batch_units is None:
+            return
+        if not self._open:
+            self.logger.warning('%s: connection closed before the error queue was read after %d calls.',
+                                self.__class__.__name__, self._n_unchecked_calls)
+            self._n_unchecked_calls = 0
+            return
+        self.check_instrument_errors()
+
+    @contextmanager
+    def error_checks(self, policy, interval=None):
+        """Context to use another error check policy, e.g. for the inner loop of a measurement.
+
+        The accumulated errors are flushed when the context is left and the previous policy is restored.
+
+        Usage:
+            with power_meter.error_checks(ERROR_CHECK_SAMPLED, interval=50):
+                for position in positions:
+                    ...
+                    powers.append(power_meter.power)
+
+        Arguments:
+            policy (str): one of ERROR_CHECK_POLICIES
+            interval (int): number of calls between two error queue reads with ERROR_CHECK_SAMPLED, defaults to
+                error_check_interval
+        """
+        if policy not in ERROR_CHECK_POLICIES:
+            raise ValueError("Unknown error check policy {:s}, must be one of {:s}.".format(
+                str(policy), str(ERROR_CHECK_POLICIES)))
+        previous = (self.error_check_policy, self.error_check_interval)
+        self.error_check_policy = policy
+        if interval is not None:
+            self.error_check_interval = max(1, int(interval))
+        try:
+            yield
+        except BaseException:
+            # report the original error, the accumulated ones are only logged
+            try:
+                self.flush_errors()
+            except Exception as exc:
+                self.logger.warning('Instrument errors accumulated before the error: %s', repr(exc))
+            raise
+        finally:
+            self.error_check_policy, self.error_check_interval = previous
+        self.flush_errors()
+
+    def _check_errors_by_policy(self):
+        """Reads the error queue after a command() or request() if the error check policy says so."""
+        self._n_unchecked_calls += 1
+        if self.error_check_policy == ERROR_CHECK_ALWAYS or (self.error_check_policy == ERROR_CHECK_SAMPLED and
+                                                             self._n_unchecked_calls >= self.error_check_interval):
+            self.check_instrument_errors()
+
+    #
+    # batching of commands
+    #
+
+    @contextmanager
+    def batch(self):
+        """Context to send many commands in as few transactions as the instrument allows.
+
+        Inside the context, command(), write() and their channel variants are not sent right away, but collected and
+        sent as one message concatenated with ';', either before the next query or when the context is left. Instead
+        of a `*OPC?` and reading the error queue after every command, there is one `*OPC?` at the end and the error
+        queue is read once. `*ESR?` is interleaved between the commands, so errors are still attributed to the commands
+        causing them.
+
+        Queries inside the context are sent together with the pending commands and return their answer right away,
+        but request() and request_channel() do not check the error queue on their own. Nested batches are merged into
+        the outermost one.
+
+        Usage:
+            with laser.batch():
+                laser.unit = 'dBm'
+                laser.power = 3.0
+                laser.wavelength = 1550.0
+
+        Raises:
+            InstrumentException: when leaving the context, if the instrument reports an error
+        """
+        if self.batch_max_length is None or self._batch_units is not None:
+            yield  # commands are sent as usual, resp. by the outer batch
+            return
+
+        self._batch_units = []
+        self._batch_sent = False
+        self._batch_failed_units = []
+        try:
+            yield
+        except BaseException:
+            # the commands before the error are sent, as without batching, but the original error is raised
+            try:
+                self._finish_batch()
+            except Exception as exc:
+                self.logger.warning('Error while finishing the command batch: %s', repr(exc))
+            raise
+        self._finish_batch()
+
+    def _finish_batch(self):
+        try:
+            if self._batch_units or self._batch_sent:
+                units = self._pop_batch_units()
+                self._send_batch_units(units, with_opc=bool(units))
+                self._check_batch_errors()
+        finally:
+            self._batch_units = None
+            self._prefetched_answers.clear()
+
+    def _pop_batch_units(self):
+        units, self._batch_units = self._batch_units, []
+        return units
+
+    def _send_pending_batch(self):
+        """Sends the commands pending in a batch, called before any I/O which bypasses the batch."""
+        if self._batch_units:
+            self._send_batch_units(self._pop_batch_units())
+
+    @staticmethod
+    def _batch_message(units, with_opc=False):
+        parts = ['*ESR?']  # clears the event status register before the first command
+        for unit, _ in units:
+            # after a ';', headers without leading colon are relative to the path of the previous command
+            if not unit.startswith((':', '*')):
+                unit = ':' + unit
+            parts.extend([unit, '*ESR?'])
+        if with_opc:
+            parts.append('*OPC?')
+        return ';'.join(parts)
+
+    def _send_batch_units(self, units, with_opc=False):
+        """Sends message units in as few messages as batch_max_length allows and returns the answers of queries."""
+        answers = []
+        chunk = []
+        for unit in units:
+            if chunk and len(self._batch_message(chunk + [unit], with_opc)) > self.batch_max_length:
+                answers.extend(self._send_batch_message(chunk))
+                chunk = []
+            chunk.append(unit)
+        if chunk or with_opc:
+            answers.extend(self._send_batch_message(chunk, with_opc))
+        return answers
+
+    def _send_batch_message(self, units, with_opc=False):
+        message = self._batch_message(units, with_opc)
+        answers = self._inst.query(message).strip().split(';')
+        self._batch_sent = True
+
+        n_expected = 1 + len(units) + sum(is_query for _, is_query in units) + int(with_opc)
+        if len(answers) != n_expected:
+            raise InstrumentException("Unexpected answer to batched message " + repr(message) + ": " + repr(answers))
+        answers = iter(answers)
+        next(answers)  # event status before the batch, might contain errors of earlier commands
+        query_answers = []
+        for unit, is_query in units:
+            if is_query:
+                query_answers.append(next(answers))
+            if int(next(answers)) & ESR_ERROR_BITS:
+                self._batch_failed_units.append(unit)
+        return query_answers
+
+    def _check_batch_errors(self):
+        failed, self._batch_failed_units = self._batch_failed_units, []
+        self._n_unchecked_calls = 0
+        errors = self._read_error_queue()
+        if errors:
+            self.invalidate_metadata_cache()
+        if errors and failed:
+            raise InstrumentException("Batched commands " + str(failed) + " failed, error queue reports these errors: "
+                                      + str(errors))
         if errors:
             raise InstrumentException("Error queue reports these errors: " + str(errors))
 
+    def _prefetch(self, query_strs):
+        """Reads the answers of queries ahead in one batch, query() then returns them without instrument access."""
+        if self._batch_units is None or not query_strs:
+            return
+        units = self._pop_batch_units() + [(q, True) for q in query_strs]
+        for query_str, ans in zip(query_strs, self._send_batch_units(units)):
+            self._prefetched_answers.setdefault(query_str, deque()).append(ans)
+
     #
     # functions for I/O to and from instrument
     #
@@ -340,13 +898,18 @@ class Instrument(object):
         Sends a SCPI text command to the instrument, waits until its completion and checks that there was
         no error in communicating. Use this function to send standard, non timing critical SCPI commands.
 
+        Inside `batch()`, the command is sent with the other commands of the batch and checked at its end. Otherwise,
+        the error queue is read as the error_check_policy says.
+
         Arguments:
             command_str (str): the command string to send to the instrument.
         """
         self.write(command_str)  # send the command
+        if self._batch_units is not None:
+            return  # checked at the end of the batch
         self.ready_check_sync()  # wait until instrument signalled completion
 
-        self.check_instrument_errors()  # make sure there was no error
+        self._check_errors_by_policy()  # make sure there was no error
 
     def command_channel(self, subsystem_str, command_str):
         """High-level shortcut function to send a command to a channel in a multi-channeled instrument.
@@ -367,7 +930,7 @@ class Instrument(object):
         """High-level query call incl. ready-check and error check.
 
         Sends a SCPI text request to the instrument, waits until its completion and checks that there was
-        no error in communicating. Then returns the answer.
+        no error in communicating, as the error_check_policy says. Then returns the answer.
         Use this function to execute standard, non timing critical SCPI queries.
 
         Arguments:
@@ -376,7 +939,8 @@ class Instrument(object):
             str: the answer from the instrument
         """
         ans = self.query(request_str)
-        self.check_instrument_errors()
+        if self._batch_units is None:
+            self._check_errors_by_policy()  # in a batch, at its end
         return ans
 
     def request_channel(self, subsystem_str, request_str):
@@ -411,8 +975,16 @@ class Instrument(object):
         Returns:
              str: the answer from the instrument
         """
-        ans = self._inst.query(query_str)
-        return ans
+        if self._recorded_queries is not None:
+            self._recorded_queries.append(query_str)
+        if self._batch_units is None:
+            return self._inst.query(query_str)
+
+        prefetched = self._prefetched_answers.get(query_str)
+        if prefetched:
+            return prefetched.popleft()
+        # send the pending commands of the batch along, they must be executed before
+        return self._send_batch_units(self._pop_batch_units() + [(query_str, True)])[-1]
 
     def query_channel(self, subsystem_str, write_str):
         """Low-level query function for channelized instruments.
@@ -440,7 +1012,14 @@ class Instrument(object):
         Arguments:
              write_str (str): string to be written
         """
-        self._inst.write(write_str)
+        if self._batch_units is not None:
+            self._batch_units.append((write_str, False))
+            self._prefetched_answers.clear()  # the answers might have changed
+        else:
+            self._inst.write(write_str)
+        if not self._setter_depth:
+            # we do not know which settings this changed
+            self.invalidate_metadata_cache()
 
     def write_channel(self, subsystem_str, write_str):
         """Low-level write function for channelized instruments.
@@ -475,6 +1054,7 @@ class Instrument(object):
         Returns:
             bytes: the raw bytes read
         """
+        self._send_pending_batch()
         if query_str is not None:
             self._inst.write(query_str)
 
@@ -499,6 +1079,7 @@ class Instrument(object):
             container: The container
         :return: list of numbers
         """
+        self._send_pending_batch()
         return self._inst.query_ascii_values(query_str,
                                              converter=converter,
                                              separator=separator,
@@ -1,2 +1,4 @@
-from ._Instrument import Instrument, InstrumentException
+from ._Instrument import Instrument, InstrumentException, cached_instrument_property, \
+    keeps_property_cache, ERROR_CHECK_ALWAYS, ERROR_CHECK_DEFERRED, ERROR_CHECK_SAMPLED, ERROR_CHECK_POLICIES
 from .InstrumentAPI import InstrumentAPI
+from .InstrumentSetup import InstrumentSetupError, open_instruments
@@ -10,7 +10,8 @@ from math import ceil, floor, log10
 
 import numpy as np
 
-from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, cached_instrument_property, \
+    keeps_property_cache
 
 
 class LaserMainframeKeysight(Instrument):
@@ -44,6 +45,7 @@ class LaserMainframeKeysight(Instrument):
     """
 
     ignored_SCPI_error_numbers = [0, -420, -231, -261]
+    batch_max_length = 512  # compound messages and *ESR? are supported by all Keysight mainframes
 
     def __init__(self, *args, **kwargs):
         # call Instrument constructor, creates VISA instrument
@@ -62,6 +64,9 @@ class LaserMainframeKeysight(Instrument):
             'min_lambda',
             'max_lambda'
         ])
+        # the wavelength limits are hardware properties, the power reading depends on the unit
+        self.static_instrument_properties.extend(['min_lambda', 'max_lambda'])
+        self.dependent_instrument_properties.update({'unit': ['power']})
 
         self.sweep_configured = False
         self.send_hardware_trigger = False
@@ -81,6 +86,7 @@ class LaserMainframeKeysight(Instrument):
             self.unlock_laser()
             self.trigger_at_open = self.query("trig:conf?")
 
+    @keeps_property_cache
     def close(self):
         if self._open:
             self.command("trig:conf " + self.trigger_at_open)
@@ -101,6 +107,7 @@ class LaserMainframeKeysight(Instrument):
     #   mainframe options
     #
 
+    @keeps_property_cache
     def unlock_laser(self, pin="1234"):
         """
         set lock for the instrument
@@ -120,7 +127,7 @@ class LaserMainframeKeysight(Instrument):
         else:
             return mf_idn
 
-    @property
+    @cached_instrument_property
     def min_lambda(self):
         """
         :return: minimum possible laser wavelength (for sweeps) in [nm]
@@ -130,7 +137,7 @@ class LaserMainframeKeysight(Instrument):
         min_lambda_possible = min_lambda_possible + 1e-9
         return ceil(min_lambda_possible * 1e9)
 
-    @property
+    @cached_instrument_property
     def max_lambda(self):
         """
         :return: maximum possible laser wavelength (for sweeps) in [nm]
@@ -144,6 +151,7 @@ class LaserMainframeKeysight(Instrument):
     #   swept wavelength settings
     #
 
+    @keeps_property_cache
     def sweep_wl_setup(self, start_nm, stop_nm, step_pm, sweep_speed_nm_per_s=40, send_hardware_trigger=True):
         """
         Setup the laser for a continuous wavelength sweep with recording of the wavelengths.
@@ -213,6 +221,7 @@ class LaserMainframeKeysight(Instrument):
     def sweep_wl_get_total_time(self):
         raise NotImplementedError
 
+    @keeps_property_cache
     def sweep_wl_start(self):
         """
         Starts the sweeping function immediately.
@@ -232,6 +241,8 @@ class LaserMainframeKeysight(Instrument):
             raise InstrumentException("Sweep function never waited for trigger within set network timeout.")
         # start sweep by sending software trigger
         self.command_channel("sour", ":wav:swe:soft")
+        # the only setting changed by sweeping
+        self.invalidate_properties('wavelength')
 
     def sweep_wl_busy(self):
         """
@@ -243,6 +254,7 @@ class LaserMainframeKeysight(Instrument):
         else:
             return True  # otherwise
 
+    @keeps_property_cache
     def sweep_wl_get_data(self, trigger_cleanup=True, **kwargs):
         """
         Reads the wavelengths vector generated during the sweep. Only really useful if used with sending
@@ -268,7 +280,7 @@ class LaserMainframeKeysight(Instrument):
     #   standard properties
     #
 
-    @property
+    @cached_instrument_property
     def wavelength(self):
         """
         Get the wavelength of the laser.
@@ -286,7 +298,7 @@ class LaserMainframeKeysight(Instrument):
         """
         self.command_channel('sour', ':wav ' + str(wavelength_nm) + 'nm')
 
-    @property
+    @cached_instrument_property
     def power(self):
         """
         Get the set output power of the laser. Query .unit to find the unit.
@@ -300,7 +312,7 @@ class LaserMainframeKeysight(Instrument):
         """
         self.command_channel('sour', ':pow ' + str(power_dBm) + 'dBm')
 
-    @property
+    @cached_instrument_property
     def unit(self):
         """
         Query the physical unit of the laser power.
@@ -324,7 +336,7 @@ class LaserMainframeKeysight(Instrument):
         else:
             raise InstrumentException('Unknown unit: {}, use dBm or Watt')
 
-    @property
+    @cached_instrument_property(volatile=True)
     def enable(self):
         """
         Return if the laser is on (True) or off (False)
@@ -67,14 +67,21 @@ class OpticalSpectrumAnalyzerAQ6370C(Instrument):
             '_sweep_mode',
             '_active_trace'
         ])
+        # start, stop and center wavelength as well as span depend on each other
+        self.dependent_instrument_properties.update({
+            'startwavelength': ['stopwavelength', 'centerwavelength'],
+            'stopwavelength': ['startwavelength', 'centerwavelength'],
+            'centerwavelength': ['startwavelength', 'stopwavelength'],
+            'span': ['startwavelength', 'stopwavelength', 'centerwavelength'],
+        })
 
-    def open(self):
+    def on_first_open(self):
         """
-        Open the connection to the instrument. Automatically re-uses any old connection if it is already open.
+        Authenticates on a new connection to the instrument. Reused connections are already authenticated.
 
         :return: None
         """
-        super().open()
+        super().on_first_open()
 
         self._inst.read_termination = '\r\n'
 
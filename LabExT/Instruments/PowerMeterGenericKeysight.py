@@ -7,7 +7,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import numpy as np
 
-from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, cached_instrument_property, \
+    keeps_property_cache
 
 
 class PowerMeterGenericKeysight(Instrument):
@@ -41,16 +42,11 @@ class PowerMeterGenericKeysight(Instrument):
     """
 
     ignored_SCPI_error_numbers = [0, -410, -420, -231, -213, -261]
+    batch_max_length = 512  # compound messages and *ESR? are supported by all Keysight power meters
 
     def __init__(self, *args, **kwargs):
-        """
-        We let the power meter to keep track internally of the last set average time.
-        """
         super().__init__(*args, **kwargs)
 
-        # keep track of last set average time
-        self._last_set_atime_s = 0.2  # Keysight default value
-
         # safe instrument specific settings
         self._net_timeout_ms = kwargs.get("net_timeout_ms", 10000)
         self._net_chunk_size = kwargs.get("net_chunk_size_B", 1024)
@@ -65,6 +61,9 @@ class PowerMeterGenericKeysight(Instrument):
             'autoranging',
             'averagetime'
         ])
+        # the range changes by itself while autoranging is on
+        self.volatile_instrument_properties.extend(['range'])
+        self.dependent_instrument_properties.update({'range': ['autoranging'], 'autoranging': ['range']})
 
     def open(self):
         super().open()
@@ -98,8 +97,9 @@ class PowerMeterGenericKeysight(Instrument):
             self.command_channel('trig', ':inp ign')
         # disable any trigger outputs of PM (needed e.g. in case laser an PM are in same mainframe)
         self.command_channel('trig', ':outp dis')
-        self.command_channel('sens', ':func:par:logg {:d},{:.6f}s'.format(n_measurement_points, self._last_set_atime_s))
+        self.command_channel('sens', ':func:par:logg {:d},{:.6f}s'.format(n_measurement_points, self.averagetime))
 
+    @keeps_property_cache
     def logging_start(self):
         """
         Commands the logging function to start.
@@ -108,6 +108,7 @@ class PowerMeterGenericKeysight(Instrument):
         """
         self.write_channel('sens', ':func:stat logg,star')
 
+    @keeps_property_cache
     def logging_stop(self):
         """
         Stops any logging function.
@@ -127,6 +128,7 @@ class PowerMeterGenericKeysight(Instrument):
         else:
             return False
 
+    @keeps_property_cache
     def logging_get_data(self, trigger_cleanup=True):
         """
         Reads the logging data from the power meter and returns a numpy array
@@ -162,7 +164,7 @@ class PowerMeterGenericKeysight(Instrument):
     # standard properties of power meter channels
     #
 
-    @property
+    @cached_instrument_property
     def wavelength(self):
         """
         Read the wavelength calibration setting.
@@ -181,7 +183,7 @@ class PowerMeterGenericKeysight(Instrument):
         """
         self.command_channel(':SENS', ':POW:WAV {:f} nm'.format(wl_nm))
 
-    @property
+    @cached_instrument_property
     def unit(self):
         """
         Query the physical unit of the measured power.
@@ -205,7 +207,7 @@ class PowerMeterGenericKeysight(Instrument):
         else:
             raise InstrumentException('Unknown unit: {}, use dBm or Watt')
 
-    @property
+    @cached_instrument_property
     def range(self):
         """
         Query the range (i.e. sensitivity) setting.
@@ -227,7 +229,7 @@ class PowerMeterGenericKeysight(Instrument):
             self.command_channel(':SENS', ':POW:RANG:AUTO 0')
             self.command_channel(':SENS', ':POW:RANG {:f}'.format(range_dBm))
 
-    @property
+    @cached_instrument_property
     def autoranging(self):
         """
         Query if autoranging is on.
@@ -252,15 +254,14 @@ class PowerMeterGenericKeysight(Instrument):
         else:
             self.command_channel(':SENS', ':POW:RANG:AUTO 0')
 
-    @property
+    @cached_instrument_property
     def averagetime(self):
         """
         Query the current averaging time setting.
 
         :return: a float number, specifying the current averaging time [s]
         """
-        self._last_set_atime_s = float(self.request_channel(':SENS', ':POW:ATIME?').strip())
-        return self._last_set_atime_s
+        return float(self.request_channel(':SENS', ':POW:ATIME?').strip())
 
     @averagetime.setter
     def averagetime(self, atime_s):
@@ -271,7 +272,6 @@ class PowerMeterGenericKeysight(Instrument):
         :return: None
         """
         self.command_channel(':SENS', ':POW:ATIME {:f} s'.format(atime_s))
-        self._last_set_atime_s = atime_s
 
     @property
     def power(self):
@@ -281,9 +281,11 @@ class PowerMeterGenericKeysight(Instrument):
         :return: the optical power, measured right now
         """
         # we must adapt the network timeout to at least be larger than the aperture time of the power meter
-        if self._inst.timeout < self._last_set_atime_s * 1.1:
+        # the average time is cached and shared with all drivers of this channel, this usually does not query anything
+        atime_s = self.averagetime
+        if self._inst.timeout < atime_s * 1.1:
             self.logger.warning("Resetting connection timeout to allow at least one average-time period to pass.")
-            self._inst.timeout = self._last_set_atime_s * 1.1
+            self._inst.timeout = atime_s * 1.1
 
         r = float(self.query_channel(':READ', ':POW?').strip())
         if r > 1e20:
@@ -295,6 +297,7 @@ class PowerMeterGenericKeysight(Instrument):
     # manual triggering
     #
 
+    @keeps_property_cache
     def trigger(self, continuous=None):
         """
         Set the trigger of the power meter
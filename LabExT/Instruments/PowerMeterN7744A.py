@@ -5,7 +5,7 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 """
 
-from LabExT.Instruments.InstrumentAPI import InstrumentException
+from LabExT.Instruments.InstrumentAPI import InstrumentException, cached_instrument_property
 from LabExT.Instruments.PowerMeterGenericKeysight import PowerMeterGenericKeysight
 
 
@@ -45,12 +45,12 @@ class PowerMeterN7744A(PowerMeterGenericKeysight):
             'autogain'
         ])
 
-    def open(self):
-        super().open()
+    def on_first_open(self):
+        super().on_first_open()
         # observation by Marco: The N7744A has much faster polling when we call the setup to the logging function once
         self.logging_setup(n_measurement_points=1000)
 
-    @property
+    @cached_instrument_property
     def autogain(self):
         """
         Query automatic gain setting.
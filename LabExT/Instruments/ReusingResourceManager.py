@@ -7,19 +7,37 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import logging
 import threading
+import time
 
 import pyvisa as visa
 
+from LabExT.Utils import get_visa_session_idle_timeout
+
+# seconds a released session is kept open for reuse, 0 closes sessions as soon as they are released
+DEFAULT_IDLE_TIMEOUT = 60.0
+# query sent to a pooled session before reusing it, None to reuse without checking
+DEFAULT_HEALTH_CHECK_QUERY = '*STB?'
+
 
 class OpenedResource:
     def __init__(self, resource_obj):
         self.resource_obj = resource_obj
         self.counter = 1
+        self.idle_since = None  # time.monotonic() when the counter reached 0, None if in use
+
+    @property
+    def idle(self):
+        return self.counter == 0
 
 
 class ReusingResourceManager(visa.ResourceManager):
     """
     Subclass of the pyvisa ResourceManager which implements reusing of resource upon when opening connections.
+
+    Resources which are not referenced anymore are kept open in a pool for lrm_idle_timeout seconds, such that
+    measurements opening and closing their instruments on every run do not pay for connection setup every time. Before
+    a pooled resource is reused, it is checked with lrm_health_check_query and replaced by a new one if it does not
+    answer.
     """
 
     _inst_ref = None
@@ -37,6 +55,11 @@ class ReusingResourceManager(visa.ResourceManager):
             obj._lrm_opened_resources = {}
             obj._lrm_logger = logging.getLogger()
             obj._lrm_tlock = threading.Lock()
+            obj._lrm_name_locks = {}  # resource name -> lock held while opening this resource
+
+            idle_timeout = get_visa_session_idle_timeout()
+            obj.lrm_idle_timeout = DEFAULT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+            obj.lrm_health_check_query = DEFAULT_HEALTH_CHECK_QUERY
 
         obj._lrm_logger.debug(
             'Initialized ReusingResourceManager using VISA library {:s} with object id {:s}'.format(
@@ -44,11 +67,20 @@ class ReusingResourceManager(visa.ResourceManager):
 
         return obj
 
+    @classmethod
+    def created_instance(cls):
+        """
+        Returns the resource manager if it was already created, None otherwise. Unlike the constructor, this does not
+        load any VISA library.
+        """
+        return ReusingResourceManager._inst_ref
+
     @property
     def lrm_opened_resources(self):
         """
         Thread-safe-ly Returns a dict of all opened resources through this ReusingResourceManager.
         The dict keys are the visa addresses, the dict values the resource objects.
+        Idle resources kept open in the pool have a reference count of 0.
         """
         with self._lrm_tlock:
             return self._lrm_opened_resources.copy()
@@ -56,33 +88,59 @@ class ReusingResourceManager(visa.ResourceManager):
     def open_resource(self, resource_name, *args, **kwargs):
         """
         Before actually opening the resource, check if we already have it available and reuse it if necessary.
+
+        Different resources can be opened from several threads at the same time, only opening the same resource is
+        serialized.
         """
         with self._lrm_tlock:
-            if resource_name in self._lrm_opened_resources:
-                # resource is already open, increase counter and return obj
-                log = self._lrm_opened_resources[resource_name]
-                log.counter += 1
-                self._lrm_logger.debug("Found resource with name {:s} already open. New reference count: {:d}.".format(
-                    resource_name, log.counter
-                ))
-                return log.resource_obj
-            else:
-                # no resource with this name open yet, create new one, store in log, and return obj
-                resource_obj = super().open_resource(resource_name, *args, **kwargs)
+            name_lock = self._lrm_name_locks.setdefault(resource_name, threading.Lock())
 
-                # pyvisa parses the resource name, save the input manually to the object for later use
-                resource_obj.lrm_user_resource_name = resource_name
+        with name_lock:
+            with self._lrm_tlock:
+                log = self._lrm_opened_resources.get(resource_name)
+                if log is not None and not log.idle:
+                    # resource is already open, increase counter and return obj
+                    log.counter += 1
+                    self._lrm_logger.debug(
+                        "Found resource with name {:s} already open. New reference count: {:d}.".format(
+                            resource_name, log.counter
+                        ))
+                    return log.resource_obj
+                if log is not None:
+                    # take the resource out of the pool, such that it is not closed while we check it
+                    log.counter = 1
+                    log.idle_since = None
 
-                # assign a thread lock to each resource, so we can assert thread save instrument access
-                # within LabExT
-                resource_obj.lrm_rlock = threading.Lock()
+            if log is not None:
+                if self._lrm_is_healthy(log.resource_obj):
+                    self._lrm_logger.debug("Reusing pooled resource with name {:s}.".format(resource_name))
+                    return log.resource_obj
+                self._lrm_logger.info("Pooled resource with name {:s} does not respond anymore. Reopening.".format(
+                    resource_name))
+                with self._lrm_tlock:
+                    if self._lrm_opened_resources.get(resource_name) is log:
+                        self._lrm_close(resource_name, log)
 
-                log = OpenedResource(resource_obj)
-                self._lrm_logger.debug("Created new resource with name {:s} and reference count: {:d}.".format(
-                    resource_name, log.counter
-                ))
+            # no resource with this name open yet, create new one, store in log, and return obj
+            resource_obj = super().open_resource(resource_name, *args, **kwargs)
+
+            # pyvisa parses the resource name, save the input manually to the object for later use
+            resource_obj.lrm_user_resource_name = resource_name
+
+            # assign a thread lock to each resource, so we can assert thread save instrument access
+            # within LabExT
+            resource_obj.lrm_rlock = threading.Lock()
+
+            # drivers record here which of their one-time setups ran on this session, see Instrument.open()
+            resource_obj.lrm_first_open_done = set()
+
+            log = OpenedResource(resource_obj)
+            self._lrm_logger.debug("Created new resource with name {:s} and reference count: {:d}.".format(
+                resource_name, log.counter
+            ))
+            with self._lrm_tlock:
                 self._lrm_opened_resources[resource_name] = log
-                return resource_obj
+            return resource_obj
 
     def close_resource(self, resource_obj):
         """
@@ -105,14 +163,22 @@ class ReusingResourceManager(visa.ResourceManager):
             log = self._lrm_opened_resources[resource_name]
             log.counter -= 1
 
-            if log.counter == 0:
+            if log.counter == 0 and self.lrm_idle_timeout > 0:
+                # references to this instrument reached 0, keep it open for the next user
+                self._lrm_logger.debug(
+                    "Resource with name {:s} reached 0 references. Keeping it open for {:.1f}s.".format(
+                        resource_name, self.lrm_idle_timeout
+                    ))
+                log.idle_since = time.monotonic()
+                timer = threading.Timer(self.lrm_idle_timeout, self.close_idle_resources, kwargs={'expired_only': True})
+                timer.daemon = True
+                timer.start()
+            elif log.counter <= 0:
                 # references to this instrument reached 0, close and delete log
                 self._lrm_logger.debug("Resource with name {:s} reached 0 references. Closing resource.".format(
                     resource_name
                 ))
-                resource_obj.close()
-                log.resource_obj = None
-                del self._lrm_opened_resources[resource_name]
+                self._lrm_close(resource_name, log)
             else:
                 self._lrm_logger.debug("Not closing resource {:s} as there are {:d} references left.".format(
                     resource_name, log.counter
@@ -138,6 +204,43 @@ class ReusingResourceManager(visa.ResourceManager):
                 log.resource_obj = None
                 del self._lrm_opened_resources[resource_name]
 
+    def close_idle_resources(self, expired_only=False):
+        """
+        Closes the resources kept open in the pool, e.g. before exiting the application.
+
+        :param expired_only: only close the resources which are idle for longer than lrm_idle_timeout
+        """
+        with self._lrm_tlock:
+            now = time.monotonic()
+            for resource_name, log in list(self._lrm_opened_resources.items()):
+                if not log.idle:
+                    continue
+                if expired_only and now - log.idle_since < 0.99 * self.lrm_idle_timeout:
+                    continue  # was reused and released again in the meantime, its own timer closes it
+                self._lrm_logger.debug("Closing idle resource with name {:s}.".format(resource_name))
+                try:
+                    self._lrm_close(resource_name, log)
+                except Exception as e:
+                    self._lrm_logger.warning("Could not close idle resource {:s}: {:s}".format(resource_name, repr(e)))
+
+    def _lrm_close(self, resource_name, log):
+        # must be called with the lock held
+        del self._lrm_opened_resources[resource_name]
+        resource_obj, log.resource_obj = log.resource_obj, None
+        log.counter = 0
+        resource_obj.close()
+
+    def _lrm_is_healthy(self, resource_obj):
+        if self.lrm_health_check_query is None:
+            return True
+        try:
+            resource_obj.query(self.lrm_health_check_query)
+            return True
+        except Exception as e:
+            self._lrm_logger.debug("Health check of {:s} failed: {:s}".format(
+                resource_obj.lrm_user_resource_name, repr(e)))
+            return False
+
     def discard_resource_buffers(self, resource_obj):
         """
         Use this function to discard all data in all buffers for this VISA resource. This can be useful, e.g. after
@@ -10,8 +10,8 @@ from time import sleep
 import numpy as np
 
 from LabExT.Measurements.MeasAPI import *
-from LabExT.View.Controls.PlotControl import PlotData
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
+from LabExT.ViewModel.Utilities.PlotData import PlotData
 
 
 class DummyMeas(Measurement):
@@ -96,9 +96,9 @@ class DummyMeas(Measurement):
         else:
             sleep(tot_time)
 
-        # convert numpy float32/float64 to python float
-        data['values']['point indices'] = [x.item() for x in xvec]
-        data['values']['point values'] = [y.item() for y in yvec]
+        # values are stored as numpy arrays, they get converted to lists only when written to JSON
+        data['values']['point indices'] = xvec
+        data['values']['point values'] = yvec
 
         # sanity check if data contains all necessary keys
         self._check_data(data)
@@ -91,55 +91,58 @@ class InsertionLossSweep(Measurement):
         self.instr_pm = instruments['Power Meter']
         self.instr_laser = instruments['Laser']
 
-        # open connection to Laser & PM
-        self.instr_laser.open()
-        self.instr_pm.open()
-
-        # clear errors
-        self.instr_laser.clear()
-        self.instr_pm.clear()
-
-        # Ask minimal possible wavelength
-        min_lambda = float(self.instr_laser.min_lambda)
-
-        # Ask maximal possible wavelength
-        max_lambda = float(self.instr_laser.max_lambda)
-
-        # change the minimal & maximal wavelengths if necessary
-        if start_lambda < min_lambda or start_lambda > max_lambda:
-            start_lambda = min_lambda
-            parameters['wavelength start'].value = start_lambda
-            self.logger.warning('start_lambda has been changed to smallest possible value ' + str(min_lambda))
-
-        if end_lambda > max_lambda or end_lambda < min_lambda:
-            end_lambda = max_lambda
-            parameters['wavelength stop'].value = end_lambda
-            self.logger.warning('end_lambda has been changed to greatest possible value ' + str(max_lambda))
-
-        # write the measurement parameters into the measurement settings
-        for pname, pparam in parameters.items():
-            data['measurement settings'][pname] = pparam.as_dict()
-
-        # Laser settings
-        self.instr_laser.unit = 'dBm'
-        self.instr_laser.power = laser_power
-        self.instr_laser.wavelength = center_wavelength
-        self.instr_laser.sweep_wl_setup(start_lambda, end_lambda, lambda_step, sweep_speed)
-        number_of_points = self.instr_laser.sweep_wl_get_n_points()
-
-        # PM settings
-        self.instr_pm.wavelength = center_wavelength
-        self.instr_pm.range = pm_range
-        self.instr_pm.unit = 'dBm'
-        max_avg_time = abs(start_lambda - end_lambda) / (sweep_speed * number_of_points)
-        self.instr_pm.averagetime = max_avg_time / 2
-        # note: this check makes sense here, since the instrument might quietly set avg. time to something larger
-        # than desired
-        if self.instr_pm.averagetime > max_avg_time:
-            raise RuntimeError("Power meter minimum average time is longer than one WL step time!")
-        self.instr_pm.logging_setup(n_measurement_points=number_of_points,
-                                    triggered=True,
-                                    trigger_each_meas_separately=True)
+        # open connections and configure the instruments, timed as instrument setup
+        with self.timed_phase('instrument setup'):
+            # open connection to Laser & PM
+            self.open_instruments(self.instr_laser, self.instr_pm)
+
+            # clear errors
+            self.instr_laser.clear()
+            self.instr_pm.clear()
+
+            # Ask minimal possible wavelength
+            min_lambda = float(self.instr_laser.min_lambda)
+
+            # Ask maximal possible wavelength
+            max_lambda = float(self.instr_laser.max_lambda)
+
+            # change the minimal & maximal wavelengths if necessary
+            if start_lambda < min_lambda or start_lambda > max_lambda:
+                start_lambda = min_lambda
+                parameters['wavelength start'].value = start_lambda
+                self.logger.warning('start_lambda has been changed to smallest possible value ' + str(min_lambda))
+
+            if end_lambda > max_lambda or end_lambda < min_lambda:
+                end_lambda = max_lambda
+                parameters['wavelength stop'].value = end_lambda
+                self.logger.warning('end_lambda has been changed to greatest possible value ' + str(max_lambda))
+
+            # write the measurement parameters into the measurement settings
+            for pname, pparam in parameters.items():
+                data['measurement settings'][pname] = pparam.as_dict()
+
+            # Laser settings, sent in as few transactions as possible
+            with self.instr_laser.batch():
+                self.instr_laser.unit = 'dBm'
+                self.instr_laser.power = laser_power
+                self.instr_laser.wavelength = center_wavelength
+                self.instr_laser.sweep_wl_setup(start_lambda, end_lambda, lambda_step, sweep_speed)
+                number_of_points = self.instr_laser.sweep_wl_get_n_points()
+
+            # PM settings
+            with self.instr_pm.batch():
+                self.instr_pm.wavelength = center_wavelength
+                self.instr_pm.range = pm_range
+                self.instr_pm.unit = 'dBm'
+                max_avg_time = abs(start_lambda - end_lambda) / (sweep_speed * number_of_points)
+                self.instr_pm.averagetime = max_avg_time / 2
+                # note: this check makes sense here, since the instrument might quietly set avg. time to something
+                # larger than desired
+                if self.instr_pm.averagetime > max_avg_time:
+                    raise RuntimeError("Power meter minimum average time is longer than one WL step time!")
+                self.instr_pm.logging_setup(n_measurement_points=number_of_points,
+                                            triggered=True,
+                                            trigger_each_meas_separately=True)
 
         # inform user
         self.logger.info(f"Sweeping over {number_of_points:d} samples "
@@ -173,9 +176,9 @@ class InsertionLossSweep(Measurement):
         # Reset PM for manual Measurements
         self.instr_pm.range = 'auto'
 
-        # convert numpy float32/float64 to python float
-        data['values']['transmission [dBm]'] = power_data.tolist()
-        data['values']['wavelength [nm]'] = lambda_data.tolist()
+        # values are stored as numpy arrays, they get converted to lists only when written to JSON
+        data['values']['transmission [dBm]'] = power_data
+        data['values']['wavelength [nm]'] = lambda_data
 
         # close connection
         self.instr_laser.close()
@@ -7,6 +7,9 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 import logging
 
+from LabExT.Experiments.PhaseTimer import timed_phase
+from LabExT.Instruments.InstrumentAPI.InstrumentSetup import InstrumentSetupError, open_instruments
+
 
 class Measurement:
     """Super class for measurement algorithms for LabExT.
@@ -77,6 +80,8 @@ class Measurement:
         self.wanted_instruments = []
         # logger object, use this to log to console and log file
         self.logger = logging.getLogger()
+        # set by the experiment during execution, times the phases of the measurement, see timed_phase()
+        self.phase_timer = None
 
     @property
     def parameters(self):
@@ -114,17 +119,53 @@ class Measurement:
 
         This method gets called from the LabExT GUI and does not need to be invoked by the user.
 
+        Instruments on different VISA addresses are initialized concurrently.
+
         Raises:
+            InstrumentSetupError: In case any instrument could not be initialized, with the reasons for all of them.
             RuntimeError: In case any instrument could not be initilized. Sometimes initialization fails silently...
         """
-        for instr_class in self.get_wanted_instrument():
-            self._experiment_manager.instrument_api.create_instrument_obj(instr_class,
-                                                                          self.selected_instruments,
-                                                                          self.instruments)
+        errors = self._experiment_manager.instrument_api.create_instrument_objs(self.get_wanted_instrument(),
+                                                                                self.selected_instruments,
+                                                                                self.instruments)
+        if errors:
+            raise InstrumentSetupError(errors)
         # check that all instruments were correctly initialized, if this is not the case, we raise an Exception
         if not all(inst is not None for inst in self.instruments.values()):
             raise RuntimeError('Instruments were not initialized correctly.')
 
+    def timed_phase(self, name):
+        """Returns a context manager which times the enclosed code as phase `name` of the current measurement record.
+
+        Use this within self.algorithm() to mark the instrument setup, i.e. opening the connections and sending the
+        settings: `with self.timed_phase('instrument setup'): ...`. The timings are saved in the 'timing' entry of the
+        measurement record, the time spent in these phases is not counted as 'algorithm'. Does nothing when the
+        measurement is executed outside of an experiment.
+
+        Arguments:
+            name (str): The name of the phase.
+        """
+        return timed_phase(getattr(self, 'phase_timer', None), name)
+
+    def open_instruments(self, *instruments, timeout=None):
+        """Opens the connections to the given instruments concurrently.
+
+        Use this within self.algorithm() instead of opening the instruments one after the other. Instruments sharing a
+        VISA address (e.g. the channels of a mainframe) are still opened one after the other. If any instrument cannot
+        be opened, the others are closed again.
+
+        Arguments:
+            *instruments (Instrument): The instruments to open.
+            timeout (float): Seconds to wait for each instrument, defaults to INSTRUMENT_SETUP_TIMEOUT.
+
+        Raises:
+            InstrumentSetupError: In case any instrument could not be opened, with the reasons for all of them.
+        """
+        if timeout is None:
+            open_instruments(instruments)
+        else:
+            open_instruments(instruments, timeout=timeout)
+
     def get_instrument(self, instrument_type):
         """Returns the pointer to the initialized instrument for the given instrument type.
 
@@ -152,16 +193,20 @@ class Measurement:
         else:
             raise ValueError("No instrument with type " + str(instrument_type) + " in dict of initialized instruments.")
 
-    def _get_data_from_all_instruments(self):
+    def _get_data_from_all_instruments(self, use_cache=False):
         """Gets the settings of all instruments used in the measurement.
 
         Called from a standard experiment routine from LabExT to save all involved instrument's meta data and settings.
+
+        Arguments:
+            use_cache (bool): fast metadata mode, unchanged settings are taken from each instrument's metadata cache,
+                see `Instrument.get_instrument_parameter()`.
         """
         inst_data = {}
 
         for cat, i in self.instruments.items():
             self.logger.debug("getting params from: " + str(cat) + " actual class: " + str(i.__class__.__name__))
-            inst_data[cat[0]] = i.get_instrument_parameter()
+            inst_data[cat[0]] = i.get_instrument_parameter(use_cache=use_cache)
 
         return inst_data
 
@@ -73,13 +73,14 @@ class ReadOSA(Measurement):
 
         self.instr_osa = instruments['OSA']
 
-        self.instr_osa.open()
-
-        # set instrument parameters
-        self.instr_osa.span = osa_span_nm
-        self.instr_osa.centerwavelength = osa_center_wl_nm
-        self.instr_osa.sweepresolution = sweep_resolution_nm
-        self.instr_osa.n_points = no_points
+        with self.timed_phase('instrument setup'):
+            self.instr_osa.open()
+
+            # set instrument parameters
+            self.instr_osa.span = osa_span_nm
+            self.instr_osa.centerwavelength = osa_center_wl_nm
+            self.instr_osa.sweepresolution = sweep_resolution_nm
+            self.instr_osa.n_points = no_points
 
         # everything is set up, run the sweep
         self.logger.info('OSA running sweep')
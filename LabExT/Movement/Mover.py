@@ -15,6 +15,7 @@ from tkinter import Toplevel, messagebox
 
 import numpy as np
 
+from LabExT.Experiments.PhaseTimer import timed_phase
 from LabExT.Movement.Stages.Stage3DSmarAct import Stage3DSmarAct
 from LabExT.Movement.StageTrajectory import StageTrajectory
 from LabExT.Utils import run_with_wait_window, get_configuration_file_path
@@ -65,6 +66,9 @@ class Mover:
 
         self.dimension_names = []
 
+        # set by the experiment during a run to time the z-lift, see PhaseTimer
+        self.phase_timer = None
+
         self.savefilename_settings = get_configuration_file_path('stage_settings.pkl')
         self.savefilename_transformation = get_configuration_file_path('coordinate_transformer.pkl')
 
@@ -332,22 +336,24 @@ class Mover:
         Lifts the stages up by the amount defined in set_z_lift.
         """
         self._check_stage_status()
-        if self.num_stages == 1:
-            self.left_stage.lift_stage()
-        else:
-            self.left_stage.lift_stage()
-            self.right_stage.lift_stage()
+        with timed_phase(self.phase_timer, 'z-lift'):
+            if self.num_stages == 1:
+                self.left_stage.lift_stage()
+            else:
+                self.left_stage.lift_stage()
+                self.right_stage.lift_stage()
 
     def lower_stages(self):
         """
         Deactivates the z movement before the stage moves to the target position
         """
         self._check_stage_status()
-        if self.num_stages == 1:
-            self.left_stage.lower_stage()
-        else:
-            self.left_stage.lower_stage()
-            self.right_stage.lower_stage()
+        with timed_phase(self.phase_timer, 'z-lift'):
+            if self.num_stages == 1:
+                self.left_stage.lower_stage()
+            else:
+                self.left_stage.lower_stage()
+                self.right_stage.lower_stage()
 
     #
     # lateral x-y movement
@@ -375,11 +381,7 @@ class Mover:
         self._check_stage_status()
 
         # get transformed in- and outputs
-        in_ = self._transformer_left.chip_to_stage_coord(device._in_position)
-        if self.num_stages == 2:
-            out_ = self._transformer_right.chip_to_stage_coord(device._out_position)
-        else:
-            out_ = None
+        in_, out_ = self.device_stage_positions(device)
 
         self.logger.debug('Positions after transformation: input:%s output:%s', in_, out_)
 
@@ -392,6 +394,35 @@ class Mover:
         # save to log
         self.logger.debug('Moved to device successfully.')
 
+    def device_stage_positions(self, device):
+        """Returns the stage coordinates of a device's input and output.
+
+        Parameters
+        ----------
+        device : Device
+            Device whose position is transformed.
+
+        Returns
+        -------
+        tuple
+            (input position, output position) in stage coordinates. The output position is None if only one stage is
+            active.
+
+        Raises
+        ------
+        RuntimeError
+            If no 2D transformation has been done beforehand.
+        """
+        if not self.trafo_enabled:
+            raise RuntimeError('No 2D Transformation done.')
+
+        in_ = self._transformer_left.chip_to_stage_coord(device._in_position)
+        if self.num_stages == 2:
+            out_ = self._transformer_right.chip_to_stage_coord(device._out_position)
+        else:
+            out_ = None
+        return in_, out_
+
     def move_relative(self, *args, lift_z_dir=False):
         """Perform a relative movement of the stages.
 
@@ -429,10 +460,7 @@ class Mover:
                 if lift_z_dir:
                     self.lift_stages()
                     stages_up = True
-                t0 = time.time()
                 self.left_stage.move_relative(float(args[0]), float(args[1]))
-                t1 = time.time()
-                print(t1 - t0)
         else:
             if float(args[0])<=0:
                 # move left stage
@@ -16,8 +16,8 @@ from scipy.optimize import curve_fit
 from LabExT.Measurements.MeasAPI import *
 from LabExT.Movement.MotorProfiles import trapezoidal_velocity_profile_by_integration
 from LabExT.Utils import get_configuration_file_path
-from LabExT.View.Controls.PlotControl import PlotData
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
+from LabExT.ViewModel.Utilities.PlotData import PlotData
 
 
 class PeakSearcher(Measurement):
@@ -234,8 +234,7 @@ class PeakSearcher(Measurement):
         self.plots_right.clear()
 
         # open connection to instruments
-        self.instr_laser.open()
-        self.instr_powermeter.open()
+        self.open_instruments(self.instr_laser, self.instr_powermeter)
 
         self.logger.debug('Executing Search for Peak with the following parameters: {:s}'.format(
             "\n".join([str(name) + " = " + str(param.value) + " " + str(param.unit) for name, param in
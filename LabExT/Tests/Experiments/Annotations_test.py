@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.Annotations import USER_COMMENT_KEY, USER_FLAGS_KEY, annotations_path, read_annotations, \
+    write_annotations, migrate_annotations
+from LabExT.Experiments.ResultCatalog import ResultCatalog
+from LabExT.Experiments.ResultFile import load_result_file, load_lazy_result_file, write_json_record
+from LabExT.Tests.Experiments.ResultFile_test import make_record
+
+
+class AnnotationsTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, 'meas.json')
+        self.record = make_record()
+        del self.record['file_path_known']
+        # annotations saved in the result file, as older versions did
+        self.record[USER_COMMENT_KEY] = 'old comment'
+        self.record[USER_FLAGS_KEY] = ['Valid #']
+        write_json_record(self.record, self.file_path)
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_sidecar_takes_precedence_on_load(self):
+        write_annotations(self.file_path, {USER_COMMENT_KEY: 'new comment', USER_FLAGS_KEY: [], 'values': [1]})
+        result_mtime = os.path.getmtime(self.file_path)
+
+        self.assertEqual(read_annotations(self.file_path), {USER_COMMENT_KEY: 'new comment', USER_FLAGS_KEY: []})
+        for loaded in (load_result_file(self.file_path), load_lazy_result_file(self.file_path)):
+            self.assertEqual(loaded[USER_COMMENT_KEY], 'new comment')
+            self.assertEqual(loaded[USER_FLAGS_KEY], [])
+        # the result file itself is not touched
+        self.assertEqual(os.path.getmtime(self.file_path), result_mtime)
+
+    def test_without_sidecar_annotations_of_file_are_used(self):
+        self.assertIsNone(read_annotations(self.file_path))
+        self.assertEqual(load_result_file(self.file_path)[USER_COMMENT_KEY], 'old comment')
+
+    def test_migration_writes_sidecar_once(self):
+        self.assertTrue(migrate_annotations(load_result_file(self.file_path), self.file_path))
+        self.assertEqual(read_annotations(self.file_path)[USER_FLAGS_KEY], ['Valid #'])
+        self.assertFalse(migrate_annotations(load_result_file(self.file_path), self.file_path))
+
+    def test_catalog_rescan_migrates_and_detects_sidecar_changes(self):
+        catalog = ResultCatalog(self.tmp_dir.name)
+        self.assertEqual(catalog.rescan(), (1, 0))
+        self.assertTrue(os.path.isfile(annotations_path(self.file_path)))
+        self.assertEqual(catalog.rescan(), (0, 0))
+
+        write_annotations(self.file_path, {USER_COMMENT_KEY: 'recalibrated', USER_FLAGS_KEY: []})
+        os.utime(annotations_path(self.file_path), (1e10, 1e10))
+        self.assertEqual(catalog.rescan(), (1, 0))
+        self.assertEqual(catalog.file_paths(comment='recalibrated'), [self.file_path])
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.AutosaveDict import AutosaveDict, JournaledAutosaveDict, load_autosave_file
+from LabExT.Experiments.Compression import GZIP, detect_codec
+from LabExT.Experiments.PersistenceService import PersistenceService
+from LabExT.Experiments.ResultFile import result_file_writer
+
+
+class JournaledAutosaveDictTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.journal_path = os.path.join(self.tmp_dir.name, "meas.json.part")
+        self.final_path = os.path.join(self.tmp_dir.name, "meas.json")
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def test_reads_do_not_trigger_saves(self):
+        data = JournaledAutosaveDict(freq=2, file_path=self.journal_path)
+        header_bytes = data.written_bytes  # written on construction
+        data['a'] = 1
+        for _ in range(10):
+            _ = data['a']
+        self.assertEqual(data.written_bytes, header_bytes)
+
+    def test_replay_recovers_in_place_modifications_and_deletions(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        data['values'] = OrderedDict()
+        data['temporary'] = 'to be deleted'
+        data['values']['x'] = [1, 2, 3]
+        del data['temporary']
+        data['finished'] = False
+
+        recovered = load_autosave_file(self.journal_path)
+
+        self.assertDictEqual(recovered, {'values': {'x': [1, 2, 3]}, 'finished': False})
+
+    def test_replay_ignores_truncated_last_line(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        data['a'] = 1
+        data['b'] = 2
+        with open(self.journal_path, "a") as f:
+            f.write('{"k": "c", "v": [1, 2')
+
+        self.assertDictEqual(load_autosave_file(self.journal_path), {'a': 1, 'b': 2})
+
+    def test_finalize_materializes_plain_json_and_removes_journal(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        data['name'] = 'test'
+        data['values'] = {'y': [0.5, 1.5]}
+        data.finalize(self.final_path)
+
+        self.assertFalse(os.path.exists(self.journal_path))
+        with open(self.final_path) as f:
+            self.assertEqual(f.read(), json.dumps(data, indent=4))
+        self.assertDictEqual(load_autosave_file(self.final_path), data)
+
+    def test_written_bytes_grow_linearly(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        for i in range(500):
+            data['trace {:d}'.format(i)] = [float(i)] * 20
+        data.finalize(self.final_path)
+
+        final_size = os.path.getsize(self.final_path)
+        # journal incl. compactions and the final materialization stay within a constant factor
+        self.assertLess(data.written_bytes, 10 * final_size)
+
+    def test_appending_values_is_journaled_incrementally(self):
+        data = JournaledAutosaveDict(freq=10, file_path=self.journal_path)
+        data['values'] = OrderedDict([('x', []), ('y', [])])
+        for i in range(2000):
+            data['values']['x'].append(float(i))
+            data['values']['y'].append(-float(i))
+
+        # in-place appends count towards the save frequency and only the appended values are written
+        recovered = load_autosave_file(self.journal_path)
+        self.assertGreaterEqual(len(recovered['values']['x']), 1990)
+        self.assertEqual(recovered['values']['x'], [float(i) for i in range(len(recovered['values']['x']))])
+
+        data.finalize(self.final_path)
+        final_size = os.path.getsize(self.final_path)
+        self.assertLess(data.written_bytes, 10 * final_size)
+
+    def test_in_place_changes_are_saved_with_other_keys(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        data['values'] = {'x': []}
+        data['values']['x'].append(1)
+        data['finished'] = True
+
+        self.assertDictEqual(load_autosave_file(self.journal_path), {'values': {'x': [1]}, 'finished': True})
+
+    def test_replay_of_nested_changes(self):
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path)
+        data['values'] = {'x': [1, 2], 'y': [3]}
+        data['values']['x'].append(4)
+        data['values']['y'] = [5]
+        del data['values']['x']
+        data['values']['z'] = {'a': 1}
+        data['values']
+
+        self.assertDictEqual(load_autosave_file(self.journal_path), {'values': {'y': [5], 'z': {'a': 1}}})
+
+    def test_background_persistence_writes_snapshots(self):
+        service = PersistenceService()
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path, persistence=service)
+        data['values'] = {'x': [1, 2]}
+        data['finished'] = False
+        # modifications after the save must not end up in the journal written in the background
+        data['values']['x'].append(3)
+        service.flush(data)
+
+        self.assertDictEqual(load_autosave_file(self.journal_path), {'values': {'x': [1, 2]}, 'finished': False})
+
+        data.finalize(self.final_path)
+        self.assertDictEqual(load_autosave_file(self.final_path), {'values': {'x': [1, 2, 3]}, 'finished': False})
+
+    def test_failed_journal_writes_do_not_fail_finalize(self):
+        service = PersistenceService()
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path, persistence=service)
+        data['values'] = {'x': [1]}
+        service.flush(data)
+
+        # the journal cannot be appended to for a while, e.g. a network share was briefly unavailable
+        real_path = data.file_path
+        data.file_path = os.path.join(self.tmp_dir.name, "missing", "meas.json.part")
+        data['values']['x'].append(2)
+        service.flush()
+        data.file_path = real_path
+        data['values']['x'].append(3)
+        data['finished'] = True
+        service.flush(data)
+        self.assertDictEqual(load_autosave_file(self.journal_path), {'values': {'x': [1, 2, 3]}, 'finished': True})
+
+        data.finalize(self.final_path)
+        self.assertDictEqual(load_autosave_file(self.final_path), {'values': {'x': [1, 2, 3]}, 'finished': True})
+
+    def test_compressed_finalize_on_persistence_thread(self):
+        service = PersistenceService()
+        final_path = self.final_path + ".gz"
+        data = JournaledAutosaveDict(freq=1, file_path=self.journal_path, persistence=service)
+        data['values'] = {'x': list(range(1000))}
+        service.flush(data)
+
+        # the journal stays plain text
+        with open(self.journal_path) as f:
+            self.assertEqual(json.loads(f.readline()), JournaledAutosaveDict.journal_header)
+
+        data.finalize(final_path, writer=result_file_writer(final_path, compression_level=9))
+        self.assertEqual(detect_codec(final_path), GZIP)
+        self.assertEqual(load_autosave_file(final_path)['values']['x'][-1], 999)
+
+
+class AutosaveDictTest(TestCase):
+
+    def test_save_compressed(self):
+        with TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "live.json")
+            data = AutosaveDict(file_path=file_path, auto_save=False, compression=GZIP)
+            data['values'] = {'y': [0.5] * 100}
+            data.save()
+
+            self.assertEqual(detect_codec(file_path), GZIP)
+            self.assertDictEqual(load_autosave_file(file_path), data)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Experiments.MeasurementStore import MeasurementStore
+from LabExT.Experiments.ResultFile import LazyValues, result_file_writer
+from LabExT.Experiments.StandardExperiment import StandardExperiment
+from LabExT.Tests.Experiments.ResultFile_test import make_record
+
+
+def make_experiment():
+    exp = Mock()
+    exp.measurements = MeasurementStore()
+    exp._validate_measurement_dataset = \
+        lambda meas_dict, file_path: StandardExperiment._validate_measurement_dataset(exp, meas_dict, file_path)
+    return exp
+
+
+class BulkImportTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.file_paths = []
+        for i in range(6):
+            record = make_record(n_points=10)
+            record['device']['id'] = i
+            del record['file_path_known']
+            file_path = os.path.join(self.tmp_dir.name, 'meas_{:d}{:s}'.format(i, '.h5' if i % 2 else '.json'))
+            result_file_writer(file_path)(record, file_path)
+            self.file_paths.append(file_path)
+
+        self.broken_path = os.path.join(self.tmp_dir.name, 'broken.json')
+        with open(self.broken_path, 'w') as f:
+            f.write('{"chip": ')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _check_import(self, importer):
+        progress = []
+        records, errors = importer.run(progress_callback=lambda done, total: progress.append((done, total)))
+
+        self.assertEqual([fp for _, fp in records], self.file_paths)
+        self.assertEqual([fp for fp, _ in errors], [self.broken_path])
+        self.assertEqual(progress[-1], (7, 7))
+        for record, file_path in records:
+            self.assertIsInstance(record['values'], LazyValues)
+            self.assertEqual(record['values'].file_path, file_path)
+            self.assertEqual(len(record['values']['power/W']), 10)
+
+    def test_import_in_worker_processes(self):
+        self._check_import(BulkImporter(self.file_paths + [self.broken_path],
+                                        max_workers=2, chunk_size=2, min_files_for_pool=1))
+
+    def test_import_in_calling_process(self):
+        self._check_import(BulkImporter(self.file_paths + [self.broken_path], min_files_for_pool=100))
+
+    def test_cancelled_import_reads_nothing_more(self):
+        importer = BulkImporter(self.file_paths, chunk_size=2, min_files_for_pool=100)
+        records, errors = importer.run(progress_callback=lambda done, total: importer.cancel())
+        self.assertEqual(len(records), 2)
+        self.assertEqual(errors, [])
+
+    def test_batch_is_validated_and_added_once(self):
+        exp = make_experiment()
+        records, _ = BulkImporter(self.file_paths, min_files_for_pool=100).run()
+        duplicate, _ = BulkImporter(self.file_paths[:1], min_files_for_pool=100).run()[0][0]
+        invalid = make_record()
+        del invalid['device']
+
+        added, errors = StandardExperiment.load_measurement_datasets(
+            exp, records + [(duplicate, 'duplicate.json'), (invalid, 'invalid.json')])
+
+        self.assertEqual(added, self.file_paths)
+        self.assertEqual([fp for fp, _ in errors], ['duplicate.json', 'invalid.json'])
+        self.assertEqual(len(exp.measurements), len(self.file_paths))
+        self.assertEqual(exp.measurements[0]['file_path_known'], self.file_paths[0])
+        exp.update.assert_called_once_with()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import shutil
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.BulkImport import BulkImporter
+from LabExT.Experiments.ContentStore import ContentStore, CAS_DIRECTORY_NAME, REFERENCE_KEY, resolve_references
+from LabExT.Experiments.ResultCatalog import ResultCatalog
+from LabExT.Experiments.ResultFile import result_file_writer, load_result_file, load_lazy_result_file
+from LabExT.Tests.Experiments.ResultFile_test import make_record
+
+
+class ContentStoreTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+        # a fresh instance, the shared ones would keep the caches across tests
+        self.store = ContentStore(os.path.join(self.directory, CAS_DIRECTORY_NAME))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write(self, file_name, device_id):
+        record = make_record(n_points=5)
+        del record['file_path_known']
+        record['device']['id'] = device_id
+        record['instruments'] = {'Laser': {'idn': 'Keysight N7714A', 'power': {'value': 1.0, 'unit': 'dBm'}}}
+        record['software'] = {'name': 'LabExT', 'version': '2.2.0'}
+        file_path = os.path.join(self.directory, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        result_file_writer(file_path, content_store=self.store)(record, file_path)
+        return file_path, record
+
+    def test_put_and_get(self):
+        digest = self.store.put({'b': 1, 'a': [1, 2]})
+        self.assertEqual(self.store.put({'b': 1, 'a': [1, 2]}), digest)
+        self.assertNotEqual(self.store.put({'a': [1, 2], 'b': 1}), digest)
+        self.assertEqual(ContentStore(self.store.directory).get(digest), {'b': 1, 'a': [1, 2]})
+        with self.assertRaises(KeyError):
+            self.store.get('0' * 64)
+
+    def test_repeated_metadata_is_stored_once(self):
+        a_path, a_record = self._write('a.json', device_id=1)
+        self._write('sub/b.h5', device_id=2)
+
+        with open(a_path) as f:
+            on_disk = json.load(f)
+        for key in ('software', 'chip', 'instruments'):
+            self.assertEqual(list(on_disk[key].keys()), [REFERENCE_KEY])
+        self.assertEqual(on_disk['device']['id'], 1)
+        blobs = [f for _, _, file_names in os.walk(self.store.directory) for f in file_names]
+        self.assertEqual(len(blobs), 3)
+
+        for loaded in (load_result_file(a_path), load_lazy_result_file(a_path)):
+            self.assertEqual(loaded['instruments'], a_record['instruments'])
+            self.assertEqual(loaded['chip'], a_record['chip'])
+        self.assertEqual(load_result_file(os.path.join(self.directory, 'sub', 'b.h5'))['software']['version'], '2.2.0')
+
+    def test_bulk_import_and_catalog_resolve_references(self):
+        for device_id in range(4):
+            self._write('m{:d}.json'.format(device_id), device_id=device_id)
+
+        records, errors = BulkImporter(sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory)
+                                              if f.endswith('.json'))).run()
+        self.assertEqual(errors, [])
+        self.assertEqual([r['device']['id'] for r, _ in records], [0, 1, 2, 3])
+        # the records share the referenced documents
+        self.assertIs(records[0][0]['instruments'], records[3][0]['instruments'])
+
+        catalog = ResultCatalog(self.directory)
+        self.assertEqual(catalog.rescan(), (4, 0))  # the blobs of the store are not indexed
+        self.assertEqual(catalog.distinct('chip_name'), ['TestChip'])
+
+    def test_missing_store_is_an_error(self):
+        a_path, _ = self._write('a.json', device_id=1)
+        moved_path = os.path.join(self.directory, 'moved', 'a.json')
+        os.makedirs(os.path.dirname(moved_path))
+        shutil.move(a_path, moved_path)
+        shutil.rmtree(self.store.directory)
+
+        with open(moved_path) as f:
+            with self.assertRaises(KeyError):
+                resolve_references(json.load(f), moved_path)
+        records, errors = BulkImporter([moved_path]).run()
+        self.assertEqual((records, len(errors)), ([], 1))
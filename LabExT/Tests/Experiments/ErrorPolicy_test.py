@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from LabExT.Experiments.ErrorPolicy import ErrorPolicy, ErrorPolicies, FailureSummary, \
+    PAUSE, RETRY, SKIP, PAUSED, RETRIED, REQUEUED, SKIPPED
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Wafer.Device import Device
+
+
+class InsertionLossSweep:
+    pass
+
+
+class ReadOSA:
+    pass
+
+
+def make_todo(measurement=None):
+    return ToDo(Device(1, [0, 0], [0, 0], 'WG'), measurement if measurement is not None else Mock())
+
+
+def fail(policy, todo):
+    """ Simulates the bookkeeping of the experiment for one failed execution. """
+    todo.failed_attempts += 1
+    outcome = policy.decide(todo)
+    if outcome == REQUEUED:
+        todo.requeued = True
+        todo.failed_attempts = 0
+    return outcome
+
+
+class ErrorPolicyTest(TestCase):
+
+    def test_pause_keeps_pausing(self):
+        policy = ErrorPolicy(action=PAUSE)
+        todo = make_todo()
+        self.assertEqual([fail(policy, todo) for _ in range(3)], [PAUSED] * 3)
+
+    def test_retry_then_requeue_then_skip(self):
+        policy = ErrorPolicy(action=RETRY, retries=2, requeue=True)
+        todo = make_todo()
+        outcomes = [fail(policy, todo) for _ in range(6)]
+        self.assertEqual(outcomes, [RETRIED, RETRIED, REQUEUED, RETRIED, RETRIED, SKIPPED])
+
+    def test_skip_without_requeue(self):
+        policy = ErrorPolicy(action=SKIP, requeue=False)
+        self.assertEqual(fail(policy, make_todo()), SKIPPED)
+
+    def test_unknown_action_is_rejected(self):
+        with self.assertRaises(ValueError):
+            ErrorPolicy(action='ignore')
+
+
+class ErrorPoliciesTest(TestCase):
+
+    def test_policy_lookup_by_measurement_class(self):
+        policies = ErrorPolicies.from_dict({
+            'default': {'action': 'skip'},
+            'InsertionLossSweep': {'action': 'retry', 'retries': 3, 'search for peak': True},
+        })
+        ils_policy = policies.policy_for(InsertionLossSweep())
+        self.assertEqual((ils_policy.action, ils_policy.retries), (RETRY, 3))
+        self.assertEqual(policies.policy_for(ReadOSA()).action, SKIP)
+
+    def test_defaults_to_pause(self):
+        self.assertEqual(ErrorPolicies().policy_for(ReadOSA()).action, PAUSE)
+
+    def test_save_and_load(self):
+        policies = ErrorPolicies(default=ErrorPolicy(SKIP, requeue=False),
+                                 per_class={'ReadOSA': ErrorPolicy(RETRY, retries=1, search_for_peak=False)})
+        with TemporaryDirectory() as tmp_dir:
+            file_path = join(tmp_dir, 'error_policies.json')
+            policies.save(file_path)
+            loaded = ErrorPolicies.load(file_path)
+            missing = ErrorPolicies.load(join(tmp_dir, 'missing.json'))
+
+        self.assertEqual(loaded.as_dict(), policies.as_dict())
+        self.assertEqual(missing.default.action, PAUSE)
+
+
+class FailureSummaryTest(TestCase):
+
+    def test_summary_counts_failures_per_todo(self):
+        summary = FailureSummary()
+        flaky, broken = make_todo(), make_todo()
+        summary.add(flaky, RuntimeError('coupling lost'), RETRIED)
+        summary.add(broken, RuntimeError('laser off'), REQUEUED)
+        summary.add(broken, RuntimeError('laser off'), SKIPPED)
+
+        self.assertEqual(len(summary), 3)
+        self.assertEqual(summary.skipped_todos, [broken])
+        lines = summary.text().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("failed 2x", lines[2])
+        self.assertIn("skipped", lines[2])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import os
+import time
+from os.path import exists, join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.AutosaveDict import JournaledAutosaveDict
+from LabExT.Experiments.FilenameAllocator import FilenameAllocator, ORPHANED_RESERVATION_AGE_S
+
+
+class FilenameAllocatorTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def touch(self, name):
+        with open(join(self.dir, name), 'w'):
+            pass
+
+    def test_free_name_is_used_and_reserved(self):
+        allocator = FilenameAllocator(self.dir)
+        path = allocator.allocate(join(self.dir, "chip_id1_meas"))
+
+        self.assertEqual(path, join(self.dir, "chip_id1_meas"))
+        self.assertTrue(exists(path + ".json.part"))
+
+    def test_existing_files_are_indexed_with_prefix_semantics(self):
+        self.touch("chip_id1_meas.json")
+        self.touch("chip_id1_meas_2_error.json")
+        allocator = FilenameAllocator(self.dir)
+
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id1_meas")), join(self.dir, "chip_id1_meas_3"))
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id1_meas")), join(self.dir, "chip_id1_meas_4"))
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id1")), join(self.dir, "chip_id1_2"))
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id2_meas")), join(self.dir, "chip_id2_meas"))
+
+    def test_files_created_after_indexing_are_not_overwritten(self):
+        allocator = FilenameAllocator(self.dir)
+        # another process creates a save file after the directory was listed
+        self.touch("chip_id1_meas.json.part")
+
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id1_meas")), join(self.dir, "chip_id1_meas_2"))
+        self.assertEqual(os.path.getsize(join(self.dir, "chip_id1_meas.json.part")), 0)
+
+    def test_paths_outside_directory_are_rejected(self):
+        allocator = FilenameAllocator(self.dir)
+        with self.assertRaises(ValueError):
+            allocator.allocate(join(self.dir, "subdir", "chip_id1_meas"))
+
+    def test_orphaned_reservations_are_removed(self):
+        self.touch("chip_id1_meas.json.part")
+        self.touch("chip_id2_meas.json.part")
+        self.touch("chip_id3_meas.json.part")
+        with open(join(self.dir, "chip_id3_meas.json.part"), 'w') as fp:
+            fp.write('{"labext_journal": 1}\n')
+        old = time.time() - 2 * ORPHANED_RESERVATION_AGE_S
+        for name in ["chip_id1_meas.json.part", "chip_id3_meas.json.part"]:
+            os.utime(join(self.dir, name), (old, old))
+
+        allocator = FilenameAllocator(self.dir)
+
+        # empty and old: left behind by a crash
+        self.assertFalse(exists(join(self.dir, "chip_id1_meas.json.part")))
+        self.assertEqual(allocator.allocate(join(self.dir, "chip_id1_meas")), join(self.dir, "chip_id1_meas"))
+        # just reserved by another process, or a journal of an interrupted measurement
+        self.assertTrue(exists(join(self.dir, "chip_id2_meas.json.part")))
+        self.assertTrue(exists(join(self.dir, "chip_id3_meas.json.part")))
+
+    def test_reserved_file_gets_journal_header(self):
+        allocator = FilenameAllocator(self.dir)
+        path = allocator.allocate(join(self.dir, "chip_id1_meas"))
+        JournaledAutosaveDict(freq=50, file_path=path + ".json.part")
+
+        self.assertGreater(os.path.getsize(path + ".json.part"), 0)
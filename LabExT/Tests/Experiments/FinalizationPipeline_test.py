@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import time
+from unittest import TestCase
+
+from LabExT.Experiments.FinalizationPipeline import FinalizationPipeline
+
+
+class FinalizationPipelineTest(TestCase):
+
+    def setUp(self) -> None:
+        self.pipeline = FinalizationPipeline()
+
+    def tearDown(self) -> None:
+        self.pipeline.shutdown()
+
+    def test_jobs_are_executed_in_submission_order(self):
+        executed = []
+        for i in range(10):
+            self.pipeline.submit(executed.append, i)
+        self.pipeline.wait()
+
+        self.assertListEqual(executed, list(range(10)))
+        self.assertEqual(self.pipeline.n_jobs, 10)
+
+    def test_exception_of_job_is_reraised_on_wait(self):
+        def failing_job():
+            raise ValueError("finalization failed")
+
+        self.pipeline.submit(failing_job)
+
+        with self.assertRaises(ValueError):
+            self.pipeline.wait()
+
+    def test_overlapped_job_time_is_reported_as_saved(self):
+        self.pipeline.submit(time.sleep, 0.2)
+        # the caller does other work in the meantime, e.g. moving the stages
+        time.sleep(0.3)
+        self.pipeline.wait()
+
+        self.assertGreater(self.pipeline.saved_time_s, 0.1)
+        self.assertLess(self.pipeline.wait_time_s, 0.1)
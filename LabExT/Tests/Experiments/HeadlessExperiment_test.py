@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import logging
+import os
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from LabExT.BatchRunner import BatchRunner, filter_devices, load_recipe, main
+from LabExT.Experiments.AutosaveDict import load_autosave_file
+from LabExT.Instruments.ReusingResourceManager import ReusingResourceManager
+from LabExT.Wafer.Device import Device
+
+
+class BatchRunnerTest(TestCase):
+    """
+    Runs recipes with the DummyMeas through the headless experiment.
+    """
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+        self.chip_path = join(self.dir, 'chip.json')
+        with open(self.chip_path, 'w') as fp:
+            json.dump([{'ID': i, 'Inputs': [[100 * i, 0]], 'Outputs': [[100 * i + 50, 0]], 'Type': 'WG'}
+                       for i in range(4)], fp)
+        self.output_path = join(self.dir, 'results')
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def make_recipe(self, **kwargs):
+        recipe = {
+            'chip': {'path': self.chip_path, 'name': 'BatchChip'},
+            'devices': {'ids': [1]},
+            'measurements': [{'class': 'DummyMeas',
+                              'parameters': {'number of points': 5, 'total measurement time': 0.01}}],
+            'output path': self.output_path,
+            'addon directories': [],
+        }
+        recipe.update(kwargs)
+        recipe_path = join(self.dir, 'recipe.json')
+        with open(recipe_path, 'w') as fp:
+            json.dump(recipe, fp)
+        return load_recipe(recipe_path)
+
+    def make_failing_recipe(self, **kwargs):
+        # the first measurement always fails, the second one works
+        failing = {'class': 'DummyMeas', 'parameters': {'simulate measurement error': True}}
+        working = {'class': 'DummyMeas', 'parameters': {'number of points': 5, 'total measurement time': 0.01}}
+        return self.make_recipe(devices={'ids': [1]}, measurements=[failing, working], **kwargs)
+
+    def result_files(self):
+        return sorted(f for f in os.listdir(self.output_path) if '_DummyMeas_' in f)
+
+    def test_recipe_is_executed(self):
+        runner = BatchRunner(self.make_recipe(devices={'ids': [1, 2]},
+                                              **{'measure multiple devices without moving stages': True}))
+        runner.setup()
+        self.assertEqual(runner.build_queue(), 2)
+
+        self.assertEqual(runner.run(), 0)
+
+        files = self.result_files()
+        self.assertEqual(len(files), 2)
+        record = load_autosave_file(join(self.output_path, files[0]))
+        self.assertEqual(record['device']['id'], 1)
+        self.assertEqual(record['measurement settings']['number of points']['value'], 5)
+        self.assertFalse(record['experiment settings']['auto move stages to device'])
+        self.assertTrue(record['finished'])
+        self.assertFalse(runner.exp.queue_checkpoint.exists())
+
+    def test_main_closes_idle_visa_sessions(self):
+        self.make_recipe()
+        rm = Mock()
+        root_logger = logging.getLogger()
+        prev_handlers, prev_level = list(root_logger.handlers), root_logger.level
+        try:
+            with patch.object(ReusingResourceManager, 'created_instance', return_value=rm):
+                exit_code = main([join(self.dir, 'recipe.json'), '--log-level', 'error'])
+        finally:
+            root_logger.handlers = prev_handlers
+            root_logger.setLevel(prev_level)
+        self.assertEqual(exit_code, 0)
+        rm.close_idle_resources.assert_called_once_with()
+
+    def test_skip_policy_continues_after_error(self):
+        runner = BatchRunner(self.make_failing_recipe(**{'error policies': {'default': {'action': 'skip'}}}))
+        runner.setup()
+        runner.build_queue()
+
+        self.assertEqual(runner.run(), 1)
+
+        # the failing ToDo was re-queued once at the end of the queue before it was skipped
+        self.assertEqual(len(runner.exp.failed_todos), 1)
+        self.assertEqual(runner.exp.to_do_list, [])
+        self.assertEqual(len(runner.exp.saved_file_paths), 1)
+        self.assertEqual(len([f for f in self.result_files() if f.endswith('_error.json')]), 2)
+
+    def test_retry_policy_retries_and_requeues(self):
+        policies = {'default': {'action': 'skip', 'requeue': False},
+                    'DummyMeas': {'action': 'retry', 'retries': 2, 'requeue': True}}
+        runner = BatchRunner(self.make_failing_recipe(**{'error policies': policies}))
+        runner.setup()
+        runner.build_queue()
+
+        self.assertEqual(runner.run(), 1)
+
+        # 3 attempts, re-queued at the end of the queue, again 3 attempts
+        self.assertEqual(len([f for f in self.result_files() if f.endswith('_error.json')]), 6)
+        self.assertEqual(len(runner.exp.failed_todos), 1)
+        self.assertEqual(len(runner.exp.saved_file_paths), 1)
+
+    def test_stop_policy_keeps_failed_todo_queued(self):
+        runner = BatchRunner(self.make_failing_recipe())
+        runner.setup()
+        runner.build_queue()
+
+        self.assertEqual(runner.run(), 1)
+
+        self.assertEqual(len(runner.exp.to_do_list), 2)
+        self.assertTrue(runner.exp.queue_checkpoint.exists())
+
+    def test_multiple_devices_need_explicit_consent(self):
+        runner = BatchRunner(self.make_recipe(devices={'ids': [1, 2]}))
+        runner.setup()
+        with self.assertRaises(ValueError):
+            runner.build_queue()
+
+    def test_unknown_parameter_is_rejected(self):
+        recipe = self.make_recipe(measurements=[{'class': 'DummyMeas', 'parameters': {'number of pionts': 5}}])
+        runner = BatchRunner(recipe)
+        runner.setup()
+        with self.assertRaises(ValueError):
+            runner.build_queue()
+
+    def test_device_filter(self):
+        devices = [Device(i, [0, 0], [0, 0], 'WG' if i % 2 else 'MRR') for i in range(6)]
+
+        self.assertEqual([d._id for d in filter_devices(devices)], list(range(6)))
+        self.assertEqual([d._id for d in filter_devices(devices, {'types': ['WG'], 'id range': [0, 3]})], [1, 3])
+        self.assertEqual([d._id for d in filter_devices(devices, {'ids': ['4', 2]})], [2, 4])
+
+        # IDs given as strings in the chip file
+        devices = [Device(str(i), [0, 0], [0, 0], 'WG') for i in [2, 10, 'A']]
+        self.assertEqual([d._id for d in filter_devices(devices, {'id range': [1, '10']})], ['2', '10'])
+        self.assertEqual([d._id for d in filter_devices(devices, {'ids': [10, 'A']})], ['10', 'A'])
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from LabExT.Experiments.MeasurementStore import MeasurementStore, calc_measurement_key
+
+
+def make_record(device_id, timestamp, chip_name="TestChip", name="DummyMeas"):
+    return {
+        'chip': {'name': chip_name},
+        'device': {'id': device_id, 'type': 'MZM'},
+        'timestamp_iso_known': timestamp,
+        'name_known': name,
+        'values': {'x': [1, 2, 3]}
+    }
+
+
+class MeasurementStoreTest(TestCase):
+
+    def setUp(self) -> None:
+        self.store = MeasurementStore()
+        self.added_cb = Mock()
+        self.removed_cb = Mock()
+        self.store.item_added.append(self.added_cb)
+        self.store.item_removed.append(self.removed_cb)
+
+    def test_records_keep_insertion_order(self):
+        records = [make_record(i, "2022-06-01T12:00:0{:d}".format(i)) for i in range(5)]
+        for r in records:
+            self.store.add(r)
+
+        self.assertEqual(len(self.store), 5)
+        self.assertListEqual(list(self.store), records)
+        self.assertIs(self.store[0], records[0])
+        self.assertIs(self.store[-1], records[-1])
+        self.assertEqual(self.added_cb.call_count, 5)
+        # single records are notified as list, like bulk operations
+        self.added_cb.assert_called_with([records[-1]])
+
+        self.store.remove(records[1])
+        self.removed_cb.assert_called_once_with([records[1]])
+        self.assertListEqual([self.store[i] for i in range(len(self.store))], records[:1] + records[2:])
+        self.store.add(records[1])
+        self.assertIs(self.store[-1], records[1])
+
+    def test_duplicates_are_rejected(self):
+        self.store.add(make_record(1, "2022-06-01T12:00:00"))
+
+        with self.assertRaises(ValueError):
+            self.store.add(make_record(1, "2022-06-01T12:00:00"))
+        with self.assertRaises(ValueError):
+            self.store.add_many([make_record(2, "2022-06-01T12:00:00"), make_record(2, "2022-06-01T12:00:00")])
+        self.assertEqual(len(self.store), 1)
+
+    def test_bulk_operations_notify_once(self):
+        records = [make_record(i % 3, "2022-06-01T12:00:{:02d}".format(i)) for i in range(30)]
+        self.store.add_many(records)
+        self.added_cb.assert_called_once_with(records)
+
+        self.store.remove_many(records[:10])
+        self.assertEqual(self.removed_cb.call_count, 1)
+        self.assertEqual(len(self.store), 20)
+        self.assertFalse(self.store.contains_hash(calc_measurement_key(records[0])))
+        self.assertTrue(records[10] in self.store)
+
+    def test_device_index_follows_insertions_and_removals(self):
+        r1 = make_record(1, "2022-06-01T12:00:00")
+        r2 = make_record(1, "2022-06-01T12:00:01")
+        r3 = make_record(2, "2022-06-01T12:00:02")
+        self.store.add_many([r1, r2, r3])
+
+        self.assertListEqual(self.store.records_of_device("TestChip", 1, "MZM"), [r1, r2])
+        self.assertListEqual(self.store.records_of_device("OtherChip", 1, "MZM"), [])
+
+        self.store.remove(r1)
+        self.assertListEqual(self.store.records_of_device("TestChip", 1, "MZM"), [r2])
+
+        self.store.clear()
+        self.assertListEqual(self.store.records_of_device("TestChip", 2, "MZM"), [])
+        self.assertEqual(len(self.store), 0)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import time
+from collections import OrderedDict
+from unittest import TestCase
+
+from LabExT.Experiments.PersistenceService import PersistenceService, snapshot
+
+
+class SnapshotTest(TestCase):
+
+    def test_snapshot_is_independent_of_later_modifications(self):
+        orig = OrderedDict([('values', {'x': [1, 2, 3]}), ('name', 'meas')])
+        copy = snapshot(orig)
+
+        orig['values']['x'].append(4)
+        orig['values']['y'] = [5]
+        orig['name'] = 'changed'
+
+        self.assertDictEqual(copy, {'values': {'x': [1, 2, 3]}, 'name': 'meas'})
+
+
+class Owner:
+    pass
+
+
+class PersistenceServiceTest(TestCase):
+
+    def setUp(self) -> None:
+        self.service = PersistenceService(max_queue_size=2)
+
+    def test_flush_waits_for_all_submitted_jobs(self):
+        written = []
+        for i in range(5):
+            self.service.submit(self, lambda v: (time.sleep(0.01), written.append(v)), i)
+        self.service.flush(self)
+
+        self.assertListEqual(written, list(range(5)))
+        self.assertEqual(self.service.queue_depth, 0)
+        self.assertLessEqual(self.service.max_queue_depth, 2)
+
+    def test_flush_reraises_error_of_owner_only(self):
+        other_owner = Owner()
+
+        def failing_write():
+            raise OSError("disk full")
+
+        self.service.submit(self, failing_write)
+        self.service.flush(other_owner)
+
+        with self.assertRaises(OSError):
+            self.service.flush(self)
+        # error is only reported once
+        self.service.flush(self)
+
+    def test_superseded_errors_are_not_raised(self):
+        def failing_write():
+            raise OSError("disk full")
+
+        self.service.submit(self, failing_write)
+        self.service.submit(self, lambda: None, supersedes=True)
+        self.service.flush(self)
+
+        self.service.submit(self, lambda: None, supersedes=True)
+        self.service.submit(self, failing_write)
+        with self.assertRaises(OSError):
+            self.service.flush(self)
+
+    def test_errors_are_not_attributed_to_new_owners(self):
+        def failing_write():
+            raise OSError("disk full")
+
+        owner = Owner()
+        self.service.submit(owner, failing_write)
+        self.service.flush()
+        del owner
+        # a new object may get the id of the deleted one
+        for _ in range(10):
+            self.service.flush(Owner())
+
+    def test_stats_report_write_latencies(self):
+        self.service.submit(self, time.sleep, 0.05)
+        self.service.flush(self)
+
+        stats = self.service.stats()
+        self.assertEqual(stats['writes'], 1)
+        self.assertGreaterEqual(stats['max write latency s'], 0.05)
+        self.assertGreaterEqual(stats['p95 write latency s'], 0.05)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+import time
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.PhaseTimer import PhaseTimer, RunTimingSummary, timed_phase
+
+
+class PhaseTimerTest(TestCase):
+
+    def test_nested_phases_are_subtracted_from_enclosing_phase(self):
+        timer = PhaseTimer()
+        with timer.phase('stage move'):
+            time.sleep(0.02)
+            with timer.phase('z-lift'):
+                time.sleep(0.05)
+
+        self.assertGreaterEqual(timer.durations['z-lift'], 0.05)
+        self.assertGreaterEqual(timer.durations['stage move'], 0.02)
+        self.assertLess(timer.durations['stage move'], 0.05)
+
+    def test_repeated_phases_accumulate(self):
+        timer = PhaseTimer()
+        timer.add('metadata capture', 0.5)
+        with self.assertRaises(RuntimeError):
+            with timer.phase('metadata capture'):
+                raise RuntimeError()
+        timer.add('metadata capture', 0.25)
+
+        self.assertListEqual(list(timer.as_dict().keys()), ['metadata capture'])
+        self.assertGreaterEqual(timer.durations['metadata capture'], 0.75)
+
+    def test_timed_phase_without_timer(self):
+        with timed_phase(None, 'algorithm'):
+            pass
+
+
+class RunTimingSummaryTest(TestCase):
+
+    def test_summary(self):
+        summary = RunTimingSummary()
+        for i in range(10):
+            summary.add_record({'algorithm': float(i + 1), 'save': 0.1}, device_key=i % 5)
+        summary.stop()
+        summary.wall_clock_s = 3600.0
+
+        result = summary.summary()
+        self.assertEqual(result['records'], 10)
+        self.assertEqual(result['devices'], 5)
+        self.assertAlmostEqual(result['devices per hour'], 5.0)
+        self.assertAlmostEqual(result['phases']['algorithm']['p50 s'], 5.5)
+        self.assertAlmostEqual(result['phases']['algorithm']['total s'], 55.0)
+        self.assertIn('algorithm', summary.status_text())
+
+        with TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, 'timing.json')
+            summary.write(file_path)
+            with open(file_path) as f:
+                self.assertEqual(json.load(f)['phases']['save']['count'], 10)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+from os.path import exists, join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest.mock import Mock
+
+from LabExT.Experiments.QueueCheckpoint import QueueCheckpoint
+from LabExT.Experiments.StandardExperiment import StandardExperiment
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamFloat
+from LabExT.Wafer.Device import Device
+
+
+class FakeMeasurement:
+
+    def __init__(self, experiment=None, experiment_manager=None):
+        self.selected_instruments = {}
+        self.parameters = {'wavelength': MeasParamFloat(value=1550.0, unit='nm')}
+        self.instruments_initialized = False
+
+    def init_instruments(self):
+        self.instruments_initialized = True
+
+    def get_name_with_id(self):
+        return "FakeMeasurement"
+
+
+def make_todo(dev_id, wavelength=1550.0):
+    measurement = FakeMeasurement()
+    measurement.selected_instruments['Laser'] = {'visa': 'GPIB0::1::INSTR', 'class': 'LaserSimulator', 'channel': None}
+    measurement.parameters['wavelength'].value = wavelength
+    return ToDo(Device(dev_id, [dev_id, 0.0], [dev_id, 10.0], 'WG', {'length': 5}), measurement)
+
+
+class QueueCheckpointTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.dir = self.tmp_dir.name
+        self.checkpoint = QueueCheckpoint(join(self.dir, 'queue_checkpoint.json'))
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def restore(self, document, chip_devices=None):
+        exp = Mock()
+        exp.measurements_classes = {'FakeMeasurement': FakeMeasurement}
+        exp._chip._devices = chip_devices if chip_devices is not None else {}
+        exp.to_do_list = []
+        result = StandardExperiment.restore_queue_checkpoint(exp, document)
+        return exp.to_do_list, result
+
+    def test_missing_checkpoint_loads_as_none(self):
+        self.assertIsNone(self.checkpoint.load())
+
+    def test_queue_round_trip(self):
+        todos = [make_todo(1, 1550.0), make_todo(2, 1310.0)]
+        todos[1].pinned = True
+        self.checkpoint.save(todos, chip_name='chip', output_path=self.dir)
+
+        restored, (n_restored, n_finished, errors) = self.restore(self.checkpoint.load())
+
+        self.assertEqual((n_restored, n_finished, errors), (2, 0, []))
+        self.assertEqual([t.device._id for t in restored], [1, 2])
+        self.assertEqual([t.measurement.parameters['wavelength'].value for t in restored], [1550.0, 1310.0])
+        self.assertEqual(restored[0].measurement.selected_instruments['Laser']['visa'], 'GPIB0::1::INSTR')
+        self.assertTrue(restored[0].measurement.instruments_initialized)
+        self.assertEqual(restored[0].device._parameters, {'length': 5})
+        self.assertEqual([t.pinned for t in restored], [False, True])
+
+    def test_devices_are_taken_from_loaded_chip(self):
+        chip_device = Device(1, [0, 0], [0, 10], 'WG')
+        self.checkpoint.save([make_todo(1), make_todo(2)])
+
+        restored, _ = self.restore(self.checkpoint.load(), chip_devices={1: chip_device})
+
+        self.assertIs(restored[0].device, chip_device)
+        self.assertIsNot(restored[1].device, chip_device)
+
+    def test_finished_current_todo_is_skipped(self):
+        save_file_path = join(self.dir, 'chip_id1_FakeMeasurement')
+        self.checkpoint.save([make_todo(1), make_todo(2)], current_save_file_path=save_file_path)
+
+        # crash after the result file of the current ToDo was finalized, before the checkpoint was updated
+        with open(save_file_path + '.json', 'w') as f:
+            f.write('{}')
+
+        restored, (n_restored, n_finished, errors) = self.restore(self.checkpoint.load())
+
+        self.assertEqual((n_restored, n_finished), (1, 1))
+        self.assertEqual([t.device._id for t in restored], [2])
+
+    def test_unfinished_current_todo_is_restored(self):
+        save_file_path = join(self.dir, 'chip_id1_FakeMeasurement')
+        self.checkpoint.save([make_todo(1)], current_save_file_path=save_file_path)
+        # only the journal and an error file exist, the measurement must be repeated
+        for ending in ['.json.part', '_error.json']:
+            with open(save_file_path + ending, 'w') as f:
+                f.write('{}')
+
+        restored, (n_restored, n_finished, errors) = self.restore(self.checkpoint.load())
+
+        self.assertEqual((n_restored, n_finished), (1, 0))
+
+    def test_unknown_measurement_class_is_reported(self):
+        self.checkpoint.save([make_todo(1)])
+        document = self.checkpoint.load()
+        document['todos'][0]['measurement'] = 'RemovedMeasurement'
+
+        restored, (n_restored, n_finished, errors) = self.restore(document)
+
+        self.assertEqual(restored, [])
+        self.assertEqual(len(errors), 1)
+
+    def test_save_replaces_file_atomically_and_clear_removes_it(self):
+        self.checkpoint.save([make_todo(1), make_todo(2)])
+        self.checkpoint.save([make_todo(2)])
+
+        with open(self.checkpoint.file_path) as f:
+            self.assertEqual(len(json.load(f)['todos']), 1)
+        self.assertFalse(exists(self.checkpoint.file_path + '.tmp'))
+
+        self.checkpoint.clear()
+        self.assertIsNone(self.checkpoint.load())
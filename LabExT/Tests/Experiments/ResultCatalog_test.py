@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from LabExT.Experiments.ResultCatalog import ResultCatalog, iso_timestamp, CATALOG_FILE_NAME
+from LabExT.Experiments.ResultFile import result_file_writer
+from LabExT.Tests.Experiments.ResultFile_test import make_record
+
+
+class ResultCatalogTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.directory = self.tmp_dir.name
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write(self, file_name, device_id=1, meas_name='InsertionLossSweep', timestamp='2022-06-01_120000', **extra):
+        record = make_record(n_points=5)
+        del record['file_path_known']
+        record['device']['id'] = device_id
+        record['measurement name'] = meas_name
+        record['timestamp start'] = timestamp
+        record['finished'] = True
+        record['error'] = {}
+        record['measurement settings'] = {'wavelength start': {'value': 1520.0, 'unit': 'nm'}}
+        record.update(extra)
+        file_path = os.path.join(self.directory, file_name)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        result_file_writer(file_path)(record, file_path)
+        return file_path, record
+
+    def test_rescan_indexes_records_and_skips_other_files(self):
+        self._write('a.json', device_id=1)
+        self._write('sub/b.h5', device_id=2, meas_name='ReadOSA', timestamp='2022-06-02_080000')
+        self._write('c_error.json', device_id=3, error={'type': 'RuntimeError', 'desc': 'laser off'})
+        with open(os.path.join(self.directory, 'run_timing.json'), 'w') as f:
+            json.dump({'n records': 3}, f)
+
+        catalog = ResultCatalog(self.directory)
+        self.assertEqual(catalog.rescan(), (3, 0))
+        self.assertEqual(len(catalog), 3)
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, CATALOG_FILE_NAME)))
+
+        self.assertEqual(catalog.file_paths(measurement_name='ReadOSA'), [os.path.join(self.directory, 'sub', 'b.h5')])
+        self.assertEqual(catalog.count(with_error=False), 2)
+        self.assertEqual(catalog.count(device_id=[1, 3]), 2)
+        self.assertEqual(catalog.count(since='2022-06-02'), 1)
+        self.assertEqual(catalog.count(until='2022-06-01'), 2)
+
+        entry = catalog.query(device_id=3)[0]
+        self.assertEqual(entry['error'], 'laser off')
+        self.assertEqual(entry['chip_name'], 'TestChip')
+        self.assertEqual(entry['timestamp_start'], '2022-06-01T12:00:00')
+        self.assertEqual(entry['settings']['wavelength start']['value'], 1520.0)
+
+        # nothing changed, nothing is read again
+        self.assertEqual(catalog.rescan(), (0, 0))
+
+    def test_rescan_only_reads_changed_files(self):
+        a_path, _ = self._write('a.json', device_id=1)
+        b_path, _ = self._write('b.json', device_id=2)
+        catalog = ResultCatalog(self.directory)
+        catalog.rescan()
+
+        os.remove(b_path)
+        self._write('a.json', device_id=1, **{'user comment': 'fiber was dirty', 'user flags': ['Valid #']})
+        self.assertEqual(catalog.rescan(), (1, 1))
+
+        self.assertEqual(catalog.file_paths(flag='Valid #'), [a_path])
+        self.assertEqual(catalog.query(comment='dirty')[0]['user_flags'], ['Valid #'])
+
+    def test_add_record_and_find_catalog_of_file(self):
+        catalog = ResultCatalog(self.directory)
+        file_path, record = self._write('sub/a.json', device_id=7)
+        catalog.add_record(file_path, record)
+
+        found = ResultCatalog.find_for_file(file_path)
+        self.assertEqual(found.directory, catalog.directory)
+        self.assertEqual(found.file_paths(device_id=7), [file_path])
+
+        catalog.remove(file_path)
+        self.assertEqual(len(catalog), 0)
+
+    def test_iso_timestamp(self):
+        self.assertEqual(iso_timestamp('2022-06-01_120000'), '2022-06-01T12:00:00')
+        self.assertEqual(iso_timestamp('2022-06-01T12:00:00.5'), '2022-06-01T12:00:00.5')
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+
+Benchmark of the result file formats and compression codecs. Not part of the test suite, run with:
+    python -m LabExT.Tests.Experiments.ResultFile_benchmark [number of points | path to a result file]
+
+If a result file is given, its record is used instead of a synthetic sweep, e.g. to judge the disk-space and load-time
+trade-off of the compression on real sweep data.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from LabExT.Experiments.Compression import COMPRESSION_EXTENSIONS, COMPRESSION_LEVELS, available_codecs
+from LabExT.Experiments.ResultFile import load_result_file, result_file_writer
+
+
+def make_sweep_record(n_points):
+    """ Returns a record resembling an InsertionLossSweep with n_points points. """
+    record = OrderedDict()
+    record['chip'] = {'name': 'BenchmarkChip', 'description file path': ''}
+    record['device'] = {'id': 1, 'type': 'WG', 'in_position': [0.0, 0.0], 'out_position': [100.0, 0.0]}
+    record['timestamp'] = '2022-06-01_120000'
+    record['measurement name'] = 'InsertionLossSweep'
+    record['values'] = OrderedDict()
+    record['values']['wavelength [nm]'] = np.linspace(1520.0, 1580.0, n_points).tolist()
+    record['values']['transmission [dBm]'] = (-10.0 + np.random.randn(n_points)).tolist()
+    return record
+
+
+def benchmark(file_names, record, n_repetitions=3):
+    """
+    Prints file size, write and load time for each file name, the extension selects the format. File names can be
+    given as (file name, compression level) tuple.
+    """
+    n_points = max(len(v) for v in record['values'].values())
+    print("{:d} points per values vector, best of {:d} runs".format(n_points, n_repetitions))
+    print("{:>20s} {:>12s} {:>12s} {:>12s}".format("format", "size [MB]", "write [s]", "load [s]"))
+
+    with TemporaryDirectory() as tmp_dir:
+        for file_name in file_names:
+            file_name, level = file_name if isinstance(file_name, tuple) else (file_name, None)
+            file_path = os.path.join(tmp_dir, file_name)
+            writer = result_file_writer(file_path, compression_level=level)
+
+            write_times = []
+            load_times = []
+            for _ in range(n_repetitions):
+                t0 = time.perf_counter()
+                writer(record, file_path)
+                t1 = time.perf_counter()
+                load_result_file(file_path)
+                t2 = time.perf_counter()
+                write_times.append(t1 - t0)
+                load_times.append(t2 - t1)
+
+            label = file_name if level is None else "{:s} ({:d})".format(file_name, level)
+            print("{:>20s} {:12.2f} {:12.3f} {:12.3f}".format(label,
+                                                             os.path.getsize(file_path) / 1e6,
+                                                             min(write_times),
+                                                             min(load_times)))
+
+
+def benchmarked_formats():
+    """ Plain formats and every available compression codec at its lowest, default and highest level. """
+    formats = ['meas.json', 'meas.h5']
+    for codec in available_codecs():
+        min_level, max_level, default_level = COMPRESSION_LEVELS[codec]
+        for level in sorted({min_level, default_level, max_level}):
+            formats.append(('meas.json' + COMPRESSION_EXTENSIONS[codec], level))
+    return formats
+
+
+if __name__ == "__main__":
+    arg = sys.argv[1] if len(sys.argv) > 1 else '1000000'
+    if os.path.isfile(arg):
+        bench_record = load_result_file(arg)
+        bench_record['values'] = OrderedDict((k, v.tolist() if hasattr(v, 'tolist') else v)
+                                             for k, v in bench_record['values'].items())
+    else:
+        bench_record = make_sweep_record(int(arg))
+    benchmark(benchmarked_formats(), bench_record)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import os
+from collections import OrderedDict
+from tempfile import TemporaryDirectory
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from LabExT.Experiments.Compression import ZSTD, LZ4, available_codecs
+from LabExT.Experiments.ResultFile import write_hdf5_record, write_json_record, load_result_file, \
+    result_file_writer, load_lazy_result_file, LazyValues, ValuesCache, result_file_stem
+
+
+def make_record(n_points=100):
+    record = OrderedDict()
+    record['chip'] = {'name': 'TestChip', 'description file path': ''}
+    record['device'] = {'id': 42, 'type': 'MZM', 'in_position': [0.0, 1.0], 'out_position': [2.0, 3.0]}
+    record['timestamp'] = '2022-06-01_120000'
+    record['measurement name'] = 'InsertionLossSweep'
+    record['values'] = OrderedDict()
+    record['values']['wavelength [nm]'] = np.linspace(1520, 1580, n_points).tolist()
+    record['values']['transmission [dBm]'] = np.random.randn(n_points).tolist()
+    record['values']['power/W'] = list(range(n_points))
+    record['values']['labels'] = ['a', 'b']
+    record['file_path_known'] = 'not saved'
+    return record
+
+
+class ResultFileTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _roundtrip(self, file_name):
+        record = make_record()
+        file_path = os.path.join(self.tmp_dir.name, file_name)
+        result_file_writer(file_path)(record, file_path)
+        loaded = load_result_file(file_path)
+
+        del record['file_path_known']
+        loaded_values = loaded.pop('values')
+        record_values = record.pop('values')
+        self.assertDictEqual(dict(loaded), dict(record))
+        self.assertListEqual(list(loaded_values.keys()), list(record_values.keys()))
+        for k, v in record_values.items():
+            np.testing.assert_array_equal(loaded_values[k], v)
+
+        # numeric vectors are loaded as arrays
+        self.assertIsInstance(loaded_values['transmission [dBm]'], np.ndarray)
+        self.assertIsInstance(loaded_values['labels'], list)
+
+    def test_hdf5_roundtrip_keeps_metadata_and_values(self):
+        self._roundtrip('meas.h5')
+
+    def test_json_roundtrip_keeps_metadata_and_values(self):
+        self._roundtrip('meas.json')
+
+    def test_json_record_with_arrays_is_written_as_lists(self):
+        record = make_record()
+        record['values']['transmission [dBm]'] = np.random.randn(10).astype(np.float32)
+        file_path = os.path.join(self.tmp_dir.name, 'meas.json')
+        write_json_record(record, file_path)
+
+        with open(file_path) as f:
+            saved = json.load(f)
+        self.assertEqual(len(saved['values']['transmission [dBm]']), 10)
+
+    def test_format_is_detected_from_content(self):
+        record = make_record()
+        file_path = os.path.join(self.tmp_dir.name, 'meas_without_extension')
+
+        write_hdf5_record(record, file_path)
+        self.assertEqual(load_result_file(file_path)['device']['id'], 42)
+
+        write_json_record(record, file_path)
+        self.assertEqual(load_result_file(file_path)['device']['id'], 42)
+
+    def test_gzip_json_roundtrip_keeps_metadata_and_values(self):
+        self._roundtrip('meas.json.gz')
+
+    def test_compressed_json_is_detected_from_content(self):
+        record = make_record(n_points=10000)
+        json_path = os.path.join(self.tmp_dir.name, 'meas.json')
+        compressed_path = os.path.join(self.tmp_dir.name, 'meas_renamed.json')
+        write_json_record(record, json_path)
+        result_file_writer('meas.json.gz', compression_level=9)(record, compressed_path)
+
+        self.assertLess(os.path.getsize(compressed_path), os.path.getsize(json_path) / 2)
+        self.assertEqual(load_result_file(compressed_path)['device']['id'], 42)
+        lazy = load_lazy_result_file(compressed_path, cache=ValuesCache())
+        self.assertEqual(len(lazy['values']['power/W']), 10000)
+
+    @skipUnless(set(available_codecs()) >= {ZSTD, LZ4}, "zstandard or lz4 package not installed")
+    def test_zstd_and_lz4_roundtrip(self):
+        self._roundtrip('meas.json.zst')
+        self._roundtrip('meas.json.lz4')
+
+    def test_hdf5_is_smaller_than_json(self):
+        record = make_record(n_points=10000)
+        json_path = os.path.join(self.tmp_dir.name, 'meas.json')
+        h5_path = os.path.join(self.tmp_dir.name, 'meas.h5')
+        write_json_record(record, json_path)
+        write_hdf5_record(record, h5_path)
+
+        self.assertLess(os.path.getsize(h5_path), os.path.getsize(json_path))
+
+
+class ResultFileStemTest(TestCase):
+
+    def test_all_result_file_extensions_are_removed(self):
+        for name in ['meas.json', 'meas.h5', 'meas.json.gz', 'meas.json.zst', 'meas.json.part', 'meas.txt']:
+            self.assertEqual(result_file_stem(os.path.join('data', name)), 'meas')
+        self.assertEqual(result_file_stem('chip_1.5um_meas.json.lz4'), 'chip_1.5um_meas')
+
+
+class LazyResultFileTest(TestCase):
+
+    def setUp(self) -> None:
+        self.tmp_dir = TemporaryDirectory()
+        self.cache = ValuesCache()
+
+    def tearDown(self) -> None:
+        self.tmp_dir.cleanup()
+
+    def _write(self, file_name, record):
+        file_path = os.path.join(self.tmp_dir.name, file_name)
+        result_file_writer(file_path)(record, file_path)
+        return file_path
+
+    def _check_lazy_load(self, file_name):
+        record = make_record()
+        record['measurement settings'] = {'comment': {'value': 'brackets } and "quotes" {['}}
+        file_path = self._write(file_name, record)
+        eager = load_result_file(file_path)
+        lazy = load_lazy_result_file(file_path, cache=self.cache)
+
+        values = lazy['values']
+        self.assertIsInstance(values, LazyValues)
+        self.assertListEqual(list(values.keys()), list(eager['values'].keys()))
+        self.assertFalse(values.is_loaded)
+        self.assertDictEqual({k: v for k, v in lazy.items() if k != 'values'},
+                             {k: v for k, v in eager.items() if k != 'values'})
+
+        np.testing.assert_array_equal(values['transmission [dBm]'], eager['values']['transmission [dBm]'])
+        self.assertTrue(values.is_loaded)
+        self.assertListEqual(values['labels'], ['a', 'b'])
+
+    def test_json_values_are_loaded_on_access(self):
+        self._check_lazy_load('meas.json')
+
+    def test_hdf5_values_are_loaded_on_access(self):
+        self._check_lazy_load('meas.h5')
+
+    def test_cache_unloads_least_recently_used_values(self):
+        # every record uses 3 * 100 * 8 bytes of numeric values, there is space for two
+        self.cache.max_bytes = 5000
+        records = [load_lazy_result_file(self._write('meas_{:d}.json'.format(i), make_record()), cache=self.cache)
+                   for i in range(3)]
+        for rec in records:
+            rec['values']['power/W']
+
+        self.assertEqual([rec['values'].is_loaded for rec in records], [False, True, True])
+        self.assertLessEqual(self.cache.resident_bytes, self.cache.max_bytes)
+
+        # unloaded values are read again
+        self.assertEqual(records[0]['values']['power/W'][-1], 99)
+        self.assertEqual([rec['values'].is_loaded for rec in records], [True, False, True])
+
+    def test_rewriting_a_lazy_record_keeps_its_values(self):
+        record = make_record()
+        file_path = self._write('meas.json', record)
+        lazy = load_lazy_result_file(file_path, cache=self.cache)
+        lazy['comment'] = 'a much longer comment which shifts the position of the values in the file'
+
+        write_json_record(lazy, file_path)
+        lazy['values'].unload()
+
+        np.testing.assert_array_equal(lazy['values']['power/W'], record['values']['power/W'])
+        self.assertEqual(load_result_file(file_path)['comment'], lazy['comment'])
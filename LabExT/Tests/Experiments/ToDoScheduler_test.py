@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import random
+from unittest import TestCase
+from unittest.mock import Mock
+
+import numpy as np
+
+from LabExT.Experiments.ToDo import ToDo
+from LabExT.Experiments.ToDoScheduler import optimize_todo_order, estimate_reconfigurations, travel_distances
+from LabExT.Measurements.MeasAPI.Measparam import MeasParamFloat, MeasParamString
+from LabExT.Wafer.Device import Device
+
+
+def make_todo(device, name="meas", parameters=None):
+    measurement = Mock()
+    measurement.get_name_with_id.return_value = name
+    measurement.parameters = parameters if parameters is not None else {}
+    return ToDo(device, measurement)
+
+
+def range_params(pm_range, comment=''):
+    return {'powermeter range': MeasParamFloat(value=pm_range, unit='dBm'),
+            'users comment': MeasParamString(value=comment)}
+
+
+class OptimizeToDoOrderTest(TestCase):
+
+    def setUp(self) -> None:
+        random.seed(42)
+        # devices on a line, 100 units apart
+        self.devices = [Device(i, [100 * i, 0], [100 * i + 50, 0], 'WG') for i in range(20)]
+
+    def test_shuffled_line_is_sorted(self):
+        shuffled = list(self.devices)
+        random.shuffle(shuffled)
+        todos = [make_todo(d) for d in shuffled]
+
+        new_order, report = optimize_todo_order(todos)
+
+        dev_ids = [t.device._id for t in new_order]
+        self.assertIn(dev_ids, [list(range(20)), list(range(19, -1, -1))])
+        self.assertAlmostEqual(report.travel_after, 1900.0)
+        self.assertGreater(report.travel_before, report.travel_after)
+        self.assertEqual(report.n_devices, 20)
+
+    def test_todos_of_a_device_stay_grouped_in_order(self):
+        todos = []
+        for rep in range(3):
+            for d in self.devices[:5]:
+                todos.append(make_todo(d, name="meas_{:d}".format(rep)))
+
+        new_order, _ = optimize_todo_order(todos)
+
+        self.assertEqual(len(new_order), len(todos))
+        for d in self.devices[:5]:
+            positions = [i for i, t in enumerate(new_order) if t.device is d]
+            self.assertEqual(positions, list(range(positions[0], positions[0] + 3)))
+            names = [new_order[i].measurement.get_name_with_id() for i in positions]
+            self.assertEqual(names, ["meas_0", "meas_1", "meas_2"])
+
+    def test_pinned_todos_keep_their_place(self):
+        shuffled = list(self.devices)
+        random.shuffle(shuffled)
+        todos = [make_todo(d) for d in shuffled]
+        todos[7].pinned = True
+        todos[13].pinned = True
+
+        new_order, report = optimize_todo_order(todos)
+
+        self.assertIs(new_order[7], todos[7])
+        self.assertIs(new_order[13], todos[13])
+        self.assertCountEqual(new_order[:7], todos[:7])
+        self.assertCountEqual(new_order[8:13], todos[8:13])
+        self.assertLessEqual(report.travel_after, report.travel_before)
+
+    def test_empty_queue(self):
+        new_order, report = optimize_todo_order([])
+        self.assertEqual(new_order, [])
+        self.assertEqual(report.n_todos, 0)
+
+    def test_reconfiguration_estimate(self):
+        todos = [make_todo(self.devices[0], parameters=range_params(-10.0, comment='a')),
+                 make_todo(self.devices[1], parameters=range_params(-10.0, comment='b')),
+                 make_todo(self.devices[2], parameters=range_params(0.0))]
+
+        n_reconf, time_s = estimate_reconfigurations(todos, reconfiguration_times={'range': 1.5})
+
+        # comments do not count, the first setting is counted as well
+        self.assertEqual(n_reconf, 2)
+        self.assertAlmostEqual(time_s, 3.0)
+
+    def test_settings_are_traversed_alternately_per_device(self):
+        todos = []
+        for d in self.devices[:3]:
+            todos.append(make_todo(d, name="low", parameters=range_params(-10.0)))
+            todos.append(make_todo(d, name="high", parameters=range_params(0.0)))
+
+        new_order, report = optimize_todo_order(todos)
+
+        names = [t.measurement.get_name_with_id() for t in new_order]
+        self.assertEqual(names, ["low", "high", "high", "low", "low", "high"])
+        self.assertEqual(report.reconfigurations_before, 6)
+        self.assertEqual(report.reconfigurations_after, 4)
+        self.assertAlmostEqual(report.travel_after, report.travel_before)
+
+    def test_travel_distances_in_blocks(self):
+        positions = np.random.RandomState(0).uniform(0, 1e4, size=(600, 2, 2))
+        dist = travel_distances(positions)
+
+        # longest distance any stage moves, computed densely
+        diff = positions[:, np.newaxis, :, :] - positions[np.newaxis, :, :, :]
+        expected = np.max(np.linalg.norm(diff, axis=-1), axis=-1)
+        self.assertEqual(dist.dtype, np.float32)
+        np.testing.assert_allclose(dist, expected, rtol=1e-6)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException
+
+
+class FakeSCPIResource:
+    """ Mocked VISA resource which executes compound SCPI messages like a Keysight mainframe. """
+
+    def __init__(self):
+        self.settings = {':POW': '1.0', ':WAV': '1550.0', ':UNIT': 'dBm', ':SOUR:WAV': '1550.0', ':SOUR:POW': '0.0'}
+        self.esr = 0
+        self.error_queue = []
+        self.n_round_trips = 0
+        self.session = 1
+
+    def _execute(self, unit):
+        if unit == '*ESR?':
+            esr, self.esr = self.esr, 0
+            return str(esr)
+        if unit == '*OPC?':
+            return '1'
+        if unit == '*IDN?':
+            return 'Keysight Technologies,Fake'
+        if unit == ':SYST:ERR?':
+            return self.error_queue.pop(0) if self.error_queue else '+0,"No error"'
+        header = unit.split(' ')[0]
+        if header.endswith('?') and header[:-1] in self.settings:
+            return self.settings[header[:-1]]
+        if not header.endswith('?') and header in self.settings:
+            self.settings[header] = unit.split(' ', 1)[1]
+            return None
+        self.esr |= 0x20  # command error
+        self.error_queue.append('-113,"Undefined header"')
+        return None
+
+    @staticmethod
+    def _resolve_headers(message):
+        """ Makes the headers of all message units absolute, following the SCPI header path rules. """
+        path = []
+        for unit in message.split(';'):
+            if not unit.startswith('*'):
+                header, _, args = unit.partition(' ')
+                nodes = header.lstrip(':').split(':') if header.startswith(':') else path + header.split(':')
+                path = nodes[:-1]
+                unit = ':' + ':'.join(nodes) + (' ' + args if args else '')
+            yield unit
+
+    def write(self, message):
+        self.n_round_trips += 1
+        for unit in self._resolve_headers(message):
+            self._execute(unit)
+
+    def query(self, message):
+        self.n_round_trips += 1
+        answers = [self._execute(unit) for unit in self._resolve_headers(message)]
+        return ';'.join(a for a in answers if a is not None) + '\n'
+
+
+class FakeKeysightLaser(Instrument):
+
+    batch_max_length = 512
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.networked_instrument_properties.extend(['power', 'wavelength', 'unit'])
+
+    @property
+    def power(self):
+        return float(self.request(':POW?'))
+
+    @power.setter
+    def power(self, power):
+        self.command(':POW {:f}'.format(power))
+
+    @property
+    def wavelength(self):
+        return float(self.request(':WAV?'))
+
+    @wavelength.setter
+    def wavelength(self, wavelength):
+        self.command(':WAV {:f}'.format(wavelength))
+
+    @property
+    def unit(self):
+        return self.request(':UNIT?').strip()
+
+    @unit.setter
+    def unit(self, unit):
+        self.command(':UNIT ' + unit)
+
+
+class InstrumentBatchTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.resource = FakeSCPIResource()
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            self.instr = FakeKeysightLaser(visa_address='TCPIP::fake::INSTR')
+        self.instr.open()
+
+    def tearDown(self) -> None:
+        self.instr._inst = None  # nothing to close
+
+    def _setup_commands(self):
+        for i in range(5):
+            self.instr.unit = 'dBm'
+            self.instr.power = 1.0 + i
+            self.instr.wavelength = 1550.0 + i
+
+    def test_batch_reduces_round_trips(self):
+        self._setup_commands()
+        unbatched = self.resource.n_round_trips
+        self.resource.n_round_trips = 0
+
+        with self.instr.batch():
+            self._setup_commands()
+        batched = self.resource.n_round_trips
+
+        # write, *OPC? and SYST:ERR? per command vs. few compound messages and one error queue read
+        self.assertEqual(unbatched, 45)
+        self.assertLessEqual(batched, 4)
+        self.assertEqual(self.resource.settings[':WAV'], '1554.000000')
+        self.assertEqual(self.resource.settings[':POW'], '5.000000')
+
+    def test_queries_in_batch_see_pending_commands(self):
+        with self.instr.batch():
+            self.instr.power = 7.0
+            self.assertEqual(self.instr.power, 7.0)
+            self.instr.wavelength = 1560.0
+        self.assertEqual(self.resource.settings[':WAV'], '1560.000000')
+
+    def test_errors_are_attributed_to_the_offending_command(self):
+        with self.assertRaises(InstrumentException) as ctx:
+            with self.instr.batch():
+                self.instr.power = 2.0
+                self.instr.command(':BOGUS 1')
+                self.instr.wavelength = 1555.0
+        self.assertIn(':BOGUS 1', str(ctx.exception))
+        self.assertNotIn(':POW', str(ctx.exception))
+        self.assertIn('Undefined header', str(ctx.exception))
+        # the commands after the failing one are still executed, as without batching
+        self.assertEqual(self.resource.settings[':WAV'], '1555.000000')
+
+    def test_metadata_queries_are_read_ahead(self):
+        self.instr.get_instrument_parameter()  # records the queries of the properties
+        self.resource.n_round_trips = 0
+
+        params = self.instr.get_instrument_parameter()
+        self.assertEqual(params['unit'], 'dBm')
+        self.assertEqual(params['power'], 1.0)
+        # *IDN?, one message for all properties and one error queue read
+        self.assertEqual(self.resource.n_round_trips, 3)
+
+    def test_batching_is_disabled_without_batch_max_length(self):
+        self.instr.batch_max_length = None
+        with self.instr.batch():
+            self.instr.power = 3.0
+            self.assertEqual(self.resource.n_round_trips, 3)
+
+    def test_headers_without_leading_colon(self):
+        with self.instr.batch():
+            self.instr.command('SOUR:WAV 1560.0')
+            self.instr.command('SOUR:POW 2.0')
+            self.assertEqual(self.instr.request('SOUR:WAV?'), '1560.0')
+        self.assertEqual(self.resource.settings[':SOUR:POW'], '2.0')
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from LabExT.Instruments.InstrumentAPI import InstrumentException, ERROR_CHECK_ALWAYS, ERROR_CHECK_DEFERRED, \
+    ERROR_CHECK_SAMPLED
+from LabExT.Tests.Instruments.InstrumentBatch_test import FakeSCPIResource, FakeKeysightLaser
+
+
+class CountingSCPIResource(FakeSCPIResource):
+    """ Fake resource which counts the reads of the error queue. """
+
+    def __init__(self):
+        super().__init__()
+        self.n_error_reads = 0
+
+    def _execute(self, unit):
+        if unit == ':SYST:ERR?':
+            self.n_error_reads += 1
+        return super()._execute(unit)
+
+
+class InstrumentErrorChecksTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.resource = CountingSCPIResource()
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            self.instr = FakeKeysightLaser(visa_address='TCPIP::fake::INSTR')
+        self.instr.open()
+
+    def tearDown(self) -> None:
+        self.instr._inst = None  # nothing to close
+
+    def test_always_checks_every_call(self):
+        for _ in range(4):
+            self.instr.power = 1.0
+            _ = self.instr.power
+        self.assertEqual(self.resource.n_error_reads, 8)
+        with self.assertRaises(InstrumentException):
+            self.instr.command(':BOGUS 1')
+
+    def test_deferred_errors_are_raised_by_flush(self):
+        self.instr.error_check_policy = ERROR_CHECK_DEFERRED
+        self.instr.command(':BOGUS 1')
+        for _ in range(10):
+            _ = self.instr.power
+        self.instr.command(':BOGUS 2')
+        self.assertEqual(self.resource.n_error_reads, 0)
+
+        with self.assertRaises(InstrumentException) as ctx:
+            self.instr.flush_errors()
+        self.assertEqual(str(ctx.exception).count('Undefined header'), 2)
+
+        # nothing left to check
+        self.instr.flush_errors()
+        self.assertEqual(self.resource.n_error_reads, 3)
+
+    def test_sampled_checks_every_n_calls(self):
+        with self.instr.error_checks(ERROR_CHECK_SAMPLED, interval=5):
+            for _ in range(12):
+                _ = self.instr.power
+            self.assertEqual(self.resource.n_error_reads, 2)
+        # flushed when leaving the context, the previous policy is restored
+        self.assertEqual(self.resource.n_error_reads, 3)
+        self.assertEqual(self.instr.error_check_policy, ERROR_CHECK_ALWAYS)
+
+    def test_low_level_io_never_reads_the_error_queue(self):
+        with self.instr.error_checks(ERROR_CHECK_SAMPLED, interval=2):
+            for _ in range(10):
+                self.instr.query(':POW?')
+                self.instr.write(':POW 1.0')
+        self.assertEqual(self.resource.n_error_reads, 0)
+
+    def test_error_checks_context_raises_accumulated_errors(self):
+        with self.assertRaises(InstrumentException):
+            with self.instr.error_checks(ERROR_CHECK_DEFERRED):
+                self.instr.power = 2.0
+                self.instr.command(':BOGUS 1')
+        self.assertEqual(self.resource.settings[':POW'], '2.000000')
+
+        with self.assertRaises(ValueError):
+            with self.instr.error_checks('sometimes'):
+                pass
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from LabExT.Instruments.InstrumentAPI import Instrument
+
+
+class FakeLaser(Instrument):
+    """ Instrument driver talking to a mocked VISA resource which stores the written settings. """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.networked_instrument_properties.extend(['power', 'unit', 'max_lambda', 'temperature'])
+        self.static_instrument_properties.extend(['max_lambda'])
+        self.volatile_instrument_properties.extend(['temperature'])
+        self.dependent_instrument_properties.update({'unit': ['power']})
+
+    @property
+    def power(self):
+        return float(self.query(':POW?'))
+
+    @power.setter
+    def power(self, power):
+        self.write(':POW {:f}'.format(power))
+
+    @property
+    def unit(self):
+        return self.query(':UNIT?')
+
+    @unit.setter
+    def unit(self, unit):
+        self.write(':UNIT ' + unit)
+
+    @property
+    def max_lambda(self):
+        return float(self.query(':WAV:MAX?'))
+
+    @property
+    def temperature(self):
+        return float(self.query(':TEMP?'))
+
+
+class InstrumentMetadataCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.settings = {':POW?': '1.0', ':UNIT?': 'dBm', ':WAV:MAX?': '1640.0', ':TEMP?': '25.0', '*IDN?': 'Fake'}
+        self.resource = Mock()
+        self.resource.query.side_effect = self.settings.get
+        self.resource.write.side_effect = self._write
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            self.instr = FakeLaser(visa_address='TCPIP::fake::INSTR')
+        self.instr.open()
+
+    def _write(self, cmd):
+        name, value = cmd.split(' ')
+        self.settings[name + '?'] = value
+
+    def queried(self):
+        queries = [c[0][0] for c in self.resource.query.call_args_list]
+        self.resource.query.reset_mock()
+        return queries
+
+    def test_full_metadata_reads_everything(self):
+        self.instr.get_instrument_parameter()
+        params = self.instr.get_instrument_parameter()
+        self.assertEqual(self.queried().count(':WAV:MAX?'), 2)
+        self.assertEqual(params['power'], 1.0)
+        self.assertEqual(params['idn'], 'Fake')
+
+    def test_fast_metadata_only_rereads_dirty_and_volatile_properties(self):
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.queried()
+
+        params = self.instr.get_instrument_parameter(use_cache=True)
+        self.assertListEqual(self.queried(), [':TEMP?'])
+        self.assertEqual(params['max_lambda'], 1640.0)
+
+        self.instr.power = 3.0
+        params = self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), [':POW?', ':TEMP?'])
+        self.assertEqual(params['power'], 3.0)
+
+        # dependent properties get dirty too
+        self.instr.unit = 'W'
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), [':POW?', ':UNIT?', ':TEMP?'])
+
+    def test_measurements_on_a_reused_session_only_reread_dirty_and_volatile_properties(self):
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.instr.close()
+        self.queried()
+
+        for power in (3.0, 4.0):
+            # what a measurement does: open, set, close, then the metadata snapshot opens the instrument again
+            self.instr.open()
+            self.instr.power = power
+            self.instr.close()
+            params = self.instr.get_instrument_parameter(use_cache=True)
+            self.assertCountEqual(self.queried(), [':POW?', ':TEMP?'])
+            self.assertEqual(params['power'], power)
+
+    def test_raw_writes_invalidate_everything_but_static_properties(self):
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.queried()
+
+        self.instr.write(':POW 5.0')
+        params = self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), [':POW?', ':UNIT?', ':TEMP?'])
+        self.assertEqual(params['power'], 5.0)
+
+        self.instr.invalidate_metadata_cache(include_static=True)
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), ['*IDN?', ':POW?', ':UNIT?', ':WAV:MAX?', ':TEMP?'])
+
+    def test_changes_through_other_drivers_invalidate(self):
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            other = FakeLaser(visa_address='TCPIP::fake::INSTR')
+        other.open()
+
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.queried()
+
+        # e.g. the laser driver of another measurement sets the power
+        other.power = 4.0
+        params = self.instr.get_instrument_parameter(use_cache=True)
+        self.assertEqual(params['power'], 4.0)
+        self.assertCountEqual(self.queried(), [':POW?', ':TEMP?'])
+
+        other.write(':UNIT W')
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), [':POW?', ':UNIT?', ':TEMP?'])
+        other._inst = None
+
+    def test_new_session_forgets_everything_but_static_properties(self):
+        self.instr.get_instrument_parameter(use_cache=True)
+        self.queried()
+
+        self.settings[':POW?'] = '2.0'  # changed on the front panel while we were not connected
+        self.instr.close()
+        self.resource.lrm_first_open_done = set()  # the idle session was closed, a new one is opened
+        self.instr.open()
+        params = self.instr.get_instrument_parameter(use_cache=True)
+        self.assertCountEqual(self.queried(), [':POW?', ':UNIT?', ':TEMP?'])
+        self.assertEqual(params['power'], 2.0)
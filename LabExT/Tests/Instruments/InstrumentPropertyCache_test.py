@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import unittest
+from unittest.mock import Mock, patch
+
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentException, ERROR_CHECK_DEFERRED, \
+    cached_instrument_property, keeps_property_cache
+from LabExT.Instruments.PowerMeterGenericKeysight import PowerMeterGenericKeysight
+from LabExT.Tests.Instruments.InstrumentBatch_test import FakeSCPIResource
+
+
+class CountingSCPIResource(FakeSCPIResource):
+    """ Fake resource which records all message units sent to it. """
+
+    def __init__(self):
+        super().__init__()
+        self.settings[':READ:POW'] = '-10.0'
+        self.units = []
+
+    def _execute(self, unit):
+        self.units.append(unit)
+        if unit in ('*RST', ':TRIG', ':SWEEP'):
+            return None
+        return super()._execute(unit)
+
+    def sent(self):
+        units, self.units = self.units, []
+        return [u for u in units if u not in ('*OPC?', ':SYST:ERR?')]
+
+
+class CachedFakeLaser(Instrument):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.networked_instrument_properties.extend(['wavelength', 'power', 'unit'])
+        self.dependent_instrument_properties.update({'unit': ['power']})
+
+    @cached_instrument_property
+    def wavelength(self):
+        """ wavelength [nm] """
+        return float(self.request(':WAV?'))
+
+    @wavelength.setter
+    def wavelength(self, wavelength):
+        self.command(':WAV {:f}'.format(wavelength))
+
+    @cached_instrument_property
+    def power(self):
+        return float(self.request(':POW?'))
+
+    @power.setter
+    def power(self, power):
+        self.command(':POW {:f}'.format(power))
+
+    @cached_instrument_property
+    def unit(self):
+        return self.request(':UNIT?').strip()
+
+    @unit.setter
+    def unit(self, unit):
+        self.command(':UNIT ' + unit)
+
+    @cached_instrument_property(volatile=True)
+    def reading(self):
+        return float(self.request(':READ:POW?'))
+
+    @keeps_property_cache
+    def trigger(self):
+        self.command(':TRIG')
+
+    def sweep(self):
+        self.command(':SWEEP')
+
+
+class InstrumentPropertyCacheTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.resource = CountingSCPIResource()
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            self.instr = CachedFakeLaser(visa_address='TCPIP::fake::INSTR')
+        self.instr.open()
+
+    def tearDown(self) -> None:
+        self.instr._inst = None  # nothing to close
+
+    def test_reads_are_cached_until_set(self):
+        self.assertEqual(self.instr.wavelength, 1550.0)
+        self.assertEqual(self.instr.wavelength, 1550.0)
+        self.assertEqual(self.resource.sent(), [':WAV?'])
+
+        self.instr.wavelength = 1560.0
+        self.assertEqual(self.instr.wavelength, 1560.0)  # read back, instruments might round the set value
+        self.assertEqual(self.instr.wavelength, 1560.0)
+        self.assertEqual(self.resource.sent(), [':WAV 1560.000000', ':WAV?'])
+        self.assertEqual(self.instr.property_cache_stats, {'hits': 2, 'misses': 2, 'elided writes': 0})
+        self.assertEqual(CachedFakeLaser.wavelength.__doc__.strip(), 'wavelength [nm]')
+
+    def test_redundant_writes_are_skipped(self):
+        for _ in range(3):
+            self.instr.unit = 'dBm'
+            self.instr.power = 3.0
+            self.instr.trigger()
+        self.assertEqual(self.resource.sent(), [':UNIT dBm', ':POW 3.000000', ':TRIG', ':TRIG', ':TRIG'])
+        self.assertEqual(self.instr.property_cache_stats['elided writes'], 4)
+
+        # the value which was read is not written again either
+        _ = self.instr.wavelength
+        self.instr.wavelength = 1550.0
+        self.assertEqual(self.resource.sent(), [':WAV?'])
+
+        # setting the unit makes the power dirty
+        self.instr.unit = 'Watt'
+        self.instr.power = 3.0
+        self.assertEqual(self.resource.sent(), [':UNIT Watt', ':POW 3.000000'])
+
+    def test_reset_and_other_writes_invalidate(self):
+        self.instr.power = 3.0
+        _ = self.instr.wavelength
+        self.instr.reset()
+        self.instr.power = 3.0
+        _ = self.instr.wavelength
+        self.instr.sweep()
+        _ = self.instr.wavelength
+        self.assertEqual(self.resource.sent(), [':POW 3.000000', ':WAV?', '*RST', ':POW 3.000000', ':WAV?',
+                                                ':SWEEP', ':WAV?'])
+
+    def test_volatile_properties_are_never_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.instr.reading, -10.0)
+        self.assertEqual(self.resource.sent(), [':READ:POW?'] * 3)
+
+    def test_failed_writes_are_not_remembered(self):
+        self.instr.error_check_policy = ERROR_CHECK_DEFERRED
+        self.instr.power = 3.0
+        self.instr.command(':BOGUS 1')
+        with self.assertRaises(InstrumentException):
+            self.instr.flush_errors()
+        self.resource.sent()
+        # after an error, nothing is known to be applied anymore
+        self.instr.power = 3.0
+        self.assertEqual(self.resource.sent(), [':POW 3.000000'])
+
+    def test_full_metadata_reads_from_instrument(self):
+        _ = self.instr.wavelength
+        self.resource.sent()
+        params = self.instr.get_instrument_parameter()
+        self.assertEqual(params['wavelength'], 1550.0)
+        self.assertIn(':WAV?', self.resource.sent())
+
+    def test_drivers_sharing_an_instrument_see_each_others_writes(self):
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            other = CachedFakeLaser(visa_address='TCPIP::fake::INSTR')
+        other.open()
+
+        self.instr.wavelength = 1550.5
+        other.wavelength = 1310.0
+        self.instr.wavelength = 1550.5  # must not be skipped, the laser is at 1310 nm now
+        self.assertEqual(self.resource.settings[':WAV'], '1550.500000')
+        self.assertEqual(other.wavelength, 1550.5)
+
+        other.sweep()  # unknown changes invalidate the caches of all drivers
+        self.resource.sent()
+        self.instr.wavelength = 1550.5
+        self.assertEqual(self.resource.sent(), [':WAV 1550.500000'])
+        other._inst = None
+
+    def test_reopening_a_reused_session_keeps_written_values(self):
+        self.instr.power = 3.0
+        self.instr.close()
+        self.instr.open()  # the resource manager hands out the same session again
+        self.instr.power = 3.0
+        self.assertEqual(self.resource.sent(), [':POW 3.000000'])
+        self.assertEqual(self.instr.property_cache_stats['elided writes'], 1)
+
+    def test_new_session_forgets_written_values(self):
+        self.instr.power = 3.0
+        self.instr.close()
+        self.resource.settings[':POW'] = '0.0'  # e.g. changed on the front panel
+        self.resource.lrm_first_open_done = set()  # the idle session was closed, a new one is opened
+        self.instr.open()
+        self.resource.sent()
+        self.instr.power = 3.0
+        self.assertEqual(self.resource.sent(), [':POW 3.000000'])
+
+    def test_power_meter_drivers_share_the_average_time(self):
+        self.resource.settings.update({':SENS1:POW:ATIME': '0.2', ':trig1:inp': 'ign', ':trig1:outp': 'dis',
+                                       ':sens1:func:par:logg': '1,0.2s'})
+        self.resource.timeout = 10000
+        rm = Mock()
+        rm.open_resource.return_value = self.resource
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            first = PowerMeterGenericKeysight(visa_address='TCPIP::fake::INSTR', channel=1)
+            second = PowerMeterGenericKeysight(visa_address='TCPIP::fake::INSTR', channel=1)
+        first.open()
+        second.open()
+
+        first.averagetime = 1.0
+        self.resource.settings[':SENS1:POW:ATIME'] = '1.0'  # the fake does not understand the unit of the set value
+        second.averagetime = 1.0  # skipped, but the logging must still use the set average time
+        second.logging_setup(n_measurement_points=100)
+        self.assertEqual(self.resource.settings[':sens1:func:par:logg'], '100,1.000000s')
+        self.assertEqual(self.resource.sent().count(':SENS1:POW:ATIME 1.000000 s'), 1)
+        first._inst = second._inst = None
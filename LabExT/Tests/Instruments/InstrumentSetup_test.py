@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from LabExT.Instruments.InstrumentAPI import Instrument, InstrumentSetupError, open_instruments
+from LabExT.Instruments.InstrumentAPI.InstrumentSetup import create_instrument_objs_impl
+
+
+class SlowInstrument(Instrument):
+    """
+    Instrument whose connection takes some time to open. Records the maximum number of concurrent opens per address,
+    and of all instruments with count_in_total set under the key 'total'.
+    """
+
+    open_delay = 0.2
+    count_in_total = True
+    lock = threading.Lock()
+    n_opening = {}
+    max_opening = {}
+
+    def __init__(self, *args, fail=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = fail
+        self.is_open = False
+
+    def open(self):
+        address = self._address
+        keys = (address, 'total') if self.count_in_total else (address,)
+        with self.lock:
+            for key in keys:
+                self.n_opening[key] = self.n_opening.get(key, 0) + 1
+                self.max_opening[key] = max(self.max_opening.get(key, 0), self.n_opening[key])
+        time.sleep(self.open_delay)
+        with self.lock:
+            for key in keys:
+                self.n_opening[key] -= 1
+        if self.fail:
+            raise ConnectionError('no answer from ' + address)
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+
+class BrokenInstrument(Instrument):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        raise ValueError('Argument channel must be 1, 2, 3, or 4.')
+
+
+class HangingInstrument(Instrument):
+    """ Instrument whose setup hangs until its VISA session is closed. """
+
+    session_closed = threading.Event()
+
+    def on_first_open(self):
+        self.session_closed.wait(5)
+        raise ConnectionError('session closed')
+
+
+class InstrumentSetupTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        SlowInstrument.n_opening.clear()
+        SlowInstrument.max_opening.clear()
+        SlowInstrument.open_delay = 0.2
+
+    def test_instruments_are_opened_concurrently(self):
+        instruments = [SlowInstrument(visa_address='TCPIP::{:d}::INSTR'.format(i)) for i in range(4)]
+        start = time.monotonic()
+        open_instruments(instruments)
+        self.assertLess(time.monotonic() - start, 0.6)  # 0.8s when opened one after the other
+        self.assertTrue(all(instr.is_open for instr in instruments))
+
+    def test_instruments_on_the_same_resource_are_opened_one_after_the_other(self):
+        instruments = [SlowInstrument(visa_address='TCPIP::mainframe::INSTR', channel=ch) for ch in range(3)]
+        open_instruments(instruments)
+        self.assertEqual(SlowInstrument.max_opening['TCPIP::mainframe::INSTR'], 1)
+
+    def test_all_errors_are_reported(self):
+        instruments = [SlowInstrument(visa_address='TCPIP::good::INSTR'),
+                       SlowInstrument(visa_address='TCPIP::bad1::INSTR', fail=True),
+                       SlowInstrument(visa_address='TCPIP::bad2::INSTR', fail=True)]
+        with self.assertRaises(InstrumentSetupError) as ctx:
+            open_instruments(instruments)
+        self.assertEqual(len(ctx.exception.errors), 2)
+        self.assertIn('bad1', str(ctx.exception))
+        self.assertIn('bad2', str(ctx.exception))
+        # the instrument which could be opened is closed again
+        self.assertFalse(instruments[0].is_open)
+
+    def test_timed_out_instruments_are_reported_and_closed(self):
+        SlowInstrument.open_delay = 0.3
+        slow = SlowInstrument(visa_address='TCPIP::slow::INSTR')
+        with self.assertRaises(InstrumentSetupError) as ctx:
+            open_instruments([slow], timeout=0.05)
+        self.assertIn('timed out', str(ctx.exception))
+        time.sleep(0.5)
+        self.assertFalse(slow.is_open)
+
+    def test_timeout_applies_to_each_instrument(self):
+        hanging = SlowInstrument(visa_address='TCPIP::mainframe::INSTR', channel=1)
+        hanging.open_delay = 0.5
+        queued = SlowInstrument(visa_address='TCPIP::mainframe::INSTR', channel=2)
+        other = SlowInstrument(visa_address='TCPIP::other::INSTR')
+        with self.assertRaises(InstrumentSetupError) as ctx:
+            open_instruments([hanging, queued, other], timeout=0.3)
+        self.assertEqual(len(ctx.exception.errors), 2)
+        self.assertIn('channel 1 at TCPIP::mainframe::INSTR: timed out', ctx.exception.errors[0])
+        # not opened on the session blocked by the hanging instrument
+        self.assertIn('not run', ctx.exception.errors[1])
+        self.assertFalse(queued.is_open)
+        self.assertFalse(other.is_open)
+
+    def test_timed_out_workers_do_not_take_new_tasks(self):
+        hanging = SlowInstrument(visa_address='TCPIP::hanging::INSTR')
+        hanging.open_delay = 0.3
+        hanging.count_in_total = False  # its worker does not count anymore once it timed out
+        others = [SlowInstrument(visa_address='TCPIP::{:d}::INSTR'.format(i)) for i in range(4)]
+        SlowInstrument.open_delay = 0.1
+        with self.assertRaises(InstrumentSetupError) as ctx:
+            open_instruments([hanging] + others, timeout=0.15, max_workers=1)
+        self.assertEqual(len(ctx.exception.errors), 1)
+        # the replacement worker opens the others, the worker of the timed out instrument must not join in
+        self.assertEqual(SlowInstrument.max_opening['total'], 1)
+
+    def test_hanging_sessions_are_closed(self):
+        rm = Mock()
+        rm.open_resource.return_value.lrm_first_open_done = set()
+        rm.force_close_resource.side_effect = lambda resource: HangingInstrument.session_closed.set()
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', rm):
+            hanging = HangingInstrument(visa_address='TCPIP::hanging::INSTR')
+
+        with self.assertRaises(InstrumentSetupError):
+            open_instruments([hanging], timeout=0.1)
+        rm.force_close_resource.assert_called_once_with(rm.open_resource.return_value)
+        hanging._inst = None
+
+    def test_instruments_with_the_same_label_are_all_closed(self):
+        twins = [SlowInstrument(visa_address='TCPIP::twin::INSTR') for _ in range(2)]
+        bad = SlowInstrument(visa_address='TCPIP::bad::INSTR', fail=True)
+        with self.assertRaises(InstrumentSetupError):
+            open_instruments(twins + [bad])
+        self.assertFalse(any(instr.is_open for instr in twins))
+
+    def test_create_instruments_collects_errors(self):
+        api = Mock()
+        api.instruments = {'SlowInstrument': SlowInstrument, 'BrokenInstrument': BrokenInstrument}
+        selected = {'Laser': {'visa': 'TCPIP::laser::INSTR', 'class': 'SlowInstrument'},
+                    'Power Meter': {'visa': 'TCPIP::pm::INSTR', 'class': 'BrokenInstrument', 'channel': 7},
+                    'OSA': {'visa': 'TCPIP::osa::INSTR', 'class': 'NotLoaded'}}
+        initialized = {('Laser', 'OldClass'): None}
+
+        errors = create_instrument_objs_impl(api, ['Laser', 'Power Meter', 'OSA', 'SMU'], selected, initialized)
+
+        self.assertEqual(len(errors), 3)
+        self.assertEqual([e.split(' ')[0] for e in errors], ['Power', 'OSA:', 'SMU:'])
+        self.assertIsInstance(initialized[('Laser', 'SlowInstrument')], SlowInstrument)
+        self.assertNotIn(('Laser', 'OldClass'), initialized)
+        self.assertIsNone(initialized[('Power Meter', 'BrokenInstrument')])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+import pyvisa
+
+from LabExT.Instruments.InstrumentAPI import Instrument
+from LabExT.Instruments.ReusingResourceManager import ReusingResourceManager
+
+
+class FakeSession:
+    """ Mocked VISA session counting the queries sent to it. """
+
+    def __init__(self):
+        self.closed = False
+        self.queries = []
+        self.session = 1
+
+    def query(self, message):
+        if self.closed:
+            raise pyvisa.VisaIOError(pyvisa.constants.StatusCode.error_connection_lost)
+        self.queries.append(message)
+        return '0\n'
+
+    def close(self):
+        self.closed = True
+
+
+class SetupCountingInstrument(Instrument):
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.n_first_opens = 0
+
+    def on_first_open(self):
+        super().on_first_open()
+        self.n_first_opens += 1
+
+
+class ReusingResourceManagerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # use a fresh instance instead of the singleton shared with other tests
+        self._prev_inst_ref = ReusingResourceManager._inst_ref
+        ReusingResourceManager._inst_ref = None
+        with patch('LabExT.Instruments.ReusingResourceManager.get_visa_session_idle_timeout', return_value=None):
+            self.rm = ReusingResourceManager('@py')
+
+        self.sessions = []
+        opener = patch.object(pyvisa.ResourceManager, 'open_resource', side_effect=self._new_session)
+        opener.start()
+        self.addCleanup(opener.stop)
+
+    def tearDown(self) -> None:
+        ReusingResourceManager._inst_ref = self._prev_inst_ref
+
+    def _new_session(self, *args, **kwargs):
+        self.sessions.append(FakeSession())
+        return self.sessions[-1]
+
+    def test_released_sessions_are_reused(self):
+        for _ in range(3):
+            res = self.rm.open_resource('TCPIP::fake::INSTR')
+            self.rm.close_resource(res)
+        self.assertEqual(len(self.sessions), 1)
+        self.assertFalse(self.sessions[0].closed)
+        self.assertEqual(self.sessions[0].queries, ['*STB?', '*STB?'])
+        self.assertEqual(self.rm.lrm_opened_resources['TCPIP::fake::INSTR'].counter, 0)
+
+        self.rm.close_idle_resources()
+        self.assertTrue(self.sessions[0].closed)
+        self.assertEqual(self.rm.lrm_opened_resources, {})
+
+    def test_unhealthy_sessions_are_replaced(self):
+        res = self.rm.open_resource('TCPIP::fake::INSTR')
+        self.rm.close_resource(res)
+        res.closed = True  # e.g. the instrument was power cycled
+
+        new_res = self.rm.open_resource('TCPIP::fake::INSTR')
+        self.assertIsNot(new_res, res)
+        self.assertEqual(len(self.sessions), 2)
+
+    def test_idle_sessions_are_closed_after_timeout(self):
+        self.rm.lrm_idle_timeout = 0.05
+        res = self.rm.open_resource('TCPIP::fake::INSTR')
+        self.rm.close_resource(res)
+        for _ in range(100):
+            if res.closed:
+                break
+            time.sleep(0.01)
+        self.assertTrue(res.closed)
+        self.assertEqual(self.rm.lrm_opened_resources, {})
+
+        self.rm.lrm_idle_timeout = 0
+        res = self.rm.open_resource('TCPIP::fake::INSTR')
+        self.rm.close_resource(res)
+        self.assertTrue(res.closed)
+
+    def test_first_open_hook_runs_once_per_session(self):
+        with patch('LabExT.Instruments.InstrumentAPI._Instrument.RESOURCE_MANAGER', self.rm):
+            instr = SetupCountingInstrument(visa_address='TCPIP::fake::INSTR', channel=1)
+            other_channel = SetupCountingInstrument(visa_address='TCPIP::fake::INSTR', channel=2)
+        for _ in range(3):
+            instr.open()
+            other_channel.open()
+            instr.close()
+            other_channel.close()
+        self.assertEqual((instr.n_first_opens, other_channel.n_first_opens), (1, 1))
+
+        self.rm.close_idle_resources()
+        instr.open()
+        self.assertEqual(instr.n_first_opens, 2)
+        instr.close()
+        self.rm.close_idle_resources()
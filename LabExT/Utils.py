@@ -14,8 +14,8 @@ import pkg_resources
 from os import makedirs
 from os.path import join, dirname, abspath, exists, basename
 from pathlib import Path
-from tkinter import Toplevel, ttk, Label
 
+import numpy as np
 import unicodedata
 
 
@@ -112,6 +112,24 @@ def get_visa_lib_string():
             cfg_content = json.load(fp)
         return cfg_content['Visa Library Path']
 
+
+def get_visa_session_idle_timeout():
+    """
+    Gets the time in seconds a released VISA session is kept open for reuse, as specified in the LabExT settings.
+
+    Returns
+    -------
+    The idle timeout in seconds, or None if it is not specified in the settings file.
+    """
+    cfg_path = get_configuration_file_path('instruments.config', ignore_missing=True)
+    if not os.path.isfile(cfg_path):
+        return None
+    with open(cfg_path, 'r') as fp:
+        cfg_content = json.load(fp)
+    timeout = cfg_content.get('Visa Session Idle Timeout')
+    return None if timeout is None else float(timeout)
+
+
 def get_visa_address(name):
     """Gets the VISA addresses of all wanted instruments, as
     specified in instruments.config file.
@@ -176,6 +194,20 @@ def find_dict_with_ignore(target, search_list, ignore_keys):
     return None
     
 
+class NumpyJSONEncoder(json.JSONEncoder):
+    """
+    JSON encoder which additionally serializes NumPy arrays as lists and NumPy scalars as Python numbers. Use it with
+    json.dump(obj, fp, cls=NumpyJSONEncoder).
+    """
+
+    def default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+        return super().default(o)
+
+
 def make_filename_compliant(value, force_lower=False):
     """
     Makes a string filename compliant.
@@ -249,6 +281,9 @@ def run_with_wait_window(tk_root, description: str, function):
     You must supply a description string.
     This function does not provide a return value.
     """
+    # imported here such that the utilities stay usable without Tk, e.g. in the headless batch runner
+    from tkinter import Toplevel, ttk, Label
+
     new_window = Toplevel(tk_root)
     new_window.attributes('-topmost', 'true')
     prog = ttk.Progressbar(new_window, mode='indeterminate')
@@ -5,12 +5,13 @@ LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
 This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
 """
 
-import json
 import logging
 from collections import OrderedDict
 from tkinter import Toplevel, Label, Checkbutton, Button, Text, IntVar, Entry, Frame
 from tkinter.scrolledtext import ScrolledText
 
+from LabExT.Experiments.Annotations import USER_FLAGS_KEY, USER_COMMENT_KEY, USER_PLOT_LABEL_KEY, write_annotations
+from LabExT.Experiments.ResultCatalog import ResultCatalog
 from LabExT.View.Controls.CustomFrame import CustomFrame
 from LabExT.View.Controls.KeyboardShortcutButtonPress import callback_if_btn_enabled
 
@@ -23,9 +24,9 @@ class CommentsEditor:
     default_comment = "add comment here..."
     default_flags = ["Important !", "Valid #", "Questionable ?"]
 
-    meas_flags_key = "user flags"
-    meas_comment_key = "user comment"
-    meas_plot_legend_key = "user plot label"
+    meas_flags_key = USER_FLAGS_KEY
+    meas_comment_key = USER_COMMENT_KEY
+    meas_plot_legend_key = USER_PLOT_LABEL_KEY
 
     def __init__(self, parent, measurement_dict, callback_on_save=None):
         """
@@ -207,7 +208,7 @@ class CommentsEditor:
 
     def save_changes(self):
         """
-        Save the changes made to the flags and the comment to file.
+        Save the changes made to the flags and the comment to the annotations sidecar of the result file.
         """
         checked_flags = [k for k, v in self.available_flags.items() if v.get() == 1]
 
@@ -221,10 +222,13 @@ class CommentsEditor:
         self.meas_dict[self.meas_comment_key] = comment_text
         self.meas_dict[self.meas_plot_legend_key] = legend_text
 
-        with open(self.meas_dict["file_path_known"], "w+") as f:
-            # remove all software added keys, all those end in _known
-            save_dict = {k: v for k, v in self.meas_dict.items() if not k.endswith("_known")}
-            json.dump(save_dict, f, indent=4)
+        # the annotations are saved in a small file next to the result file, which is merged on load
+        file_path = self.meas_dict["file_path_known"]
+        write_annotations(file_path, self.meas_dict)
+
+        catalog = ResultCatalog.find_for_file(file_path)
+        if catalog is not None:
+            catalog.add_record(file_path, self.meas_dict)
 
         if self._callback_on_save is not None:
             self._callback_on_save()
@@ -16,78 +16,7 @@ from matplotlib.collections import PathCollection
 from matplotlib.figure import Figure
 
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
-
-
-class PlotData(object):
-    """This holds the data for a plot. It contains the x and y values as well as the type of plot.
-    Keeps track of changes: If x or y change it will alert the plot to update."""
-    _x = None
-
-    @property
-    def color(self):
-        return  self._color
-
-    @color.setter
-    def color(self, val):
-        self._color = val
-
-    @property
-    def x(self):
-        """Gets the x values of the plot."""
-        return self._x
-
-    @x.setter
-    def x(self, value):
-        """Sets the x values of the plot and updates them."""
-        if type(self._x) is ObservableList:  # if the old value was observable stop listening for changes
-            self._x.item_added.remove(self.__item_changed__)
-            self._x.item_removed.remove(self.__item_changed__)
-
-        if type(value) is ObservableList:  # if the value it observable start listening for changes
-            value.item_added.append(self.__item_changed__)
-            value.item_removed.append(self.__item_changed__)
-
-        self._x = value
-        self.__update__()
-
-    _y = None
-
-    @property
-    def y(self):
-        """Gets the y values of the plot."""
-        return self._y
-
-    @y.setter
-    def y(self, value):
-        """Sets the y values of the plot and updates them."""
-        if type(self._y) is ObservableList:  # if the old value was observable stop listening for changes
-            self._y.item_added.remove(self.__item_changed__)
-            self._y.item_removed.remove(self.__item_changed__)
-
-        if type(value) is ObservableList:  # if the value is observable start listening for changes
-            value.item_added.append(self.__item_changed__)
-            value.item_removed.append(self.__item_changed__)
-
-        self._y = value
-        self.__update__()
-
-    def __init__(self, x=None, y=None, plot_type='plot', color=None, **plot_args):
-        self.data_changed = list()
-        self.x = x
-        self.y = y
-        self.plot_type = plot_type
-        self.line_handle = None
-        self.plot_args = plot_args
-        self.plot_control = None
-        self._color = color
-
-    def __item_changed__(self, item):
-        """Gets called in case that x and y are observable and one of them has changed"""
-        self.__update__()
-
-    def __update__(self):
-        for callback in self.data_changed:
-            callback(self)
+from LabExT.ViewModel.Utilities.PlotData import PlotData
 
 
 def execute_in_plotting_thread(func):
@@ -439,13 +368,21 @@ class PlotControl(Frame):
             item.data_changed.remove(self.__plotdata_changed__)  # stop listening to changes of this plot data item
         self.__update_canvas__()
 
+    @staticmethod
+    def _as_plot_array(values):
+        """ Returns the values as numpy array which does not get updated by other threads anymore. """
+        if isinstance(values, np.ndarray):
+            # arrays are only ever replaced as a whole, no need to copy
+            return values
+        # lists (e.g. ObservableLists of live plots) can be appended to by other threads, copy them at once
+        return np.array(list(values))
+
     def sanitize_plot_data(self, plot_data: PlotData, sanitize_lengths=True):
         # do nothing if either the x or y data is set to None
         if plot_data.x is None or plot_data.y is None:
             return None, None
-        # Copy our data into arrays that don't get updated by other threads anymore
-        x_data = np.array([x for x in plot_data.x])  # get data for x axis
-        y_data = np.array([y for y in plot_data.y])  # get data for y axis
+        x_data = self._as_plot_array(plot_data.x)  # get data for x axis
+        y_data = self._as_plot_array(plot_data.y)  # get data for y axis
         # If the shapes mismatch, we cut away the end of the longer list.
         if sanitize_lengths:
             if len(x_data) != len(y_data):
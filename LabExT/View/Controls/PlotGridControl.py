@@ -7,6 +7,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 
 from tkinter import StringVar, OptionMenu, Label, Frame
 
+import numpy as np
+
 from LabExT.View.Controls.PlotControl import PlotControl
 from LabExT.View.Controls.PlotControl import PlotData
 from LabExT.ViewModel.Utilities.ObservableList import ObservableList
@@ -446,9 +448,9 @@ class PlotGridCell(Frame):
 
             # Take absolute value if we are using log plots
             if x_scale == 'log(|x|)':
-                data_x = [abs(x) for x in data_x]
+                data_x = np.abs(data_x)
             if y_scale == 'log(|x|)':
-                data_y = [abs(y) for y in data_y]
+                data_y = np.abs(data_y)
 
 
             if len(relevant_data) > 1:
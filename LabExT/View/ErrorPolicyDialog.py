@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import logging
+from tkinter import Toplevel, Label, Button, OptionMenu, Spinbox, Checkbutton, StringVar, BooleanVar
+from tkinter.messagebox import showerror
+
+from LabExT.Experiments.ErrorPolicy import ErrorPolicies, ErrorPolicy, ERROR_ACTIONS, DEFAULT_POLICY_KEY
+from LabExT.View.Controls.CustomFrame import CustomFrame
+
+USE_DEFAULT = 'use default'
+
+
+class ErrorPolicyDialog:
+    """
+    Configure what happens on measurement errors, per measurement class.
+    """
+
+    def __init__(self, parent, experiment_manager):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        parent : Tk
+            TKinter window parent.
+        experiment_manager : ExperimentManager
+            Instance of current ExperimentManager.
+        """
+        self._root = parent
+        self._exp = experiment_manager.exp
+        self.logger = logging.getLogger()
+
+        self._rows = {}  # policy key -> (action var, retries spinbox, search for peak var, requeue var)
+
+        # draw GUI
+        self.__setup__()
+
+    def __setup__(self):
+        """
+        Setup to toplevel GUI
+        """
+        #
+        # top level window
+        #
+        self.wizard_window = Toplevel(self._root)
+        self.wizard_window.title("Measurement Error Policies")
+        self.wizard_window.rowconfigure(1, weight=1)
+        self.wizard_window.columnconfigure(0, weight=1)
+        self.wizard_window.focus_force()
+
+        #
+        # top level hint
+        #
+        hint = "Here you can configure what happens if a measurement fails during an experiment.\n" \
+               "pause: pause the experiment and show the error (ToDo stays in the queue).\n" \
+               "retry: execute the ToDo again right away, optionally after a search for peak.\n" \
+               "skip: continue with the next ToDo. Re-queue once moves failed ToDos to the end of the queue.\n" \
+               "A summary of all failures is shown when the queue is finished."
+        top_hint = Label(self.wizard_window, text=hint, justify='left')
+        top_hint.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
+
+        #
+        # one row of settings per measurement class
+        #
+        policies_frame = CustomFrame(self.wizard_window)
+        policies_frame.title = "  Error policies  "
+        policies_frame.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+
+        for col, header in enumerate(["Measurement", "On error", "Retries", "Search for peak before retry",
+                                      "Re-queue once"]):
+            Label(policies_frame, text=header).grid(row=0, column=col, padx=5, pady=2, sticky='w')
+
+        policies = self._exp.error_policies
+        self._add_row(policies_frame, 1, DEFAULT_POLICY_KEY, "All other measurements", policies.default,
+                      ERROR_ACTIONS)
+        for row, class_name in enumerate(sorted(self._exp.measurement_list), start=2):
+            policy = policies.per_class.get(class_name)
+            self._add_row(policies_frame, row, class_name, class_name, policy, (USE_DEFAULT,) + ERROR_ACTIONS)
+
+        #
+        # bottom row buttons
+        #
+        quit_button = Button(self.wizard_window,
+                             text="Discard and Close",
+                             command=self.close_dialog,
+                             width=30,
+                             height=1)
+        quit_button.grid(row=2, column=0, padx=5, pady=5, sticky='sw')
+        save_button = Button(self.wizard_window,
+                             text="Save and Close",
+                             command=self.save_and_close,
+                             width=30,
+                             height=1)
+        save_button.grid(row=2, column=0, padx=5, pady=5, sticky='se')
+
+    def _add_row(self, parent, row, key, label, policy, action_choices):
+        """ Adds the widgets to edit one policy. If policy is None, the measurement class uses the default policy. """
+        shown_policy = policy if policy is not None else self._exp.error_policies.default
+
+        action_var = StringVar(parent, value=policy.action if policy is not None else USE_DEFAULT)
+        sfp_var = BooleanVar(parent, value=shown_policy.search_for_peak)
+        requeue_var = BooleanVar(parent, value=shown_policy.requeue)
+
+        Label(parent, text=label).grid(row=row, column=0, padx=5, pady=2, sticky='w')
+        OptionMenu(parent, action_var, *action_choices).grid(row=row, column=1, padx=5, pady=2, sticky='we')
+        retries = Spinbox(parent, from_=0, to=100, width=5)
+        retries.delete(0, 'end')
+        retries.insert(0, str(shown_policy.retries))
+        retries.grid(row=row, column=2, padx=5, pady=2, sticky='w')
+        Checkbutton(parent, variable=sfp_var).grid(row=row, column=3, padx=5, pady=2)
+        Checkbutton(parent, variable=requeue_var).grid(row=row, column=4, padx=5, pady=2)
+
+        self._rows[key] = (action_var, retries, sfp_var, requeue_var)
+
+    def save_and_close(self, *args):
+        policies_dict = {}
+        for key, (action_var, retries, sfp_var, requeue_var) in self._rows.items():
+            if action_var.get() == USE_DEFAULT:
+                continue
+            try:
+                n_retries = int(retries.get())
+            except ValueError:
+                showerror('Invalid number of retries',
+                          'The number of retries must be an integer.',
+                          parent=self.wizard_window)
+                return
+            policies_dict[key] = ErrorPolicy(action=action_var.get(),
+                                             retries=n_retries,
+                                             search_for_peak=sfp_var.get(),
+                                             requeue=requeue_var.get()).as_dict()
+
+        policies = ErrorPolicies.from_dict(policies_dict)
+        policies.save()
+        # the new policies apply from the next measurement error on, also during a running experiment
+        self._exp.error_policies = policies
+        self.logger.info('Saved measurement error policies: %s', policies.as_dict())
+
+        self.close_dialog()
+
+    def close_dialog(self, *args):
+        self.wizard_window.destroy()
@@ -15,6 +15,7 @@ from tkinter import Tk, Toplevel, Button
 
 import numpy as np
 
+from LabExT.Experiments.ResultFile import result_file_stem, write_hdf5_record
 from LabExT.Utils import run_with_wait_window
 from LabExT.View.Controls.ParameterTable import ParameterTable, ConfigParameter
 from LabExT.View.MeasurementTable import MeasurementTable
@@ -69,8 +70,8 @@ class Exporter:
             'Output File Format': ConfigParameter(
                 self._meas_window,
                 value=[
-                    'comma-separated values (.csv)'
-                    # 'HDF5 (.h5)'  # not implemented yet
+                    'comma-separated values (.csv)',
+                    'HDF5 (.h5)'
                 ],
                 parameter_type='dropdown'),
             'Output Directory': ConfigParameter(
@@ -134,9 +135,23 @@ class Exporter:
         ----------
         measurement_list : list
             List of all measurements to be exported.
+        output_directory : str
+            Directory to write the .h5 files to.
         """
-        self.logger.error('Export as hdf5 is not yet implemented. Please choose another option.')
-        raise NotImplementedError()
+        file_names = []
+        for measurement in measurement_list:
+            # get output directory and check for overwriting
+            orig_name = result_file_stem(measurement['file_path_known'])
+            oup_name = join(output_directory, orig_name) + ".h5"
+            if exists(oup_name):
+                self.logger.warning("Not exporting {:s} due to existing target file.".format(oup_name))
+                continue
+
+            # contrary to csv, this contains all meta-data and can be read-back into LabExT
+            write_hdf5_record(measurement, oup_name)
+
+            file_names.append(oup_name)
+        self.logger.info('Exported %s files as .h5: %s', len(file_names), file_names)
 
     def _csv_export(self, measurement_selection, output_directory):
         """ Implementation of export in CSV format. """
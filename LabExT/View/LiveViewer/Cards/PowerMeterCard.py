@@ -208,18 +208,20 @@ class PowerMeterCard(CardFrame):
         loaded_instr = self.instrument
         plot = self.plot_data
 
-        while self.enabled:
-            if self.paused:
-                sleep(0.2)
-            else:
-                with loaded_instr.thread_lock:
-                    loaded_instr.trigger()
-                    power_current = loaded_instr.fetch_power()
-                # add the values to the plot
-                del plot.y[0]
-                plot.y.append(power_current)
-
-        self.thread_finished = True
+        try:
+            while self.enabled:
+                if self.paused:
+                    sleep(0.2)
+                else:
+                    with loaded_instr.thread_lock:
+                        loaded_instr.trigger()
+                        power_current = loaded_instr.fetch_power()
+                    # add the values to the plot
+                    del plot.y[0]
+                    plot.y.append(power_current)
+        finally:
+            # stop_pm waits for this flag, also if polling failed
+            self.thread_finished = True
 
     def stop_instr(self):
         """
@@ -8,9 +8,11 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 import json
 import logging
 import os
+from threading import Thread
 from tkinter import Tk, Toplevel, messagebox
 
 from LabExT.Experiments.ToDo import ToDo
+from LabExT.Experiments.ToDoScheduler import optimize_todo_order
 from LabExT.Utils import DeprecatedException, get_configuration_file_path
 from LabExT.View.EditMeasurementWizard.EditMeasurementWizardController import EditMeasurementWizardController
 from LabExT.View.MainWindow.MainWindowModel import MainWindowModel
@@ -306,8 +308,7 @@ class MainWindowController:
             # uncheck hence unplot the current selection:
             self.view.frame.measurement_table.hide_all_plots(only_these_hashes=cur_sel_hashes)
             # remove the datasets
-            for meas_dict in cur_sel:
-                self.experiment_manager.exp.remove_measurement_dataset(meas_dict)
+            self.experiment_manager.exp.remove_measurement_datasets(cur_sel)
             # inform user
             msg = f'Removed {len(cur_sel):d} measurement datasets.'
             self.logger.info(msg)
@@ -327,8 +328,7 @@ class MainWindowController:
             # uncheck hence unplot the current selection:
             self.view.frame.measurement_table.hide_all_plots()
             # remove the datasets
-            for meas_dict in cur_sel:
-                self.experiment_manager.exp.remove_measurement_dataset(meas_dict)
+            self.experiment_manager.exp.remove_measurement_datasets(cur_sel)
             # inform user
             msg = f'Removed {len(cur_sel):d} measurement datasets.'
             self.logger.info(msg)
@@ -481,6 +481,84 @@ class MainWindowController:
             self.logger.warning(msg)
             messagebox.showwarning('No ToDo Selected', msg)
 
+    def todo_toggle_pin(self):
+        """
+        Called on user click on "Pin / Unpin"
+        """
+        selected_todo_idx = self.view.frame.to_do_table.get_selected_todo_index()
+        if selected_todo_idx is not None and selected_todo_idx < len(self.experiment_manager.exp.to_do_list):
+            selected_todo = self.experiment_manager.exp.to_do_list[selected_todo_idx]
+            selected_todo.pinned = not selected_todo.pinned
+
+            # tell GUI to update the tables
+            self.update_tables()
+            self.logger.info("{:s} ToDo with measurement id {:s} and device id {:s} at list index {:d}.".format(
+                "Pinned" if selected_todo.pinned else "Unpinned",
+                selected_todo.measurement.get_name_with_id(), str(selected_todo.device._id), selected_todo_idx
+            ))
+        else:
+            msg = 'No ToDo selected for pinning. Click on the row in the ToDo Queue which you want to pin.'
+            self.logger.warning(msg)
+            messagebox.showwarning('No ToDo Selected', msg)
+
+    def todo_optimize_order(self):
+        """
+        Called on user click on "Optimize Order"
+        """
+        todo_list = self.experiment_manager.exp.to_do_list
+        if not todo_list:
+            msg = 'The ToDo Queue is empty, there is nothing to optimize.'
+            self.logger.info(msg)
+            messagebox.showinfo('Empty ToDo Queue', msg)
+            return
+
+        # large queues take seconds to optimize, do it in the background to keep the GUI responsive
+        todos = list(todo_list)
+        result = {}
+
+        def optimize():
+            try:
+                result['order'] = optimize_todo_order(todos, mover=self.experiment_manager.mover)
+            except Exception as exc:
+                result['error'] = exc
+
+        self.root.config(cursor='circle')
+        thread = Thread(target=optimize, name='ToDo order optimization', daemon=True)
+        thread.start()
+        self.root.after(100, self._todo_apply_optimized_order, thread, todos, result)
+
+    def _todo_apply_optimized_order(self, thread, todos, result):
+        """
+        Polls the optimization thread started by todo_optimize_order and offers to apply its result.
+        """
+        if thread.is_alive():
+            self.root.after(100, self._todo_apply_optimized_order, thread, todos, result)
+            return
+        self.root.config(cursor='')
+
+        if 'error' in result:
+            self.logger.error("Could not optimize the ToDo order: %s", repr(result['error']))
+            messagebox.showerror('Optimize ToDo Order', 'Could not optimize the ToDo order: ' + repr(result['error']))
+            return
+        new_order, report = result['order']
+        self.logger.info("Optimized ToDo order: %s", report)
+
+        todo_list = self.experiment_manager.exp.to_do_list
+        if todo_list != todos:
+            msg = 'The ToDo Queue changed during the optimization, the optimized order is not applied.'
+            self.logger.warning(msg)
+            messagebox.showwarning('Optimize ToDo Order', msg)
+            return
+
+        flag = messagebox.askyesno('Optimize ToDo Order',
+                                   str(report) + '\n\nPinned ToDos keep their place and all ToDos of a device '
+                                                'stay grouped. Do you want to apply the optimized order?')
+        if flag:
+            # the list object must be kept, it is referenced by the ToDo tables
+            todo_list[:] = new_order
+            self.update_tables()
+            self.logger.info("Applied optimized ToDo order.")
+
     def todo_delete_all(self):
         """
         Called on user click on "Delete All"
@@ -489,6 +567,7 @@ class MainWindowController:
         if flag:
             for i in range(len(self.experiment_manager.exp.to_do_list)):
                 self.experiment_manager.exp.to_do_list.pop()
+            self.experiment_manager.exp.queue_checkpoint.clear()
             self.update_tables()  # tell GUI to update the table contents
             self.logger.info("Deleted All ToDos.")
 
@@ -508,6 +587,34 @@ class MainWindowController:
             return
         self.experiment_manager.import_chip(chip_path, chip_name)
 
+    def offer_queue_resume_possibility(self):
+        """
+        Offers to resume the ToDo queue of a previous run which did not finish, e.g. because LabExT crashed.
+        """
+        exp = self.experiment_manager.exp
+        checkpoint = exp.queue_checkpoint
+        document = checkpoint.load()
+        if document is None:
+            return
+        user_wants_resume = messagebox.askyesno(
+            title="Unfinished experiment run found!",
+            message=f"The previous experiment run on chip\n {document.get('chip name')} \nstopped on "
+                    f"{document.get('saved')} with {len(document['todos'])} ToDos left in the queue."
+                    f" Do you want to resume it? ToDos whose result file already exists will be skipped.")
+        if not user_wants_resume:
+            checkpoint.clear()
+            self.logger.info("Discarded queue checkpoint of previous run.")
+            return
+
+        n_restored, n_finished, errors = exp.restore_queue_checkpoint(document)
+        self.update_tables()
+        msg = f"Restored {n_restored} ToDos, skipped {n_finished} already finished ones."
+        if errors:
+            msg += "\n\nThe following ToDos could not be restored:\n" + "\n".join(errors)
+            messagebox.showwarning("Resumed experiment run", msg)
+        else:
+            messagebox.showinfo("Resumed experiment run", msg)
+
     def open_live_viewer(self):
         """ opens live-viewer window by calling appropriate menu listener function """
         self.view.frame.menu_listener.client_live_view()
@@ -552,6 +659,8 @@ class MainWindowController:
         self.model.experiment_handler.stop_experiment()
         # call the cleanup function of the documentation engine
         self.experiment_manager.docu.cleanup()
+        # released VISA sessions are kept open for reuse, close them before exiting
+        self.experiment_manager.resource_manager.close_idle_resources()
 
         self.root.destroy()
 
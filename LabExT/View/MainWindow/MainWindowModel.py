@@ -81,6 +81,12 @@ class MainWindowModel:
         self.var_sfp_ena_reason = StringVar(self.root)
         self.var_imeas_wait_time_str = StringVar(self.root, "0.0")
         self.var_imeas_wait_time_str.trace("w", self.exctrl_vars_changed)
+        self.var_pipelined = BooleanVar(self.root)
+        self.var_pipelined.trace("w", self.exctrl_vars_changed)
+        self.var_fast_metadata = BooleanVar(self.root)
+        self.var_fast_metadata.trace("w", self.exctrl_vars_changed)
+        # timing summary of the last run
+        self.var_run_timing = StringVar(self.root, "")
 
         # status of various sub-modules
         self.status_mover_driver_enabled = BooleanVar(self.root)
@@ -136,6 +142,9 @@ class MainWindowModel:
         self.commands[1].can_execute = False  # disable the stop button
         # enable change in save file parameters
         self.allow_change_save_params.set(True)
+        # show where the last run spent its time
+        if self.experiment_manager.exp.last_run_timing is not None:
+            self.var_run_timing.set(self.experiment_manager.exp.last_run_timing.status_text())
 
     def exctrl_vars_changed(self, *args):
         """
@@ -154,11 +163,15 @@ class MainWindowModel:
         self.logger.debug('State of auto move is: %s', self.var_auto_move.get())
         self.logger.debug('State of SFP enable is: %s', self.var_sfp_ena.get())
         self.logger.debug('Inter-measurement wait time is: %s', self.var_imeas_wait_time_str.get())
+        self.logger.debug('State of pipelined execution is: %s', self.var_pipelined.get())
+        self.logger.debug('State of fast instrument metadata is: %s', self.var_fast_metadata.get())
 
         # propagate change to experiment
         self.experiment_manager.exp.exctrl_pause_after_device = self.var_mm_pause.get()
         self.experiment_manager.exp.exctrl_auto_move_stages = self.var_auto_move.get()
         self.experiment_manager.exp.exctrl_enable_sfp = self.var_sfp_ena.get()
+        self.experiment_manager.exp.exctrl_pipelined_execution = self.var_pipelined.get()
+        self.experiment_manager.exp.exctrl_fast_metadata = self.var_fast_metadata.get()
 
         # allow wait time changes only if manual mode is not activated
         if self.var_mm_pause.get():
@@ -47,6 +47,9 @@ class MainWindowContextMenu(Menu):
             command=self._menu_listener.client_new_experiment)
         self._file.add_command(
             label="Load Data", command=self._menu_listener.client_load_data)
+        self._file.add_command(
+            label="Load Data from Result Catalog",
+            command=self._menu_listener.client_load_data_from_catalog)
         self._file.add_command(
             label="Import Chip",
             command=self._menu_listener.client_import_chip)
@@ -89,6 +92,9 @@ class MainWindowContextMenu(Menu):
         self._settings.add_command(
             label="Stage Driver Settings",
             command=self._menu_listener.client_stage_driver_settings)
+        self._settings.add_command(
+            label="Measurement Error Policies",
+            command=self._menu_listener.client_error_policies)
 
         self._help.add_command(
             label="Documentation and Help (F1)",
@@ -179,11 +185,29 @@ class MainWindowControlPanel(ControlPanel):
         self.exctrl_sfp_ena_reason.config(state='disabled')
         self.add_widget(self.exctrl_sfp_ena_reason, column=1, row=4, sticky='we')
 
+        self.exctrl_pipelined = Checkbutton(
+            self,
+            text="Save previous measurement while moving to next device",
+            variable=self.model.var_pipelined)
+        self.add_widget(self.exctrl_pipelined, column=0, row=5, sticky='we')
+
+        self.exctrl_fast_metadata = Checkbutton(
+            self,
+            text="Fast instrument metadata (only re-read changed settings)",
+            variable=self.model.var_fast_metadata)
+        self.add_widget(self.exctrl_fast_metadata, column=0, row=6, sticky='we')
+
+        self.run_timing_lbl = Label(self, textvariable=self.model.var_run_timing, wraplength=600, justify='left')
+        self.add_widget(self.run_timing_lbl, column=0, row=7, columnspan=2, sticky='we')
+
         self.rowconfigure(0, weight=1)
         self.rowconfigure(1, weight=1)
         self.rowconfigure(2, weight=1)
         self.rowconfigure(3, weight=1)
         self.rowconfigure(4, weight=1)
+        self.rowconfigure(5, weight=1)
+        self.rowconfigure(6, weight=1)
+        self.rowconfigure(7, weight=1)
         self.columnconfigure(0, weight=1)
         self.columnconfigure(1, weight=2)
 
@@ -441,6 +465,13 @@ class MainWindowToDoFrame(CustomFrame):
         _delete_all_todo_meas = Button(self, text='Delete All', command=self.controller.todo_delete_all, width=10)
         _delete_all_todo_meas.grid(row=0, column=6, padx=5, pady=5, sticky='w')
 
+        _pin_todo = Button(self, text='Pin / Unpin', command=self.controller.todo_toggle_pin, width=10)
+        _pin_todo.grid(row=0, column=7, padx=5, pady=5, sticky='w')
+
+        _optimize_todo_order = Button(self, text='Optimize Order', command=self.controller.todo_optimize_order,
+                                      width=12)
+        _optimize_todo_order.grid(row=0, column=8, padx=5, pady=5, sticky='w')
+
 
 class MainWindowFrame(Frame):
     """
@@ -8,7 +8,8 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 import logging
 from tkinter import Tk, messagebox, Toplevel, Label
 
-from LabExT.Experiments.StandardExperiment import calc_measurement_key
+from LabExT.Experiments.Annotations import annotations_of
+from LabExT.Experiments.MeasurementStore import calc_measurement_key
 from LabExT.View.CommentsEditor import CommentsEditor
 from LabExT.View.Controls.CustomFrame import CustomFrame
 from LabExT.View.Controls.CustomTtkWidgets import CustomScrollbar, CustomCheckboxTreeview
@@ -128,7 +129,7 @@ class MeasurementTable(CustomFrame):
         Tells the tree-view to update its data from the measurements list.
         """
 
-        leftover_hashes = [k for k in self._hashes_of_meas.keys()]
+        leftover_hashes = set(self._hashes_of_meas.keys())
         new_hashes = []
 
         for meas in self._measurements:
@@ -148,7 +149,7 @@ class MeasurementTable(CustomFrame):
             dev_rec = str(meas["device"]["type"]) + \
                       " - ID " + str(meas["device"]["id"]) + \
                       " - chip " + str(meas["chip"]["name"])
-            if dev_rec not in self._tree.get_children():
+            if not self._tree.exists(dev_rec):
                 dev_rec = self._tree.insert(parent="", index="end", iid=dev_rec, text=dev_rec, values=())
                 # expand device node to see newly added measurement lines
                 self._tree.item(dev_rec, open=True)
@@ -410,6 +411,12 @@ class MeasurementTable(CustomFrame):
         show_dict = {k: v for k, v in meas_dict.items() if k in [
             "measurement settings", "device"]}
         show_text = CommentsEditor.pprint_meas_dict(show_dict)
+        # the annotations are skipped by pprint_meas_dict, show them on top
+        annotations = annotations_of(meas_dict)
+        if CommentsEditor.meas_comment_key in annotations:
+            show_text = "comment: " + annotations[CommentsEditor.meas_comment_key] + "\n" + show_text
+        if CommentsEditor.meas_flags_key in annotations:
+            show_text = "flags: " + ", ".join(annotations[CommentsEditor.meas_flags_key]) + "\n" + show_text
         if show_text.endswith("\n"):
             show_text = show_text[:-1]
 
@@ -6,16 +6,17 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import datetime
-import json
 import logging
 import sys
 import webbrowser
 from threading import Thread
 from tkinter import filedialog, simpledialog, messagebox, Toplevel, Label, Frame, Button, TclError, font
 
+from LabExT.Experiments.BulkImport import BulkImporter
 from LabExT.Utils import run_with_wait_window, get_author_list
 from LabExT.View.AddonSettingsDialog import AddonSettingsDialog
 from LabExT.View.ConfigureStageWindow import ConfigureStageWindow
+from LabExT.View.ErrorPolicyDialog import ErrorPolicyDialog
 from LabExT.View.Controls.ParameterTable import ParameterTable, ConfigParameter
 from LabExT.View.ExperimentWizard.ExperimentWizardController import ExperimentWizardController
 from LabExT.View.Exporter import Exporter
@@ -24,6 +25,7 @@ from LabExT.View.InstrumentConnectionDebugger import InstrumentConnectionDebugge
 from LabExT.View.LiveViewer.LiveViewerController import LiveViewerController
 from LabExT.View.MoveDeviceWindow import MoveDeviceWindow
 from LabExT.View.ProgressBar.ProgressBar import ProgressBar
+from LabExT.View.ResultCatalogDialog import ResultCatalogDialog
 from LabExT.View.SearchForPeakPlotsWindow import SearchForPeakPlotsWindow
 from LabExT.View.StageDriverSettingsDialog import StageDriverSettingsDialog
 
@@ -55,8 +57,13 @@ class MListener:
         self.instrument_conn_debuger_toplevel = None
         self.addon_settings_dialog_toplevel = None
         self.stage_driver_settings_dialog_toplevel = None
+        self.error_policy_dialog_toplevel = None
+        self.result_catalog_dialog_toplevel = None
         self.pgb = None
         self.import_done = False
+        self.importer = None
+        self.imported_records = []
+        self.import_errors = []
 
     def client_new_experiment(self):
         """Called when user wants to start new Experiment. Calls the
@@ -87,8 +94,32 @@ class MListener:
         # tk returns this in tuples of strings
         file_names_tuple = filedialog.askopenfilenames(
             title='Select files for import',
-            filetypes=(('.json data', '*.json'), ('all files', '*.*')))
-        self.file_names = [*file_names_tuple]
+            filetypes=(('.json data', '*.json'),
+                       ('.h5 data', '*.h5'),
+                       ('compressed .json data', '*.json.gz *.json.zst *.json.lz4'),
+                       ('unfinished .json data', '*.json.part'),
+                       ('all files', '*.*')))
+        self.import_files([*file_names_tuple])
+
+    def client_load_data_from_catalog(self):
+        """ opens the dialog to select data to load from the result catalog """
+        if self.result_catalog_dialog_toplevel is not None:
+            try:
+                self.result_catalog_dialog_toplevel.deiconify()
+                self.result_catalog_dialog_toplevel.lift()
+                self.result_catalog_dialog_toplevel.focus_set()
+                self.logger.debug('Raising existing result catalog dialog window.')
+                return
+            except TclError:
+                pass  # Tcl Error if window cannot be raised because it has been closed
+
+        rcd = ResultCatalogDialog(self._root, self._experiment_manager, load_callback=self.import_files)
+        self.result_catalog_dialog_toplevel = rcd.wizard_window
+
+    def import_files(self, file_names):
+        """Imports the given result files into the current experiment, while showing a progress bar.
+        """
+        self.file_names = list(file_names)
 
         self.logger.debug('Files to import: %s', self.file_names)
 
@@ -97,36 +128,52 @@ class MListener:
             return
 
         self.import_done = False
+        self.importer = BulkImporter(self.file_names)
         # here we set up the progress bar
-        self.pgb = ProgressBar(self._root, 'Importing Files...')
+        self.pgb = ProgressBar(self._root, 'Importing Files...', cancel_command=self.importer.cancel)
 
         # now we can start the import thread
         Thread(target=self.import_runner).start()
 
         # this little loop here updates the progress bar
         while not self.import_done:
+            if self.importer.cancelled:
+                self.pgb.text.set('Cancelling import...')
+            else:
+                self.pgb.text.set('Importing Files... {:d} / {:d}'.format(self.importer.n_done,
+                                                                          self.importer.n_total))
             self.pgb.update_idletasks()
             self.pgb.update()
 
         # finally, we can destroy the progress bar
         self.pgb.destroy()
 
-    def import_runner(self):        # load measurements and append to current experiment's measurement list
-        loaded_files = []
-        for file_name in self.file_names:
-            try:
-                with open(file_name) as f:
-                    raw_data = json.load(f)
-                    self._experiment_manager.exp.load_measurement_dataset(raw_data, file_name)
-                loaded_files.append(file_name)
-            except Exception as exc:
-                msg = "Could not import file {:s} due to: {:s}".format(file_name, repr(exc))
-                self.logger.error(msg)
-                messagebox.showerror("Load Data Error", msg)
-                continue
-
-        self.logger.info('Finished data import of files: {:s}'.format(str(loaded_files)))
-        self.import_done = True
+        # add all records at once, in the GUI thread, so the GUI is updated only once
+        added_files, errors = self._experiment_manager.exp.load_measurement_datasets(self.imported_records)
+        errors = self.import_errors + [(fp, repr(exc)) for fp, exc in errors]
+
+        self.logger.info('Finished data import of %d files, %d failed.', len(added_files), len(errors))
+        self.logger.debug('Imported files: %s', added_files)
+        if errors:
+            for file_name, error in errors:
+                self.logger.error("Could not import file {:s} due to: {:s}".format(file_name, error))
+            msg = "Could not import {:d} of {:d} files:\n".format(len(errors), len(self.file_names))
+            msg += "\n".join("{:s}: {:s}".format(fp, err) for fp, err in errors[:10])
+            if len(errors) > 10:
+                msg += "\n... see log for all errors."
+            messagebox.showerror("Load Data Error", msg)
+
+    def import_runner(self):
+        """ Reads the selected files, executed in a separate thread. """
+        try:
+            # also replays journals of measurements which were interrupted by a crash
+            # values are read from the file only when plotted or exported
+            self.imported_records, self.import_errors = self.importer.run()
+        except Exception as exc:
+            self.imported_records = []
+            self.import_errors = [(fp, repr(exc)) for fp in self.file_names]
+        finally:
+            self.import_done = True
 
     def client_import_chip(self):
         """Called when user wants to import a new chip. Opens a file
@@ -406,6 +453,21 @@ class MListener:
         sdd = StageDriverSettingsDialog(self._root)
         self.stage_driver_settings_dialog_toplevel = sdd.wizard_window
 
+    def client_error_policies(self):
+        """ opens the measurement error policies dialog """
+        if self.error_policy_dialog_toplevel is not None:
+            try:
+                self.error_policy_dialog_toplevel.deiconify()
+                self.error_policy_dialog_toplevel.lift()
+                self.error_policy_dialog_toplevel.focus_set()
+                self.logger.debug('Raising existing error policies dialog window.')
+                return
+            except TclError:
+                pass  # Tcl Error if window cannot be raised because it has been closed
+
+        epd = ErrorPolicyDialog(self._root, self._experiment_manager)
+        self.error_policy_dialog_toplevel = epd.wizard_window
+
     def client_documentation(self):
         """ Opens the documentation in a new browser session. """
         self._experiment_manager.show_documentation(None)
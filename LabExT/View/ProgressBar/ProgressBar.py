@@ -6,13 +6,17 @@ This program is free software and comes with ABSOLUTELY NO WARRANTY; for details
 """
 
 import _tkinter
-from tkinter import Toplevel, ttk, Label, StringVar
+from tkinter import Toplevel, ttk, Label, StringVar, Button
 
 import platform
 
 
 class ProgressBar(Toplevel):
-    def __init__(self, root, text):
+    def __init__(self, root, text, cancel_command=None):
+        """
+        Shows a window with an indeterminate progress bar and text. If cancel_command is given, a cancel button is
+        shown which calls it.
+        """
         self.root = root
         Toplevel.__init__(self, self.root)
 
@@ -29,6 +33,10 @@ class ProgressBar(Toplevel):
                     textvariable=self.text)
         lbl.grid(row=0, column=0)
 
+        if cancel_command is not None:
+            self.cancel_button = Button(self, text='Cancel', command=cancel_command)
+            self.cancel_button.grid(row=2, column=0, pady=5)
+
         # do not disable window border for MacOS w/ TKinter 8.6 as tkinter is buggy
         if 'darwin' not in platform.system().lower():
             # don't show classical window bar for progress bar
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2022  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+import json
+import logging
+from tkinter import Toplevel, Label, Button, Entry, OptionMenu, Checkbutton, StringVar, BooleanVar, filedialog
+from tkinter.messagebox import showerror
+
+from LabExT.Experiments.ResultCatalog import ResultCatalog
+from LabExT.Utils import run_with_wait_window
+from LabExT.View.Controls.CustomFrame import CustomFrame
+
+ANY = 'any'
+
+
+def parse_device_ids(text):
+    """
+    Parses a comma separated list of device ids and inclusive ranges, e.g. '1, 4-6' -> [1, 4, 5, 6]. Returns None
+    for an empty text. Ids which are not integers are kept as strings.
+    """
+    ids = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part[1:]:
+            start, stop = part.split('-', 1)
+            ids.extend(range(int(start), int(stop) + 1))
+        else:
+            try:
+                ids.append(int(part))
+            except ValueError:
+                ids.append(part)
+    return ids if ids else None
+
+
+class ResultCatalogDialog:
+    """
+    Selects result files to load by querying the result catalog of a directory.
+    """
+
+    def __init__(self, parent, experiment_manager, load_callback):
+        """
+        Constructor
+
+        Parameters
+        ----------
+        parent : Tk
+            TKinter window parent.
+        experiment_manager : ExperimentManager
+            Instance of current ExperimentManager.
+        load_callback : callable
+            Called with the list of selected file paths when the user clicks load.
+        """
+        self._root = parent
+        self._experiment_manager = experiment_manager
+        self._load_callback = load_callback
+        self.logger = logging.getLogger()
+
+        self.catalog = None
+
+        self._directory_var = StringVar(parent, value=str(
+            experiment_manager.exp.save_parameters['Raw output path'].value))
+        self._chip_var = StringVar(parent, value=ANY)
+        self._meas_name_var = StringVar(parent, value=ANY)
+        self._dev_type_var = StringVar(parent, value=ANY)
+        self._flag_var = StringVar(parent, value=ANY)
+        self._dev_ids_var = StringVar(parent, value='')
+        self._since_var = StringVar(parent, value='')
+        self._until_var = StringVar(parent, value='')
+        self._only_valid_var = BooleanVar(parent, value=True)
+        self._count_var = StringVar(parent, value='')
+
+        self._option_menus = {}
+
+        # draw GUI
+        self.__setup__()
+        self.open_catalog()
+
+    def __setup__(self):
+        """
+        Setup to toplevel GUI
+        """
+        self.wizard_window = Toplevel(self._root)
+        self.wizard_window.title("Load Data from Result Catalog")
+        self.wizard_window.columnconfigure(0, weight=1)
+        self.wizard_window.focus_force()
+
+        #
+        # catalog directory
+        #
+        dir_frame = CustomFrame(self.wizard_window)
+        dir_frame.title = "  Result directory  "
+        dir_frame.grid(row=0, column=0, padx=5, pady=5, sticky='nswe')
+        dir_frame.columnconfigure(0, weight=1)
+        Entry(dir_frame, textvariable=self._directory_var, width=60).grid(row=0, column=0, padx=5, pady=5,
+                                                                          sticky='we')
+        Button(dir_frame, text="Browse...", command=self._browse_directory).grid(row=0, column=1, padx=5, pady=5)
+        Button(dir_frame, text="Rescan", command=self.rescan).grid(row=0, column=2, padx=5, pady=5)
+
+        #
+        # filters
+        #
+        filter_frame = CustomFrame(self.wizard_window)
+        filter_frame.title = "  Filter  "
+        filter_frame.grid(row=1, column=0, padx=5, pady=5, sticky='nswe')
+        filter_frame.columnconfigure(1, weight=1)
+
+        for row, (label, column, var) in enumerate([("Chip name", 'chip_name', self._chip_var),
+                                                    ("Measurement", 'measurement_name', self._meas_name_var),
+                                                    ("Device type", 'device_type', self._dev_type_var)]):
+            Label(filter_frame, text=label).grid(row=row, column=0, padx=5, pady=2, sticky='w')
+            menu = OptionMenu(filter_frame, var, ANY)
+            menu.grid(row=row, column=1, padx=5, pady=2, sticky='we')
+            self._option_menus[column] = (menu, var)
+
+        Label(filter_frame, text="Flag").grid(row=3, column=0, padx=5, pady=2, sticky='w')
+        flag_menu = OptionMenu(filter_frame, self._flag_var, ANY)
+        flag_menu.grid(row=3, column=1, padx=5, pady=2, sticky='we')
+        self._option_menus['user_flags'] = (flag_menu, self._flag_var)
+
+        for row, (label, var) in enumerate([("Device ids (e.g. 1, 4-6)", self._dev_ids_var),
+                                            ("Started since (e.g. 2022-06-01)", self._since_var),
+                                            ("Started until", self._until_var)], start=4):
+            Label(filter_frame, text=label).grid(row=row, column=0, padx=5, pady=2, sticky='w')
+            Entry(filter_frame, textvariable=var).grid(row=row, column=1, padx=5, pady=2, sticky='we')
+
+        Checkbutton(filter_frame, text="Only finished measurements without error",
+                    variable=self._only_valid_var).grid(row=7, column=0, columnspan=2, padx=5, pady=2, sticky='w')
+
+        for var in (self._chip_var, self._meas_name_var, self._dev_type_var, self._flag_var, self._dev_ids_var,
+                    self._since_var, self._until_var, self._only_valid_var):
+            var.trace_add('write', lambda *args: self.update_count())
+
+        Label(self.wizard_window, textvariable=self._count_var).grid(row=2, column=0, padx=5, pady=5, sticky='w')
+
+        #
+        # bottom row buttons
+        #
+        Button(self.wizard_window, text="Close", command=self.close_dialog,
+               width=30).grid(row=3, column=0, padx=5, pady=5, sticky='sw')
+        Button(self.wizard_window, text="Load Selected Records", command=self.load_and_close,
+               width=30).grid(row=3, column=0, padx=5, pady=5, sticky='se')
+
+    def _browse_directory(self):
+        directory = filedialog.askdirectory(parent=self.wizard_window, initialdir=self._directory_var.get())
+        if directory:
+            self._directory_var.set(directory)
+            self.open_catalog()
+
+    def open_catalog(self):
+        """ Opens the catalog of the chosen directory and fills the filter choices. """
+        try:
+            self.catalog = ResultCatalog(self._directory_var.get())
+        except Exception as exc:
+            self.catalog = None
+            showerror("Result Catalog Error", "Could not open the result catalog: " + repr(exc),
+                      parent=self.wizard_window)
+            return
+        self._update_choices()
+
+    def rescan(self):
+        """ Brings the catalog up to date with the files in the directory. """
+        self.open_catalog()  # the directory might have been edited
+        if self.catalog is None:
+            return
+        run_with_wait_window(self.wizard_window, "Rescanning result files...", self.catalog.rescan)
+        self._update_choices()
+
+    def _update_choices(self):
+        for column, (menu, var) in self._option_menus.items():
+            if column == 'user_flags':
+                choices = sorted({flag for flags in self.catalog.distinct(column) for flag in json.loads(flags)})
+            else:
+                choices = [str(c) for c in self.catalog.distinct(column)]
+            menu['menu'].delete(0, 'end')
+            for choice in [ANY] + choices:
+                menu['menu'].add_command(label=choice, command=lambda v=var, c=choice: v.set(c))
+            if var.get() not in choices:
+                var.set(ANY)
+        self.update_count()
+
+    def _criteria(self):
+        """ Returns the query criteria of the current filter settings. Raises ValueError on invalid input. """
+        criteria = {}
+        for key, var in (('chip_name', self._chip_var), ('measurement_name', self._meas_name_var),
+                         ('device_type', self._dev_type_var), ('flag', self._flag_var)):
+            if var.get() != ANY:
+                criteria[key] = var.get()
+        device_ids = parse_device_ids(self._dev_ids_var.get())
+        if device_ids is not None:
+            criteria['device_id'] = device_ids
+        if self._since_var.get().strip():
+            criteria['since'] = self._since_var.get().strip()
+        if self._until_var.get().strip():
+            criteria['until'] = self._until_var.get().strip()
+        if self._only_valid_var.get():
+            criteria['finished'] = True
+            criteria['with_error'] = False
+        return criteria
+
+    def update_count(self):
+        if self.catalog is None:
+            self._count_var.set("No result catalog opened.")
+            return
+        try:
+            n_matching = self.catalog.count(**self._criteria())
+        except ValueError:
+            self._count_var.set("Invalid device ids.")
+            return
+        self._count_var.set("{:d} of {:d} records match.".format(n_matching, len(self.catalog)))
+
+    def load_and_close(self, *args):
+        if self.catalog is None:
+            return
+        try:
+            file_paths = self.catalog.file_paths(**self._criteria())
+        except ValueError:
+            showerror("Invalid filter", "The device ids must be integers or ranges like 4-6.",
+                      parent=self.wizard_window)
+            return
+        self.close_dialog()
+        self.logger.debug('Loading %d records selected in the result catalog.', len(file_paths))
+        if file_paths:
+            self._load_callback(file_paths)
+
+    def close_dialog(self, *args):
+        self.wizard_window.destroy()
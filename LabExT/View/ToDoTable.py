@@ -127,17 +127,26 @@ class ToDoTable(CustomFrame):
             # case: item in original list and displayed list, all fine, skip to next
             if todo_hash in leftover_hashes:
                 self._tree.set(item=todo_hash, column=0, value=str(tidx))
+                self._tree.set(item=todo_hash, column=3, value=self._measurement_label(todo))
                 self._tree.move(item=todo_hash, parent="", index=tidx)
                 leftover_hashes.remove(todo_hash)
                 continue
 
             # case: new item added to original list and not yet in displayed list
-            dev, measurement = todo.device, todo.measurement
+            dev = todo.device
             todo_values = (tidx,
                            dev._id,
                            dev._type,
-                           measurement.get_name_with_id())
+                           self._measurement_label(todo))
             self._tree.insert(parent="", index=tidx, iid=todo_hash, values=todo_values)
 
         # case: item still in displayed list but not anymore in original list
         self._tree.delete(*leftover_hashes)
+
+    @staticmethod
+    def _measurement_label(todo):
+        """ Returns the text displayed in the measurement column, marks pinned ToDos. """
+        label = todo.measurement.get_name_with_id()
+        if getattr(todo, 'pinned', False):
+            label += " (pinned)"
+        return label
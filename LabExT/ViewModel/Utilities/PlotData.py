@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LabExT  Copyright (C) 2021  ETH Zurich and Polariton Technologies AG
+This program is free software and comes with ABSOLUTELY NO WARRANTY; for details see LICENSE file.
+"""
+
+from LabExT.ViewModel.Utilities.ObservableList import ObservableList
+
+
+class PlotData(object):
+    """This holds the data for a plot. It contains the x and y values as well as the type of plot.
+    Keeps track of changes: If x or y change it will alert the plot to update."""
+    _x = None
+
+    @property
+    def color(self):
+        return  self._color
+
+    @color.setter
+    def color(self, val):
+        self._color = val
+
+    @property
+    def x(self):
+        """Gets the x values of the plot."""
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        """Sets the x values of the plot and updates them."""
+        if type(self._x) is ObservableList:  # if the old value was observable stop listening for changes
+            self._x.item_added.remove(self.__item_changed__)
+            self._x.item_removed.remove(self.__item_changed__)
+
+        if type(value) is ObservableList:  # if the value it observable start listening for changes
+            value.item_added.append(self.__item_changed__)
+            value.item_removed.append(self.__item_changed__)
+
+        self._x = value
+        self.__update__()
+
+    _y = None
+
+    @property
+    def y(self):
+        """Gets the y values of the plot."""
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        """Sets the y values of the plot and updates them."""
+        if type(self._y) is ObservableList:  # if the old value was observable stop listening for changes
+            self._y.item_added.remove(self.__item_changed__)
+            self._y.item_removed.remove(self.__item_changed__)
+
+        if type(value) is ObservableList:  # if the value is observable start listening for changes
+            value.item_added.append(self.__item_changed__)
+            value.item_removed.append(self.__item_changed__)
+
+        self._y = value
+        self.__update__()
+
+    def __init__(self, x=None, y=None, plot_type='plot', color=None, **plot_args):
+        self.data_changed = list()
+        self.x = x
+        self.y = y
+        self.plot_type = plot_type
+        self.line_handle = None
+        self.plot_args = plot_args
+        self.plot_control = None
+        self._color = color
+
+    def __item_changed__(self, item):
+        """Gets called in case that x and y are observable and one of them has changed"""
+        self.__update__()
+
+    def __update__(self):
+        for callback in self.data_changed:
+            callback(self)
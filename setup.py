@@ -33,6 +33,7 @@ setuptools.setup(
     entry_points={
         'console_scripts': [
             'LabExT = LabExT.Main:main',
+            'labext-batch = LabExT.BatchRunner:main',
         ],
     },
     include_package_data=True